@@ -0,0 +1,50 @@
+from typing import Any, List
+
+from pydantic import BaseModel, Field
+
+
+class BatchOperationSchema(BaseModel):
+    """
+    Pydantic schema for a sub-request of a batch.
+
+    Attributes:
+    - `method` (str): The HTTP method.
+    - `path` (str): The path of the route, with its query string.
+    - `body` (Any): The JSON body, if any.
+    """
+    method: str = Field(pattern="^(GET|POST|PUT|PATCH|DELETE)$")
+    path: str = Field(pattern="^/")
+    body: Any = None
+
+
+class BatchRequestSchema(BaseModel):
+    """
+    Pydantic schema for a batch request.
+
+    Attributes:
+    - `requests` (List[BatchOperationSchema]): The sub-requests, in order.
+    """
+    requests: List[BatchOperationSchema]
+
+
+class BatchResultSchema(BaseModel):
+    """
+    Pydantic schema for the response to a sub-request.
+
+    Attributes:
+    - `status` (int): The HTTP status code.
+    - `body` (Any): The decoded JSON body, or the text of other bodies.
+    """
+    status: int
+    body: Any = None
+
+
+class BatchSchema(BaseModel):
+    """
+    Pydantic schema for the response to a batch.
+
+    Attributes:
+    - `responses` (List[BatchResultSchema]): The responses, in the order
+    of the sub-requests.
+    """
+    responses: List[BatchResultSchema]
@@ -0,0 +1,161 @@
+"""
+Execution of batch sub-requests.
+
+Sub-requests go through the whole application, middleware included, as
+if they had been sent separately, except that they are exempt from the
+concurrency limit (the batch already holds a slot) and that the user
+authenticated by the batch is reused instead of verifying the token again.
+
+GET sub-requests run concurrently, at most `BATCH_CONCURRENCY` at a time.
+Other methods are barriers: a write starts once every earlier sub-request
+has completed, and later sub-requests start once it has completed, so
+reads listed after a write see its effect.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import BATCH_CONCURRENCY
+from app.core.deadline import remaining
+from app.users.schemas import UserOut
+from app.users.services import authenticated_user
+
+from .schemas import BatchOperationSchema
+
+logger = logging.getLogger(__name__)
+
+BATCH_PATH = "/batch"
+# Streams never complete, their sub-requests would block the batch
+STREAM_PREFIX = "/events/"
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+def _decode(headers: Headers, body: bytes) -> Any:
+    if not body:
+        return None
+    content_type = dict(headers).get(b"content-type", b"")
+    if content_type.startswith(b"application/json"):
+        return json.loads(body)
+    return body.decode("utf-8", "replace")
+
+
+async def dispatch(
+        app,
+        parent: dict,
+        operation: BatchOperationSchema,
+        headers: Headers
+) -> Dict[str, Any]:
+    """
+    Run one sub-request through the application.
+
+    Parameters:
+    - `app`: The ASGI application.
+    - `parent` (dict): The scope of the batch request.
+    - `operation` (BatchOperationSchema): The sub-request.
+    - `headers`: The headers forwarded from the batch request.
+
+    Returns:
+    - The `status` and decoded `body` of the response.
+    """
+    path, _, query = operation.path.partition("?")
+    if path.rstrip("/") == BATCH_PATH:
+        return {"status": 400, "body": {"detail": "Nested batch requests are not allowed"}}
+    if path.startswith(STREAM_PREFIX):
+        return {"status": 400, "body": {"detail": "Event streams are not allowed in a batch"}}
+
+    body = b"" if operation.body is None else json.dumps(operation.body).encode()
+    headers = [*headers, (b"content-length", str(len(body)).encode())]
+    if operation.body is not None:
+        headers.append((b"content-type", b"application/json"))
+    timeout = remaining()
+    if timeout is not None:
+        headers.append((b"x-request-timeout", f"{max(timeout, 0.001):.3f}".encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": parent.get("asgi", {"version": "3.0"}),
+        "http_version": parent.get("http_version", "1.1"),
+        "method": operation.method,
+        "scheme": parent.get("scheme", "http"),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": parent.get("root_path", ""),
+        "headers": headers,
+        "client": parent.get("client"),
+        "server": parent.get("server"),
+        "limiter_exempt": True,
+    }
+    request_sent = False
+    response: Dict[str, Any] = {"status": 500, "headers": [], "body": b""}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # The client of a sub-request never disconnects
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        logger.exception("Batch sub-request %s %s failed", operation.method, operation.path)
+    return {
+        "status": response["status"],
+        "body": _decode(response["headers"], response["body"]),
+    }
+
+
+async def run_batch(
+        app,
+        parent: dict,
+        operations: List[BatchOperationSchema],
+        user: UserOut,
+        headers: Headers,
+        concurrency: int = BATCH_CONCURRENCY
+) -> List[Dict[str, Any]]:
+    """
+    Run the sub-requests of a batch.
+
+    Parameters:
+    - `app`: The ASGI application.
+    - `parent` (dict): The scope of the batch request.
+    - `operations` (List[BatchOperationSchema]): The sub-requests.
+    - `user` (UserOut): The user authenticated by the batch request.
+    - `headers`: The headers forwarded to every sub-request.
+    - `concurrency` (int): The maximum number of GETs running at once.
+
+    Returns:
+    - The responses, in the order of the sub-requests.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(operations)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int, operation: BatchOperationSchema) -> None:
+        async with semaphore:
+            results[index] = await dispatch(app, parent, operation, headers)
+
+    token = authenticated_user.set(user)
+    try:
+        reads: List[asyncio.Task] = []
+        for index, operation in enumerate(operations):
+            if operation.method == "GET":
+                reads.append(asyncio.create_task(run(index, operation)))
+                continue
+            await asyncio.gather(*reads)
+            reads = []
+            results[index] = await dispatch(app, parent, operation, headers)
+        await asyncio.gather(*reads)
+    finally:
+        authenticated_user.reset(token)
+    return results
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from app.core.config import BATCH_MAX_REQUESTS
+from app.users.schemas import UserOut
+from app.users.services import get_current_user
+
+from .schemas import BatchRequestSchema, BatchSchema
+from .services import run_batch
+
+batch_router = APIRouter(prefix="/batch", tags=["Batch"])
+
+
+@batch_router.post("", response_model=BatchSchema)
+async def batch_view(
+        request: Request,
+        data: BatchRequestSchema,
+        current_user: UserOut = Depends(get_current_user)
+):
+    """
+    Run several requests to the other routes at once.
+
+    The user is authenticated once for all the sub-requests. Consecutive
+    GETs run concurrently, any other method runs after the sub-requests
+    listed before it and before the ones listed after it.
+
+    Args:
+    - `data` (BatchRequestSchema): The sub-requests, no more than
+    `BATCH_MAX_REQUESTS`. Bodies are sent as JSON.
+
+    Raises:
+    - `HTTPException`: If too many sub-requests are sent.
+
+    Returns:
+    - `BatchSchema`: The status and body of every sub-request, in order.
+    A failed sub-request does not fail the batch.
+
+    Example:
+    ```json
+    {"requests": [
+        {"method": "GET", "path": "/products/?limit=20"},
+        {"method": "GET", "path": "/products/42"},
+        {"method": "GET", "path": "/cart/"}
+    ]}
+    ```
+    """
+    if len(data.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"No more than {BATCH_MAX_REQUESTS} requests per batch"
+        )
+    headers = [
+        (name, value) for name, value in request.scope["headers"]
+        if name == b"authorization"
+    ]
+    responses = await run_batch(
+        request.app, request.scope, data.requests, current_user, headers
+    )
+    return BatchSchema(responses=responses)
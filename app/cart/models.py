@@ -10,11 +10,16 @@ class Cart(Model):
     - `user` (fields.ForeignKeyField): The user associated with the cart item.
     - `product` (fields.ForeignKeyField): The product associated with the cart item.
     - `quantity` (fields.IntField): The quantity of the product in the cart.
+    - `created_at` (Datetime): The timestamp when the item was added.
+    - `updated_at` (Datetime): The timestamp when the item was last changed,
+    items untouched for `CART_TTL_DAYS` are removed by the cart sweeper.
     """
     id = fields.IntField(pk=True)
     user = fields.ForeignKeyField('models.User', related_name='user_cart')
     product = fields.ForeignKeyField('models.Product', related_name='product_cart')
     quantity = fields.IntField(default=1)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    updated_at = fields.DatetimeField(auto_now=True, index=True)
 
     @property
     def total_price(self):
@@ -22,3 +27,4 @@ class Cart(Model):
 
     class Meta:
         unique_together = ('user', 'product')
+        indexes = (('product',),)
@@ -1,35 +1,59 @@
 from typing import List, Optional
 from tortoise.exceptions import IntegrityError
+from tortoise.transactions import in_transaction
+
+from app.core.fastpath import fetch_cart_lines
+from app.core.invalidation import publish
+from app.products.services import (
+    record_cart_cooccurrence, record_cart_popularity
+)
 
 from .models import Cart
 from .schemas import CartCreateSchema, CartSchema, CartUpdateSchema
 
+# Invalidation topic of cart changes, published as
+# [user_id, product_id, quantity], 0 for removed items
+CART_TOPIC = "cart"
+
 
 async def create_cart(cart_data: CartCreateSchema, user_id) -> Cart:
     try:
-        cart = await Cart.create(**cart_data.model_dump(), user_id=user_id)
-        return cart
+        async with in_transaction():
+            cart = await Cart.create(**cart_data.model_dump(), user_id=user_id)
+            await record_cart_cooccurrence(user_id, cart.product_id)
+            await record_cart_popularity(cart.product_id, 1, cart.quantity)
     except IntegrityError:
         return None
+    await publish(CART_TOPIC, [user_id, cart.product_id, cart.quantity])
+    return cart
 
 
 async def get_list_cart(user_id: int) -> List[CartSchema]:
-    cart_list = await Cart.filter(user_id=user_id).all()
+    cart_list = await fetch_cart_lines(user_id)
     return cart_list
 
 
 async def update_cart(user_id: int, product_id: int, cart_data: CartUpdateSchema) -> Optional[Cart]:
-    cart = await Cart.filter(product_id=product_id, user_id=user_id).update(**cart_data.model_dump())
+    cart = await Cart.filter(product_id=product_id, user_id=user_id).first()
+    if cart is None:
+        return None
 
-    if cart:
-        return await Cart.get(product_id=product_id, user_id=user_id)
-    return None
+    quantity = cart.quantity
+    async with in_transaction():
+        await cart.update_from_dict(cart_data.model_dump())
+        await cart.save()
+        await record_cart_popularity(product_id, 0, cart.quantity - quantity)
+    await publish(CART_TOPIC, [user_id, product_id, cart.quantity])
+    return cart
 
 
 async def delete_cart(product_id: int, user_id: int) -> bool:
     cart = await Cart.filter(product_id=product_id, user_id=user_id).first()
     if cart:
-        await cart.delete()
+        async with in_transaction():
+            await cart.delete()
+            await record_cart_popularity(product_id, -1, -cart.quantity)
+        await publish(CART_TOPIC, [user_id, product_id, 0])
         return True
     else:
         return False
@@ -0,0 +1,150 @@
+"""
+Removal of abandoned cart items.
+
+Every worker runs a sweeper deleting the items whose `updated_at` is older
+than `CART_TTL_DAYS`. Items are deleted oldest first, in transactions of at
+most `CART_SWEEP_BATCH_SIZE` rows separated by `CART_SWEEP_BATCH_DELAY`, so
+the sweep never holds many row locks at once. On Postgres the batch skips
+rows locked by other transactions, which also lets several workers sweep
+at the same time without waiting on each other.
+"""
+import asyncio
+import datetime
+import logging
+import random
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from tortoise import connections
+from tortoise.transactions import in_transaction
+
+from app.core.config import (
+    CART_SWEEP_BATCH_DELAY, CART_SWEEP_BATCH_SIZE, CART_SWEEP_INTERVAL,
+    CART_TTL_DAYS
+)
+from app.core.db import execute_sql
+from app.core.invalidation import publish
+from app.products.services import record_cart_popularity
+
+from .services import CART_TOPIC
+
+logger = logging.getLogger(__name__)
+
+_DELETE_BATCH = """
+DELETE FROM "cart" WHERE "id" IN (
+    SELECT "id" FROM "cart" WHERE "updated_at" < $1
+    ORDER BY "updated_at" LIMIT $2 {lock}
+) RETURNING "user_id", "product_id", "quantity"
+"""
+
+# Removed items published at once on the cart topic
+PUBLISH_CHUNK_SIZE = 200
+
+# Counters of this worker, reported in the log after every run
+stats: Dict[str, float] = {
+    "runs": 0,
+    "batches": 0,
+    "removed": 0,
+    "last_removed": 0,
+    "last_duration": 0.0,
+}
+
+_task: Optional[asyncio.Task] = None
+
+
+async def _delete_batch(cutoff: datetime.datetime, batch_size: int) -> int:
+    if connections.get("default").capabilities.dialect == "sqlite":
+        query = _DELETE_BATCH.format(lock="")
+        cutoff = cutoff.isoformat(" ")
+    else:
+        query = _DELETE_BATCH.format(lock="FOR UPDATE SKIP LOCKED")
+
+    async with in_transaction():
+        _, rows = await execute_sql(query, [cutoff, batch_size])
+        products = Counter()
+        quantities = Counter()
+        for row in rows:
+            products[row["product_id"]] += 1
+            quantities[row["product_id"]] += row["quantity"]
+        for product_id, carts in products.items():
+            await record_cart_popularity(product_id, -carts, -quantities[product_id])
+    # Small enough publications reach other workers with their keys
+    for start in range(0, len(rows), PUBLISH_CHUNK_SIZE):
+        chunk = rows[start:start + PUBLISH_CHUNK_SIZE]
+        await publish(CART_TOPIC, *([row["user_id"], row["product_id"], 0] for row in chunk))
+    return len(rows)
+
+
+async def sweep_expired_carts(
+        ttl_days: float = CART_TTL_DAYS,
+        batch_size: int = CART_SWEEP_BATCH_SIZE,
+        delay: float = CART_SWEEP_BATCH_DELAY
+) -> int:
+    """
+    Delete the cart items not updated for `ttl_days`.
+
+    The popularity counters of the removed items are decremented in the
+    same transaction as the deletion.
+
+    Parameters:
+    - `ttl_days` (float): The age after which an item expires.
+    - `batch_size` (int): The maximum number of items deleted per transaction.
+    - `delay` (float): The pause between two batches, in seconds.
+
+    Returns:
+    - The number of removed items.
+    """
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=ttl_days)
+    started = time.perf_counter()
+    removed = 0
+    while True:
+        count = await _delete_batch(cutoff, batch_size)
+        stats["batches"] += 1
+        removed += count
+        if count < batch_size:
+            break
+        await asyncio.sleep(delay)
+
+    stats["runs"] += 1
+    stats["removed"] += removed
+    stats["last_removed"] = removed
+    stats["last_duration"] = time.perf_counter() - started
+    logger.info(
+        "Cart sweep removed %d expired items in %.2fs (%d removed since start)",
+        removed, stats["last_duration"], stats["removed"]
+    )
+    return removed
+
+
+async def _run(interval: float) -> None:
+    # Workers started together should not sweep at the same moment.
+    await asyncio.sleep(random.uniform(0, interval))
+    while True:
+        try:
+            await sweep_expired_carts()
+        except Exception:
+            logger.exception("Cart sweep failed")
+        await asyncio.sleep(interval)
+
+
+async def start_cart_sweeper() -> None:
+    """
+    Start sweeping expired cart items every `CART_SWEEP_INTERVAL` seconds.
+    """
+    global _task
+    _task = asyncio.create_task(_run(CART_SWEEP_INTERVAL))
+
+
+async def stop_cart_sweeper() -> None:
+    """
+    Stop the cart sweeper.
+    """
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,35 @@
+from tortoise.models import Model
+from tortoise import fields
+
+PATH_SEPARATOR = "/"
+
+
+class Category(Model):
+    """
+    Represents a product category in the category tree.
+
+    The tree is stored as a materialized path: `path` holds the IDs of all
+    ancestors and of the category itself, e.g. `1/4/9/`. All descendants of
+    a category share its path as a prefix, so a subtree is selected with a
+    single indexed `LIKE 'prefix%'` lookup.
+
+    Attributes:
+    - `id` (int): The unique identifier for the category.
+    - `name` (str): The name of the category.
+    - `parent` (fields.ForeignKeyField): The parent category, None for roots.
+    - `path` (str): The materialized path of the category.
+    - `depth` (int): The depth of the category, 0 for roots.
+
+    Methods:
+    - `__str__`: Returns the string representation of the category.
+    """
+    id = fields.IntField(pk=True)
+    name = fields.CharField(max_length=255)
+    parent = fields.ForeignKeyField(
+        'models.Category', related_name='children', null=True
+    )
+    path = fields.CharField(max_length=255, default="", index=True)
+    depth = fields.IntField(default=0)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,35 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+from tortoise.contrib.pydantic import pydantic_model_creator
+
+from .models import Category
+
+CategoryRetrieveSchema = pydantic_model_creator(Category, name="Category")
+
+
+class CategoryCreateUpdateSchema(BaseModel):
+    """
+    Pydantic schema for creating or updating a category.
+
+    Attributes:
+    - `name` (str): The name of the category.
+    - `parent_id` (int | None): The ID of the parent category,
+    None for a root category.
+    """
+    name: str = Field(..., max_length=150)
+    parent_id: Optional[int] = None
+
+
+class CategoryTreeSchema(BaseModel):
+    """
+    Pydantic schema for a node of the category tree.
+
+    Attributes:
+    - `id` (int): The ID of the category.
+    - `name` (str): The name of the category.
+    - `children` (List[CategoryTreeSchema]): The child categories.
+    """
+    id: int
+    name: str
+    children: List["CategoryTreeSchema"] = []
@@ -0,0 +1,193 @@
+import json
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from tortoise.transactions import in_transaction
+
+from app.core.cache import get_cache
+from app.core.invalidation import publish
+from app.products.models import Product
+
+from .models import PATH_SEPARATOR, Category
+from .schemas import CategoryCreateUpdateSchema
+
+category_cache = get_cache("category")
+
+TREE_CACHE_KEY = "tree"
+
+
+async def _get_parent(parent_id: Optional[int]) -> Optional[Category]:
+    if parent_id is None:
+        return None
+    parent = await Category.filter(id=parent_id).first()
+    if parent is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Parent category not found"
+        )
+    return parent
+
+
+async def create_category(category_data: CategoryCreateUpdateSchema) -> Category:
+    """
+    Create a new category.
+
+    Args:
+    - `category_data` (CategoryCreateUpdateSchema):
+    The data for creating the category.
+
+    Returns:
+    - `Category`: The created category.
+    """
+    parent = await _get_parent(category_data.parent_id)
+    async with in_transaction():
+        category = await Category.create(
+            name=category_data.name,
+            parent=parent,
+            depth=parent.depth + 1 if parent else 0
+        )
+        category.path = f"{parent.path if parent else ''}{category.id}{PATH_SEPARATOR}"
+        await category.save(update_fields=["path"])
+    await publish(category_cache.name)
+    return category
+
+
+async def get_category(category_id: int) -> Optional[Category]:
+    """
+    Get a category by its ID.
+
+    Args:
+    - `category_id` (int): The ID of the category to retrieve.
+
+    Returns:
+    - `Category` | `None`: The retrieved category or None if not found.
+    """
+    return await Category.filter(id=category_id).first()
+
+
+async def update_category(
+        category_id: int,
+        category_data: CategoryCreateUpdateSchema
+) -> Optional[Category]:
+    """
+    Rename a category or move it with its subtree under another parent.
+
+    Args:
+    - `category_id` (int): The ID of the category to update.
+    - `category_data` (CategoryCreateUpdateSchema):
+    The data for updating the category.
+
+    Returns:
+    - `Category` | `None`:
+    The updated category or None if the category doesn't exist.
+
+    Raises:
+    - `HTTPException`: If the category would be moved into its own subtree.
+    """
+    category = await get_category(category_id)
+    if category is None:
+        return None
+
+    parent = await _get_parent(category_data.parent_id)
+    if parent and parent.path.startswith(category.path):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Category cannot be moved into its own subtree"
+        )
+
+    old_path = category.path
+    new_path = f"{parent.path if parent else ''}{category.id}{PATH_SEPARATOR}"
+    depth_shift = (parent.depth + 1 if parent else 0) - category.depth
+
+    async with in_transaction():
+        category.name = category_data.name
+        category.parent = parent
+        if new_path != old_path:
+            descendants = await Category.filter(path__startswith=old_path)
+            for descendant in descendants:
+                descendant.path = new_path + descendant.path[len(old_path):]
+                descendant.depth += depth_shift
+            await Category.bulk_update(descendants, fields=["path", "depth"])
+            category.path = new_path
+            category.depth += depth_shift
+        await category.save()
+    await publish(category_cache.name)
+    return category
+
+
+async def delete_category(category_id: int) -> bool:
+    """
+    Delete a category with its whole subtree.
+
+    Products of the deleted categories are kept without a category.
+
+    Args:
+    - `category_id` (int): The ID of the category to delete.
+
+    Returns:
+    - `bool`: True if the category was deleted, False if it doesn't exist.
+    """
+    category = await get_category(category_id)
+    if category is None:
+        return False
+    await Category.filter(path__startswith=category.path).delete()
+    await publish(category_cache.name)
+    return True
+
+
+async def get_category_tree() -> bytes:
+    """
+    Get the whole category tree serialized to JSON.
+
+    The serialized tree is cached and rebuilt after any category change.
+
+    Returns:
+    - `bytes`: A JSON list of root categories with nested `children`.
+    """
+    tree = category_cache.get(TREE_CACHE_KEY)
+    if tree is not None:
+        return tree
+
+    generation = category_cache.generation
+    nodes = {}
+    roots = []
+    categories = await Category.all().order_by("depth", "name").values(
+        "id", "name", "parent_id"
+    )
+    for category in categories:
+        node = nodes[category["id"]] = {
+            "id": category["id"],
+            "name": category["name"],
+            "children": []
+        }
+        if category["parent_id"] is None:
+            roots.append(node)
+        else:
+            nodes[category["parent_id"]]["children"].append(node)
+
+    tree = json.dumps(roots, ensure_ascii=False).encode()
+    category_cache.set(TREE_CACHE_KEY, tree, generation)
+    return tree
+
+
+async def get_category_products(
+        category: Category,
+        skip: int = 0,
+        limit: int = 10
+) -> List[Product]:
+    """
+    Get active products of a category and all of its descendants.
+
+    Args:
+    - `category` (Category): The root of the subtree.
+    - `skip` (int): The number of products to skip.
+    - `limit` (int): The maximum number of products to retrieve.
+
+    Returns:
+    - `List[Product]`: The products of the subtree ordered by ID.
+    """
+    query = Product.filter(
+        category__path__startswith=category.path,
+        is_active=True
+    ).order_by("id").offset(skip).limit(limit)
+    return await query
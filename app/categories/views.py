@@ -0,0 +1,138 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+
+from app.products.schemas import ProductRetrieveSchema
+from app.users.services import get_current_user
+
+from .schemas import (
+    CategoryCreateUpdateSchema, CategoryRetrieveSchema, CategoryTreeSchema
+)
+from .services import (
+    create_category, get_category, update_category,
+    delete_category, get_category_tree, get_category_products
+)
+
+category_router = APIRouter(prefix="/categories", tags=["Categories"])
+
+
+@category_router.post("/create",
+                      response_model=CategoryRetrieveSchema,
+                      dependencies=[Depends(get_current_user)]
+                      )
+async def create_category_view(category_data: CategoryCreateUpdateSchema):
+    """
+    Create a new category.
+
+    Args:
+    - `category_data` (CategoryCreateUpdateSchema):
+    The data for creating the category.
+
+    Returns:
+    - `CategoryRetrieveSchema`: The created category.
+    """
+    category = await create_category(category_data)
+    return await CategoryRetrieveSchema.from_tortoise_orm(category)
+
+
+@category_router.get("/",
+                     response_model=list[CategoryTreeSchema],
+                     dependencies=[Depends(get_current_user)]
+                     )
+async def get_category_tree_view():
+    """
+    Get the whole category tree.
+
+    Returns:
+    - `List[CategoryTreeSchema]`: Root categories with nested children.
+    """
+    return Response(
+        content=await get_category_tree(),
+        media_type="application/json"
+    )
+
+
+@category_router.get("/{category_id}/products",
+                     response_model=list[ProductRetrieveSchema],
+                     dependencies=[Depends(get_current_user)]
+                     )
+async def get_category_products_view(
+        category_id: int,
+        skip: int = 0,
+        limit: int = 10
+):
+    """
+    Get products of a category and all of its descendants.
+
+    Args:
+    - `category_id` (int): The ID of the category.
+    - `skip` (int): The number of products to skip.
+    - `limit` (int): The maximum number of products to retrieve.
+
+    Returns:
+    - `List[ProductRetrieveSchema]`: The products of the subtree.
+
+    Raises:
+    - `HTTPException`: If the category with the given ID is not found.
+    """
+    category = await get_category(category_id)
+    if category is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Category not found"
+        )
+    return await get_category_products(category, skip, limit)
+
+
+@category_router.put("/{category_id}",
+                     response_model=CategoryRetrieveSchema,
+                     dependencies=[Depends(get_current_user)]
+                     )
+async def update_category_view(
+        category_id: int,
+        category_data: CategoryCreateUpdateSchema
+):
+    """
+    Rename or move a category.
+
+    Args:
+    - `category_id` (int): The ID of the category to update.
+    - `category_data` (CategoryCreateUpdateSchema):
+    The data for updating the category.
+
+    Returns:
+    - `CategoryRetrieveSchema`: The updated category.
+
+    Raises:
+    - `HTTPException`: If the category with the given ID is not found.
+    """
+    category = await update_category(category_id, category_data)
+    if category is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Category not found"
+        )
+    return await CategoryRetrieveSchema.from_tortoise_orm(category)
+
+
+@category_router.delete("/{category_id}",
+                        response_model=dict,
+                        dependencies=[Depends(get_current_user)]
+                        )
+async def delete_category_view(category_id: int):
+    """
+    Delete a category with its subtree.
+
+    Args:
+    - `category_id` (int): The ID of the category to delete.
+
+    Returns:
+    - `message`: A message indicating successful deletion.
+
+    Raises:
+    - `HTTPException`: If the category with the given ID is not found.
+    """
+    if await delete_category(category_id):
+        return {"message": "Category deleted"}
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Category not found"
+    )
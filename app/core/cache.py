@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+from app.core.config import CACHE_MAXSIZE, CACHE_TTL
+from app.core.invalidation import subscribe
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    In-process LRU cache with a per-entry time to live.
+
+    Every cache is registered on the invalidation bus under its name, so
+    `publish(name, *keys)` drops the entries in this worker and in every
+    other worker listening on the channel.
+
+    Attributes:
+    - `name` (str): The name used to publish invalidations for the cache.
+    - `maxsize` (int): The maximum number of entries kept in memory.
+    - `ttl` (float): The number of seconds an entry stays valid.
+    - `generation` (int): Incremented on every invalidation; pass the value
+    read before a database query to `set` to avoid caching stale rows.
+    """
+
+    def __init__(self, name: str, maxsize: int = CACHE_MAXSIZE, ttl: float = CACHE_TTL):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Store a value in the cache.
+
+        Parameters:
+        - `key`: The cache key.
+        - `value`: The value to store.
+        - `generation` (int | None): The cache generation observed before the
+        value was loaded. The value is dropped if an invalidation happened
+        in the meantime.
+        """
+        if generation is not None and generation != self.generation:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, keys: Optional[Iterable[Hashable]] = None) -> None:
+        """
+        Drop the given keys, or every entry when `keys` is None.
+        """
+        self.generation += 1
+        if keys is None:
+            self._data.clear()
+            return
+        for key in keys:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_caches: Dict[str, LocalCache] = {}
+
+
+def get_cache(name: str, **kwargs: Any) -> LocalCache:
+    """
+    Get or create the process-wide cache registered under `name`.
+
+    Parameters:
+    - `name` (str): The cache name, also used as the invalidation topic.
+    - `kwargs`: Extra `LocalCache` arguments used when the cache is created.
+
+    Returns:
+    - `LocalCache`: The cache instance.
+    """
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches[name] = LocalCache(name, **kwargs)
+        subscribe(name, cache.invalidate)
+    return cache
@@ -1,8 +1,13 @@
 import os
+from urllib.parse import urlencode
+
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Database engine: "postgres" or "sqlite"
+DATABASE_ENGINE: str = os.getenv("DATABASE_ENGINE", "postgres")
+
 POSTGRES_DB: str = os.getenv("POSTGRES_DB")
 POSTGRES_USER: str = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD")
@@ -12,12 +17,33 @@ POSTGRES_PORT: int = os.getenv("POSTGRES_PORT")
 DATABASE_LOGIN = f"asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}"
 DATABASE_CONNECT = f"@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
-DATABASE_URL = DATABASE_LOGIN + DATABASE_CONNECT
+DATABASE_DSN = f"postgres://{POSTGRES_USER}:{POSTGRES_PASSWORD}" + DATABASE_CONNECT
+
+SQLITE_PATH: str = os.getenv("SQLITE_PATH", "db.sqlite3")
+
+# Pragmas applied to every SQLite connection. WAL lets readers in other
+# processes work while a write is in progress, busy_timeout makes writers
+# wait for the lock instead of failing immediately.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000)),
+    "cache_size": -64000,
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+if DATABASE_ENGINE == "sqlite":
+    DATABASE_URL = f"sqlite://{SQLITE_PATH}?{urlencode(SQLITE_PRAGMAS)}"
+else:
+    DATABASE_URL = DATABASE_LOGIN + DATABASE_CONNECT
 
 MODELS = [
     "app.users.models",
     "app.products.models",
-    "app.cart.models"
+    "app.cart.models",
+    "app.categories.models"
 ]
 
 # Tortoise ORM settings
@@ -40,3 +66,127 @@ TORTOISE_ORM = {
 
 JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM")
+
+# In-process cache settings
+CACHE_TTL: int = int(os.getenv("CACHE_TTL", 60))
+CACHE_MAXSIZE: int = int(os.getenv("CACHE_MAXSIZE", 10000))
+
+# Cross-worker cache invalidation ("postgres" or "memory")
+INVALIDATION_BACKEND: str = os.getenv(
+    "INVALIDATION_BACKEND",
+    "postgres" if DATABASE_ENGINE == "postgres" else "memory"
+)
+INVALIDATION_CHANNEL: str = os.getenv("INVALIDATION_CHANNEL", "cache_invalidation")
+
+# Maximum number of ids accepted by the batch product lookup
+PRODUCT_BATCH_MAX_IDS: int = int(os.getenv("PRODUCT_BATCH_MAX_IDS", 100))
+
+# Production server settings, see app/serve.py
+SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT: int = int(os.getenv("SERVER_PORT", 8000))
+# 0 means one worker per available CPU
+SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", 0))
+SERVER_KEEPALIVE: int = int(os.getenv("SERVER_KEEPALIVE", 5))
+SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", 2048))
+SERVER_GRACEFUL_TIMEOUT: int = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30))
+SERVER_PRELOAD: bool = os.getenv("SERVER_PRELOAD", "false").lower() == "true"
+
+# Slow query log, a threshold of 0 disables it
+SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 200))
+# Share of slow statements explained in the background, 0.0 - 1.0
+SLOW_QUERY_EXPLAIN_RATE: float = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", 0))
+
+# Password hashing, see app/users/hashing.py
+PASSWORD_SCHEME: str = os.getenv("PASSWORD_SCHEME", "bcrypt")
+PASSWORD_BCRYPT_ROUNDS: int = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", 12))
+PASSWORD_ARGON2_TIME_COST: int = int(os.getenv("PASSWORD_ARGON2_TIME_COST", 3))
+PASSWORD_ARGON2_MEMORY_COST: int = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", 65536))
+PASSWORD_HASH_TARGET_MS: float = float(os.getenv("PASSWORD_HASH_TARGET_MS", 250))
+PASSWORD_CALIBRATE: bool = os.getenv("PASSWORD_CALIBRATE", "false").lower() == "true"
+
+# Bulk user provisioning, see app/users/bulk.py
+USER_BULK_MAX_ROWS: int = int(os.getenv("USER_BULK_MAX_ROWS", 5000))
+USER_BULK_CHUNK_SIZE: int = int(os.getenv("USER_BULK_CHUNK_SIZE", 500))
+# Hashing processes of each server worker, 0 shares the available CPUs
+# among the SERVER_WORKERS workers
+USER_BULK_HASH_WORKERS: int = int(os.getenv("USER_BULK_HASH_WORKERS", 0))
+
+# Popular products, see app/products/services.py
+POPULAR_CACHE_TTL: float = float(os.getenv("POPULAR_CACHE_TTL", 30))
+# Half-life of the add-to-cart events counted by the trending score
+POPULAR_HALF_LIFE_HOURS: float = float(os.getenv("POPULAR_HALF_LIFE_HOURS", 48))
+
+# Abandoned cart expiry, see app/cart/sweeper.py
+# Cart items untouched for this many days are removed, 0 disables the sweeper
+CART_TTL_DAYS: float = float(os.getenv("CART_TTL_DAYS", 30))
+CART_SWEEP_INTERVAL: float = float(os.getenv("CART_SWEEP_INTERVAL", 3600))
+CART_SWEEP_BATCH_SIZE: int = int(os.getenv("CART_SWEEP_BATCH_SIZE", 500))
+# Pause between two batches, in seconds
+CART_SWEEP_BATCH_DELAY: float = float(os.getenv("CART_SWEEP_BATCH_DELAY", 0.2))
+
+# Product delta sync, see GET /products/changes
+PRODUCT_CHANGES_MAX_LIMIT: int = int(os.getenv("PRODUCT_CHANGES_MAX_LIMIT", 500))
+# Changes younger than this many seconds are held back until concurrent
+# transactions with an earlier `updated_at` had time to commit
+PRODUCT_CHANGES_LAG: float = float(os.getenv("PRODUCT_CHANGES_LAG", 5))
+
+# On-demand profiling, see app/profiling. An empty token disables it.
+PROFILING_TOKEN: str = os.getenv("PROFILING_TOKEN", "")
+PROFILING_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", 5))
+PROFILING_MAX_SECONDS: float = float(os.getenv("PROFILING_MAX_SECONDS", 60))
+# Number of profiles kept in memory by every worker
+PROFILING_KEEP: int = int(os.getenv("PROFILING_KEEP", 20))
+PROFILING_TRACEMALLOC_FRAMES: int = int(os.getenv("PROFILING_TRACEMALLOC_FRAMES", 10))
+
+# Adaptive concurrency limit of every worker, see app/core/limiter.py.
+# An initial limit of 0 disables it.
+LIMITER_INITIAL_LIMIT: int = int(os.getenv("LIMITER_INITIAL_LIMIT", 64))
+LIMITER_MIN_LIMIT: int = int(os.getenv("LIMITER_MIN_LIMIT", 4))
+LIMITER_MAX_LIMIT: int = int(os.getenv("LIMITER_MAX_LIMIT", 1024))
+# Requests slower than this lower the limit
+LIMITER_TARGET_MS: float = float(os.getenv("LIMITER_TARGET_MS", 300))
+LIMITER_BACKOFF: float = float(os.getenv("LIMITER_BACKOFF", 0.9))
+# Share of the limit available to expensive routes such as login
+LIMITER_EXPENSIVE_SHARE: float = float(os.getenv("LIMITER_EXPENSIVE_SHARE", 0.5))
+LIMITER_RETRY_AFTER: int = int(os.getenv("LIMITER_RETRY_AFTER", 1))
+
+# Deadline of every request in seconds, see app/core/deadline.py.
+# 0 disables deadlines.
+REQUEST_TIMEOUT: float = float(os.getenv("REQUEST_TIMEOUT", 10))
+REQUEST_TIMEOUT_BULK: float = float(os.getenv("REQUEST_TIMEOUT_BULK", 300))
+
+# Batch requests: maximum number of sub-requests and of GET sub-requests
+# running at the same time
+BATCH_MAX_REQUESTS: int = int(os.getenv("BATCH_MAX_REQUESTS", 20))
+BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", 4))
+
+# Pre-rendered first pages of the product list, see
+# app/products/snapshots.py. 0 pages disables the snapshots.
+CATALOG_SNAPSHOT_PAGES: int = int(os.getenv("CATALOG_SNAPSHOT_PAGES", 5))
+CATALOG_SNAPSHOT_PAGE_SIZES: list = [
+    int(size) for size in os.getenv("CATALOG_SNAPSHOT_PAGE_SIZES", "10").split(",") if size
+]
+
+# Rows changed by every statement of a bulk product update
+PRODUCT_BULK_CHUNK_SIZE: int = int(os.getenv("PRODUCT_BULK_CHUNK_SIZE", 5000))
+
+# Access token revocation, see app/users/revocation.py. The in-memory
+# filter is sized for this many revoked tokens at the given false positive
+# rate, and rebuilt every interval (in seconds) to forget expired tokens.
+REVOCATION_FILTER_CAPACITY: int = int(os.getenv("REVOCATION_FILTER_CAPACITY", 100000))
+REVOCATION_FILTER_ERROR_RATE: float = float(os.getenv("REVOCATION_FILTER_ERROR_RATE", 0.001))
+REVOCATION_REFRESH_INTERVAL: float = float(os.getenv("REVOCATION_REFRESH_INTERVAL", 600))
+
+# Product view counters, see app/products/view_counter.py. Views are
+# written every interval (in seconds), a worker counts at most this many
+# products between two writes.
+VIEW_COUNTER_FLUSH_INTERVAL: float = float(os.getenv("VIEW_COUNTER_FLUSH_INTERVAL", 10))
+VIEW_COUNTER_MAX_PRODUCTS: int = int(os.getenv("VIEW_COUNTER_MAX_PRODUCTS", 50000))
+
+# Server-sent event streams, see app/events. Every stream buffers at most
+# EVENTS_QUEUE_SIZE events and is closed when it falls further behind.
+EVENTS_QUEUE_SIZE: int = int(os.getenv("EVENTS_QUEUE_SIZE", 100))
+EVENTS_MAX_SUBSCRIBERS: int = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", 1000))
+EVENTS_MAX_PRODUCTS: int = int(os.getenv("EVENTS_MAX_PRODUCTS", 100))
+# Interval of the keep-alive comments, in seconds
+EVENTS_KEEPALIVE: float = float(os.getenv("EVENTS_KEEPALIVE", 15))
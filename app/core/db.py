@@ -0,0 +1,176 @@
+import functools
+from typing import Any, Awaitable, Callable, List, Optional
+
+from tortoise import Tortoise, connections, fields
+from tortoise.backends.base.client import BaseTransactionWrapper
+from tortoise.backends.sqlite.executor import SqliteExecutor, to_db_decimal
+
+# Client methods through which Tortoise sends every query
+QUERY_METHODS = (
+    "execute_query",
+    "execute_query_dict",
+    "execute_insert",
+    "execute_many",
+    "execute_script",
+)
+
+QueryHook = Callable[[str, Optional[list], Callable[[], Awaitable[Any]]], Awaitable[Any]]
+
+_hooks: List[QueryHook] = []
+
+
+def add_query_hook(hook: QueryHook) -> None:
+    """
+    Register a hook wrapping every query sent through instrumented clients.
+
+    A hook is called as `await hook(query, values, call_next)` and must
+    return the result of `await call_next()`. Hooks are applied in
+    registration order, the first one being the outermost.
+    """
+    if hook not in _hooks:
+        _hooks.append(hook)
+
+
+async def apply_query_hooks(
+        query: str,
+        values: Optional[list],
+        call_next: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Run a query issued outside of the Tortoise clients through the hooks.
+
+    Parameters:
+    - `query` (str): The SQL statement.
+    - `values` (list | None): The statement parameters.
+    - `call_next`: A coroutine function executing the statement.
+
+    Returns:
+    - The result of `call_next`.
+    """
+    for hook in reversed(_hooks):
+        call_next = functools.partial(hook, query, values, call_next)
+    return await call_next()
+
+
+def _wrap(method: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    @functools.wraps(method)
+    async def wrapper(query: str, *args: Any, **kwargs: Any) -> Any:
+        values = args[0] if args else kwargs.get("values")
+        return await apply_query_hooks(
+            query, values, functools.partial(method, query, *args, **kwargs)
+        )
+
+    wrapper.__wrapped_query_method__ = method
+    return wrapper
+
+
+def _instrument(client: Any) -> None:
+    for name in QUERY_METHODS:
+        method = getattr(client, name)
+        if not hasattr(method, "__wrapped_query_method__"):
+            setattr(client, name, _wrap(method))
+    in_transaction = client._in_transaction
+    if hasattr(in_transaction, "__wrapped_query_method__"):
+        return
+
+    # Queries inside `in_transaction()` go through a separate transaction
+    # client, instrumented before the block starts. Nested blocks reuse it.
+    @functools.wraps(in_transaction)
+    def wrapper() -> Any:
+        context = in_transaction()
+        _instrument(context.connection)
+        return context
+
+    wrapper.__wrapped_query_method__ = in_transaction
+    client._in_transaction = wrapper
+
+
+def instrument_connections() -> None:
+    """
+    Route the queries of all open Tortoise connections, including those
+    sent inside `in_transaction()` blocks, through the hooks.
+    """
+    for client in connections.all():
+        _instrument(client)
+
+
+def unwrapped(client: Any, name: str) -> Callable[..., Awaitable[Any]]:
+    """
+    Get a client method bypassing the query hooks.
+    """
+    method = getattr(client, name)
+    return getattr(method, "__wrapped_query_method__", method)
+
+
+async def execute_sql(
+        query: str,
+        values: Optional[list] = None,
+        connection_name: str = "default"
+) -> Any:
+    """
+    Execute a raw statement written with Postgres `$1` style placeholders.
+
+    On SQLite the placeholders are rewritten to the numbered `?1` form,
+    so the statement must not contain `$` elsewhere.
+
+    Parameters:
+    - `query` (str): The SQL statement.
+    - `values` (list | None): The statement parameters.
+    - `connection_name` (str): The Tortoise connection to use.
+
+    Returns:
+    - The `(rows affected, rows)` tuple of `execute_query`.
+    """
+    connection = connections.get(connection_name)
+    if connection.capabilities.dialect == "sqlite":
+        query = query.replace("$", "?")
+    return await connection.execute_query(query, values)
+
+
+def register_sqlite_decimals() -> None:
+    """
+    Store the values of `DecimalField` subclasses as decimals on SQLite.
+
+    The SQLite executor looks up value converters by exact field class,
+    so the values of subclasses such as `PriceField` would reach sqlite3
+    as `Decimal` objects, which it cannot bind. Call it after
+    `Tortoise.init` and before the first query.
+    """
+    for models in Tortoise.apps.values():
+        for model in models.values():
+            for field in model._meta.fields_map.values():
+                if isinstance(field, fields.DecimalField):
+                    SqliteExecutor.TO_DB_OVERRIDE.setdefault(type(field), to_db_decimal)
+
+
+async def create_index_concurrently(db: Any, name: str, target: str) -> None:
+    """
+    Build a Postgres index without locking writes to its table.
+
+    CREATE INDEX CONCURRENTLY cannot run inside a transaction, so
+    migrations using it must be applied with
+    `aerich upgrade --in-transaction False`.
+
+    Parameters:
+    - `db`: The connection client given to the migration.
+    - `name` (str): The name of the index.
+    - `target` (str): The rest of the statement, e.g. `ON "cart" ("product_id")`.
+
+    Raises:
+    - `RuntimeError`: If called inside a transaction.
+    """
+    if isinstance(db, BaseTransactionWrapper):
+        raise RuntimeError(
+            "This migration creates indexes concurrently, "
+            "run it with `aerich upgrade --in-transaction False`"
+        )
+    # A concurrent build that failed leaves an invalid index behind,
+    # which IF NOT EXISTS would keep.
+    invalid = await db.execute_query_dict(
+        "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = $1 AND NOT pg_index.indisvalid",
+        [name]
+    )
+    if invalid:
+        await db.execute_script(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+    await db.execute_script(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" {target}')
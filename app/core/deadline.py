@@ -0,0 +1,198 @@
+"""
+Request deadlines.
+
+Every request gets a deadline, `REQUEST_TIMEOUT` seconds after it is
+received unless its route has its own timeout in `ROUTE_TIMEOUTS`. A client
+may shorten it with the `X-Request-Timeout` header, in seconds, but never
+extend it.
+
+The deadline is enforced at two levels:
+- every query of the instrumented connections runs with the remaining
+time as timeout, a query still running at the deadline is cancelled,
+which asyncpg forwards to the server;
+- the request handler is cancelled when the deadline passes before the
+response starts, or when the client disconnects, so no further query
+is issued for a response nobody will read.
+
+A request past its deadline receives a 504 response.
+"""
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.core.config import REQUEST_TIMEOUT, REQUEST_TIMEOUT_BULK
+
+logger = logging.getLogger(__name__)
+
+# Routes whose timeout differs from `REQUEST_TIMEOUT`
+ROUTE_TIMEOUTS: Dict[Tuple[str, str], float] = {
+    ("POST", "/users/bulk"): REQUEST_TIMEOUT_BULK,
+    ("POST", "/products/bulk"): REQUEST_TIMEOUT_BULK,
+}
+
+# Requests under these prefixes have no deadline, event streams last
+# for the whole connection
+EXEMPT_PREFIXES = ("/debug/", "/events/")
+
+# Deadline of the running request, in event loop time
+current_deadline: ContextVar[Optional[float]] = ContextVar("current_deadline", default=None)
+
+# Counters of this worker
+stats: Dict[str, int] = {
+    "timed_out": 0,
+    "disconnected": 0,
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when a query is issued or still running past the request deadline.
+    """
+
+
+def remaining() -> Optional[float]:
+    """
+    Get the time left before the deadline of the running request.
+
+    Returns:
+    - The remaining time in seconds, negative once the deadline has passed,
+    or None outside of a request with a deadline.
+    """
+    deadline = current_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - asyncio.get_running_loop().time()
+
+
+async def enforce_deadline(
+        query: str,
+        values: Optional[list],
+        call_next: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Query hook cancelling statements that outlive the request deadline.
+
+    Raises:
+    - `DeadlineExceeded`: If the deadline has passed before or during
+    the query.
+    """
+    timeout = remaining()
+    if timeout is None:
+        return await call_next()
+    if timeout <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    try:
+        async with asyncio.timeout(timeout):
+            return await call_next()
+    except TimeoutError as exc:
+        raise DeadlineExceeded("Request deadline exceeded") from exc
+
+
+def request_timeout(scope: dict) -> Optional[float]:
+    """
+    Get the timeout of a request from its route and `X-Request-Timeout` header.
+
+    Returns:
+    - The timeout in seconds, or None if the request has no deadline.
+    """
+    if scope["path"].startswith(EXEMPT_PREFIXES):
+        return None
+    route = (scope["method"], scope["path"].rstrip("/"))
+    timeout = ROUTE_TIMEOUTS.get(route, REQUEST_TIMEOUT)
+    for name, value in scope["headers"]:
+        if name == b"x-request-timeout":
+            try:
+                requested = float(value)
+            except ValueError:
+                break
+            if requested > 0:
+                timeout = min(timeout, requested)
+            break
+    return timeout
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware running every request under its deadline.
+
+    The handler runs in its own task while the middleware listens for the
+    client disconnecting. The request body is forwarded to the handler as
+    it arrives.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timeout = request_timeout(scope)
+        if timeout is None:
+            return await self.app(scope, receive, send)
+
+        loop = asyncio.get_running_loop()
+        messages: asyncio.Queue = asyncio.Queue()
+        response_started = False
+
+        async def listen() -> None:
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        async def send_started(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        deadline = loop.time() + timeout
+        token = current_deadline.set(deadline)
+        try:
+            handler = asyncio.create_task(self.app(scope, messages.get, send_started))
+        finally:
+            current_deadline.reset(token)
+        listener = asyncio.create_task(listen())
+
+        try:
+            while not handler.done():
+                done, _ = await asyncio.wait(
+                    {handler, listener},
+                    timeout=None if response_started else deadline - loop.time(),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if handler in done:
+                    break
+                if listener in done:
+                    stats["disconnected"] += 1
+                    logger.info("Client disconnected, %s %s cancelled", scope["method"], scope["path"])
+                    await self._cancel(handler)
+                    return
+                if not response_started:
+                    await self._cancel(handler)
+                    break
+        finally:
+            await self._cancel(listener)
+
+        if not handler.cancelled():
+            try:
+                return handler.result()
+            except DeadlineExceeded:
+                if response_started:
+                    raise
+        stats["timed_out"] += 1
+        logger.warning("Deadline of %gs exceeded, %s %s", timeout, scope["method"], scope["path"])
+        response = JSONResponse({"detail": "Request deadline exceeded"}, status_code=504)
+        await response(scope, receive, send)
+
+    @staticmethod
+    async def _cancel(task: asyncio.Task) -> None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,123 @@
+"""
+Fast paths for the queries executed on nearly every request.
+
+Tortoise builds every query through its query builder and inlines literal
+values into SELECT statements, so asyncpg sees a new statement text for
+every email or id and has to parse and plan it again. The queries below
+are written once with `$n` parameters and run directly on a pooled asyncpg
+connection, where asyncpg's per-connection statement cache keeps them
+prepared. Other backends fall back to equivalent ORM queries.
+
+All functions return plain dicts.
+"""
+from typing import List, Optional
+
+from tortoise import connections
+
+from app.core.db import apply_query_hooks
+
+USER_FIELDS = ("id", "full_name", "email", "phone", "password_hash")
+PRODUCT_FIELDS = (
+    "id", "name", "price", "description", "created_at", "updated_at", "is_active"
+)
+
+USER_BY_EMAIL = (
+    'SELECT "id","full_name","email","phone","password_hash" '
+    'FROM "user" WHERE "email"=$1 LIMIT 1'
+)
+ACTIVE_PRODUCT_BY_ID = (
+    'SELECT "id","name","price","description","created_at","updated_at","is_active" '
+    'FROM "product" WHERE "id"=$1 AND "is_active" LIMIT 1'
+)
+CART_BY_USER = (
+    'SELECT "cart"."id","cart"."user_id","cart"."product_id","cart"."quantity",'
+    '"product"."price"*"cart"."quantity" AS "total_price" '
+    'FROM "cart" JOIN "product" ON "product"."id"="cart"."product_id" '
+    'WHERE "cart"."user_id"=$1 ORDER BY "cart"."id"'
+)
+
+
+def _asyncpg_client():
+    client = connections.get("default")
+    if type(client).__module__.startswith("tortoise.backends.asyncpg"):
+        return client
+    return None
+
+
+async def _fetch(client, query: str, *values) -> List[dict]:
+    async def call_next():
+        async with client.acquire_connection() as connection:
+            return [dict(record) for record in await connection.fetch(query, *values)]
+
+    return await apply_query_hooks(query, list(values), call_next)
+
+
+async def fetch_user_by_email(email: str) -> Optional[dict]:
+    """
+    Get a user by email.
+
+    Args:
+    - `email` (str): The email of the user.
+
+    Returns:
+    - `dict` | `None`: The user row or None if not found.
+    """
+    client = _asyncpg_client()
+    if client is not None:
+        rows = await _fetch(client, USER_BY_EMAIL, email)
+        return rows[0] if rows else None
+
+    from app.users.models import User
+    return await User.filter(email=email).first().values(*USER_FIELDS)
+
+
+async def fetch_active_product(product_id: int) -> Optional[dict]:
+    """
+    Get an active product by its ID.
+
+    Args:
+    - `product_id` (int): The ID of the product.
+
+    Returns:
+    - `dict` | `None`: The product row or None if not found.
+    """
+    from app.products.models import Product
+
+    client = _asyncpg_client()
+    if client is not None:
+        rows = await _fetch(client, ACTIVE_PRODUCT_BY_ID, product_id)
+        if not rows:
+            return None
+        product = rows[0]
+        # Format the price the same way as the ORM does
+        product["price"] = Product._meta.fields_map["price"].to_python_value(
+            product["price"]
+        )
+        return product
+
+    return await Product.filter(
+        id=product_id, is_active=True
+    ).first().values(*PRODUCT_FIELDS)
+
+
+async def fetch_cart_lines(user_id: int) -> List[dict]:
+    """
+    Get the cart lines of a user with their total price.
+
+    Args:
+    - `user_id` (int): The ID of the user.
+
+    Returns:
+    - `List[dict]`: The cart lines ordered by ID.
+    """
+    client = _asyncpg_client()
+    if client is not None:
+        return await _fetch(client, CART_BY_USER, user_id)
+
+    from app.cart.models import Cart
+    lines = await Cart.filter(user_id=user_id).order_by("id").values(
+        "id", "user_id", "product_id", "quantity", price="product__price"
+    )
+    for line in lines:
+        line["total_price"] = line.pop("price") * line["quantity"]
+    return lines
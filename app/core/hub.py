@@ -0,0 +1,155 @@
+"""
+In-process fan-out of events to streaming clients.
+
+Every subscriber has a bounded queue. Publishing never waits: when the
+queue of a subscriber is full, the subscriber is dropped, its pending
+events are discarded and it receives `DROPPED` instead, after which it
+should fetch the current state again and subscribe anew. A slow client
+therefore costs at most `EVENTS_QUEUE_SIZE` events of memory and never
+delays the others.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+from app.core.config import EVENTS_MAX_SUBSCRIBERS, EVENTS_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Last item received by a dropped subscriber
+DROPPED = object()
+
+# Counters of this worker
+stats: Dict[str, int] = {
+    "published": 0,
+    "delivered": 0,
+    "dropped": 0,
+}
+
+
+class Subscription:
+    """
+    The queue of events of one subscriber.
+
+    Attributes:
+    - `topics` (Set[Hashable]): The topics the subscriber receives.
+    - `queue` (asyncio.Queue): The pending events.
+    - `dropped` (bool): Whether the subscriber fell behind and was dropped.
+    """
+
+    def __init__(self, topics: Iterable[Hashable], size: int):
+        self.topics = set(topics)
+        self.queue: asyncio.Queue = asyncio.Queue(size)
+        self.dropped = False
+
+    async def get(self, timeout: Optional[float] = None) -> Any:
+        """
+        Wait for the next event.
+
+        Parameters:
+        - `timeout` (float | None): The maximum wait, in seconds.
+
+        Returns:
+        - The event, `DROPPED` once the subscriber was dropped, or None
+        if no event arrived within the timeout.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventHub:
+    """
+    Registry of the subscribers of this worker.
+    """
+
+    def __init__(self, queue_size: int = EVENTS_QUEUE_SIZE, max_subscribers: int = EVENTS_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._topics: Dict[Hashable, Set[Subscription]] = {}
+        self._subscriptions: Set[Subscription] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def full(self) -> bool:
+        """
+        Check whether the worker has `max_subscribers`.
+        """
+        return len(self._subscriptions) >= self.max_subscribers
+
+    def subscribe(self, topics: Iterable[Hashable]) -> Optional[Subscription]:
+        """
+        Register a subscriber.
+
+        Parameters:
+        - `topics`: The topics to receive.
+
+        Returns:
+        - The subscription, or None if the worker has `max_subscribers`.
+        """
+        if self.full():
+            return None
+        subscription = Subscription(topics, self.queue_size)
+        self._subscriptions.add(subscription)
+        for topic in subscription.topics:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Remove a subscriber, if still registered.
+        """
+        self._subscriptions.discard(subscription)
+        for topic in subscription.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[topic]
+
+    def _drop(self, subscription: Subscription) -> None:
+        self.unsubscribe(subscription)
+        subscription.dropped = True
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(DROPPED)
+        stats["dropped"] += 1
+
+    def publish(self, topic: Hashable, event: Any) -> int:
+        """
+        Send an event to the subscribers of a topic, without waiting.
+
+        Parameters:
+        - `topic`: The topic of the event.
+        - `event`: The event.
+
+        Returns:
+        - The number of subscribers the event was queued for.
+        """
+        stats["published"] += 1
+        delivered = 0
+        for subscription in list(self._topics.get(topic, ())):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.info("Dropping a subscriber of %r, %d events behind", topic, self.queue_size)
+                self._drop(subscription)
+            else:
+                delivered += 1
+        stats["delivered"] += delivered
+        return delivered
+
+    def broadcast(self, event: Any) -> None:
+        """
+        Send an event to every subscriber, without waiting.
+        """
+        for subscription in list(self._subscriptions):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+
+hub = EventHub()
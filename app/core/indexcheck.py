@@ -0,0 +1,151 @@
+"""
+Report of the queries read without a supporting index.
+
+While enabled, a query hook records every distinct statement sent by the
+application with the function of the services layer that issued it.
+`check_recorded` then asks the database for the plan of each statement:
+- on Postgres, `EXPLAIN` with sequential scans disabled, so that a
+`Seq Scan` left in the plan means no index can serve the statement, as
+does an index scan filtering rows without an index condition, which
+walks the whole index, unless the filter can use another index;
+- on SQLite, `EXPLAIN QUERY PLAN`, where a `SCAN` of a table without
+`USING INDEX` is a full table scan. Table-valued functions such as
+`json_each` are not tables and are ignored.
+
+The test suite runs the check with `INDEX_CHECK=1 pytest`, the report is
+printed at the end of the run.
+"""
+import json
+import os
+import sys
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from tortoise import connections
+from tortoise.transactions import in_transaction
+
+from app.core.db import unwrapped
+from app.core.querylog import normalize_query
+
+# Statements worth explaining, inserts never read through an index
+_EXPLAINED = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIPPED_DIRS = tuple(os.path.join(_APP_DIR, name) + os.sep for name in ("core", "tests"))
+
+# Normalized statement -> (statement, values, call site)
+_recorded: Dict[str, Tuple[str, Optional[list], str]] = {}
+# Normalized statement -> (tables scanned, call site)
+_unindexed: Dict[str, Tuple[List[str], str]] = {}
+
+
+def _call_site() -> Optional[str]:
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR) and not filename.startswith(_SKIPPED_DIRS):
+            path = os.path.relpath(filename, os.path.dirname(_APP_DIR))
+            return f"{path}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+async def record_query(
+        query: str,
+        values: Optional[list],
+        call_next: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Query hook recording the statements to check.
+    """
+    if query.lstrip()[:6].upper().startswith(_EXPLAINED):
+        key = normalize_query(query)
+        if key not in _recorded and key not in _unindexed:
+            site = _call_site()
+            if site is not None:
+                _recorded[key] = (query, values, site)
+    return await call_next()
+
+
+def _full_scans(plan: dict, filtered_index_scans: bool = True) -> List[str]:
+    tables = []
+    node = plan.get("Node Type")
+    if node == "Seq Scan" or (
+            filtered_index_scans
+            and node in ("Index Scan", "Index Only Scan")
+            and "Filter" in plan and "Index Cond" not in plan
+    ):
+        tables.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        tables.extend(_full_scans(child, filtered_index_scans))
+    return tables
+
+
+async def _explain(query: str, values: Optional[list], settings: str) -> dict:
+    async with in_transaction() as connection:
+        await unwrapped(connection, "execute_script")(settings)
+        rows = await unwrapped(connection, "execute_query_dict")(f"EXPLAIN (FORMAT JSON) {query}", values)
+    plan = rows[0]["QUERY PLAN"]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def unindexed_tables(query: str, values: Optional[list] = None) -> List[str]:
+    """
+    Get the tables a statement reads without an index.
+
+    Parameters:
+    - `query` (str): The SQL statement.
+    - `values` (list | None): The statement parameters.
+
+    Returns:
+    - The names of the fully scanned tables.
+    """
+    client = connections.get("default")
+    if client.capabilities.dialect == "sqlite":
+        rows = await unwrapped(client, "execute_query_dict")(f"EXPLAIN QUERY PLAN {query}", values)
+        return [
+            row["detail"].split()[1] for row in rows
+            if row["detail"].startswith("SCAN ")
+            and not any(word in row["detail"] for word in (" USING ", "VIRTUAL TABLE", "CONSTANT ROW"))
+        ]
+
+    plan = await _explain(query, values, "SET LOCAL enable_seqscan = off")
+    tables = _full_scans(plan)
+    if tables and len(tables) > len(_full_scans(plan, False)):
+        # The planner may prefer walking an index in the requested order
+        # to using a matching index, as on small tables. Without plain
+        # index scans, a matching index still serves as a bitmap scan.
+        plan = await _explain(
+            query, values,
+            "SET LOCAL enable_seqscan = off; "
+            "SET LOCAL enable_indexscan = off; SET LOCAL enable_indexonlyscan = off"
+        )
+        tables = _full_scans(plan)
+    return tables
+
+
+async def check_recorded() -> None:
+    """
+    Explain the statements recorded since the last call.
+
+    Must be called while the connections used by the statements are open.
+    """
+    while _recorded:
+        key, (query, values, site) = _recorded.popitem()
+        try:
+            tables = await unindexed_tables(query, values)
+        except Exception:
+            continue
+        if tables:
+            _unindexed[key] = (tables, site)
+
+
+def report() -> List[str]:
+    """
+    Get the report lines of the statements reading tables without an index.
+    """
+    return [
+        f"{site}: {', '.join(sorted(set(tables)))} scanned by {key}"
+        for key, (tables, site) in sorted(_unindexed.items(), key=lambda item: item[1][1])
+    ]
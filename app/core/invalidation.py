@@ -0,0 +1,239 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Callable, Dict, Hashable, List, Optional, Set
+
+from tortoise import connections
+
+from app.core.config import (
+    DATABASE_DSN, INVALIDATION_BACKEND, INVALIDATION_CHANNEL
+)
+
+logger = logging.getLogger(__name__)
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+MAX_PAYLOAD_SIZE = 7900
+
+Listener = Callable[[Optional[List[Hashable]]], None]
+
+_listeners: Dict[str, List[Listener]] = {}
+_channel: Optional["InvalidationChannel"] = None
+
+
+def subscribe(name: str, listener: Listener) -> None:
+    """
+    Register a listener for invalidation events published under `name`.
+
+    The listener is called with the list of invalidated keys, or with None
+    when everything under `name` must be dropped.
+    """
+    _listeners.setdefault(name, []).append(listener)
+
+
+def dispatch(name: str, keys: Optional[List[Hashable]]) -> None:
+    """
+    Deliver an invalidation event to the listeners of this worker.
+    """
+    for listener in _listeners.get(name, []):
+        try:
+            listener(keys)
+        except Exception:
+            logger.exception("Invalidation listener for %r failed", name)
+
+
+def flush_all() -> None:
+    """
+    Invalidate everything in this worker.
+
+    Used when the channel reconnects, since events sent while it was
+    disconnected are lost.
+    """
+    for name in list(_listeners):
+        dispatch(name, None)
+
+
+def _on_message(payload: str, origin: str) -> None:
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        logger.warning("Ignoring malformed invalidation payload %r", payload)
+        return
+    if message.get("origin") == origin:
+        return
+    dispatch(message["name"], message.get("keys"))
+
+
+class InvalidationChannel:
+    """
+    Base class for the transports broadcasting invalidation events.
+
+    Attributes:
+    - `id` (str): Identifies the sender so a worker skips its own events.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def send(self, payload: str) -> None:
+        raise NotImplementedError
+
+    def receive(self, payload: str) -> None:
+        _on_message(payload, self.id)
+
+
+class InMemoryChannel(InvalidationChannel):
+    """
+    Channel connecting the instances living in the same process.
+
+    Used in tests and single-worker deployments where no Postgres
+    connection is available for LISTEN/NOTIFY.
+    """
+    _bus: Set["InMemoryChannel"] = set()
+
+    async def start(self) -> None:
+        self._bus.add(self)
+
+    async def stop(self) -> None:
+        self._bus.discard(self)
+
+    async def send(self, payload: str) -> None:
+        for channel in list(self._bus):
+            if channel is not self:
+                channel.receive(payload)
+
+
+class PostgresChannel(InvalidationChannel):
+    """
+    Channel based on Postgres LISTEN/NOTIFY.
+
+    Events are sent with `pg_notify` through the Tortoise pool and received
+    on a dedicated asyncpg connection. When that connection is lost it is
+    reopened with exponential backoff and the worker flushes everything,
+    since notifications are not queued for disconnected listeners.
+    """
+
+    def __init__(
+            self,
+            dsn: str,
+            channel: str,
+            keepalive: float = 30.0,
+            reconnect_delay: float = 1.0,
+            max_reconnect_delay: float = 30.0
+    ):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self.keepalive = keepalive
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def send(self, payload: str) -> None:
+        await connections.get("default").execute_query(
+            "SELECT pg_notify($1, $2)", [self.channel, payload]
+        )
+
+    def _notify(self, connection, pid, channel, payload) -> None:
+        self.receive(payload)
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        delay = self.reconnect_delay
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning(
+                    "Invalidation listener cannot connect: %s, retrying in %.1fs",
+                    exc, delay
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            delay = self.reconnect_delay
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                await connection.add_listener(self.channel, self._notify)
+                flush_all()
+                while not closed.is_set():
+                    try:
+                        await asyncio.wait_for(closed.wait(), self.keepalive)
+                    except asyncio.TimeoutError:
+                        await connection.execute("SELECT 1")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+                logger.warning("Invalidation listener disconnected: %s", exc)
+            finally:
+                if not connection.is_closed():
+                    connection.terminate()
+
+
+async def publish(name: str, *keys: Hashable) -> None:
+    """
+    Invalidate `keys` of `name` in this worker and in all other workers.
+
+    Parameters:
+    - `name` (str): The invalidation topic, usually a cache name.
+    - `keys`: JSON-serializable keys to drop. Without keys everything under
+    `name` is invalidated.
+
+    Example:
+    ```python
+    await publish("product", product.id)
+    ```
+    """
+    keys = list(keys) or None
+    dispatch(name, keys)
+    if _channel is None:
+        return
+
+    payload = json.dumps({"origin": _channel.id, "name": name, "keys": keys})
+    if len(payload) > MAX_PAYLOAD_SIZE:
+        payload = json.dumps({"origin": _channel.id, "name": name, "keys": None})
+    try:
+        await _channel.send(payload)
+    except Exception:
+        logger.exception("Failed to broadcast invalidation of %r", name)
+
+
+async def start_invalidation() -> None:
+    """
+    Open the invalidation channel selected by `INVALIDATION_BACKEND`.
+    """
+    global _channel
+    if INVALIDATION_BACKEND == "postgres":
+        _channel = PostgresChannel(DATABASE_DSN, INVALIDATION_CHANNEL)
+    else:
+        _channel = InMemoryChannel()
+    await _channel.start()
+
+
+async def stop_invalidation() -> None:
+    """
+    Close the invalidation channel.
+    """
+    global _channel
+    if _channel is not None:
+        await _channel.stop()
+        _channel = None
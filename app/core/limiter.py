@@ -0,0 +1,135 @@
+import logging
+import time
+from typing import Optional
+
+from starlette.responses import JSONResponse
+
+from app.core.config import (
+    LIMITER_BACKOFF, LIMITER_EXPENSIVE_SHARE, LIMITER_INITIAL_LIMIT,
+    LIMITER_MAX_LIMIT, LIMITER_MIN_LIMIT, LIMITER_RETRY_AFTER,
+    LIMITER_TARGET_MS
+)
+
+logger = logging.getLogger(__name__)
+
+# Routes costing a lot of CPU or database time, they are admitted only
+# while the worker uses less than `LIMITER_EXPENSIVE_SHARE` of its limit.
+EXPENSIVE_ROUTES = {
+    ("POST", "/users/login"),
+    ("POST", "/users/register"),
+    ("POST", "/users/bulk"),
+    ("GET", "/products/batch"),
+    ("POST", "/products/batch"),
+    ("POST", "/products/bulk"),
+    ("POST", "/batch"),
+}
+
+# Requests under these prefixes are never limited, event streams last
+# for the whole connection
+EXEMPT_PREFIXES = ("/debug/", "/events/")
+
+
+class AdaptiveLimiter:
+    """
+    Limit of concurrent requests adapted to the observed latency (AIMD).
+
+    While requests complete within the target latency and the limit is
+    actually used, it grows by one every `limit` requests. When a request
+    is slower than the target, the limit is multiplied by the backoff
+    factor, at most once per target interval so that a burst of slow
+    requests admitted under the old limit counts once.
+
+    Attributes:
+    - `limit` (float): The current number of requests allowed in flight.
+    - `in_flight` (int): The number of requests being processed.
+    - `rejected` (int): The number of requests rejected so far.
+    """
+
+    def __init__(
+            self,
+            initial_limit: float = LIMITER_INITIAL_LIMIT,
+            min_limit: float = LIMITER_MIN_LIMIT,
+            max_limit: float = LIMITER_MAX_LIMIT,
+            target: float = LIMITER_TARGET_MS / 1000,
+            backoff: float = LIMITER_BACKOFF
+    ):
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target = target
+        self.backoff = backoff
+        self.in_flight = 0
+        self.rejected = 0
+        self._last_decrease = float("-inf")
+
+    def try_acquire(self, share: float = 1.0) -> bool:
+        """
+        Admit a request if the share of the limit it may use is not exhausted.
+
+        Parameters:
+        - `share` (float): The fraction of the limit available to the request.
+
+        Returns:
+        - True if the request is admitted and must call `release`.
+        """
+        if self.in_flight >= max(1.0, self.limit * share):
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float, now: Optional[float] = None) -> None:
+        """
+        Record the completion of an admitted request and adapt the limit.
+
+        Parameters:
+        - `latency` (float): The processing time of the request, in seconds.
+        - `now` (float | None): The current monotonic time.
+        """
+        used = self.in_flight
+        self.in_flight -= 1
+        now = time.monotonic() if now is None else now
+        if latency > self.target:
+            if now - self._last_decrease >= self.target:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+                logger.info("Concurrency limit lowered to %.1f", self.limit)
+        elif used * 2 >= self.limit:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    ASGI middleware shedding the requests exceeding the adaptive limit.
+
+    Rejected requests receive a 503 response with a `Retry-After` header.
+    Requests whose scope has `limiter_exempt` set are not limited.
+    """
+
+    def __init__(self, app, limiter: Optional[AdaptiveLimiter] = None):
+        self.app = app
+        self.limiter = limiter or AdaptiveLimiter()
+
+    async def __call__(self, scope, receive, send):
+        if (
+                scope["type"] != "http"
+                or scope.get("limiter_exempt")
+                or scope["path"].startswith(EXEMPT_PREFIXES)
+        ):
+            return await self.app(scope, receive, send)
+
+        route = (scope["method"], scope["path"].rstrip("/"))
+        share = LIMITER_EXPENSIVE_SHARE if route in EXPENSIVE_ROUTES else 1.0
+        if not self.limiter.try_acquire(share):
+            response = JSONResponse(
+                {"detail": "Server is overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(LIMITER_RETRY_AFTER)}
+            )
+            return await response(scope, receive, send)
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(time.monotonic() - started)
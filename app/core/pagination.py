@@ -0,0 +1,96 @@
+import base64
+import json
+from typing import Any, List
+
+from fastapi import HTTPException, status
+from pypika.terms import Tuple, ValueWrapper
+from tortoise.expressions import Q
+from tortoise.query_utils import QueryModifier
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last returned row into an opaque cursor.
+
+    Parameters:
+    - `values`: JSON-serializable values, usually the sort key and the ID.
+
+    Returns:
+    - An URL-safe cursor string.
+    """
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode a cursor created by `encode_cursor`.
+
+    Parameters:
+    - `cursor` (str): The cursor received from the client.
+
+    Returns:
+    - The list of encoded values.
+
+    Raises:
+    - HTTPException with a status code of 422 if the cursor is malformed.
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except ValueError:
+        values = None
+    if not isinstance(values, list):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid cursor"
+        )
+    return values
+
+
+class KeysetQ(Q):
+    """
+    The condition selecting rows after a `(field, id)` keyset position.
+
+    On PostgreSQL it is the row comparison `(field, id) > (value, pk)`,
+    which is a single range scan of an index ending with `(field, id)`.
+    Other databases get the equivalent
+    `field > value OR (field = value AND id > pk)`.
+    """
+
+    def __init__(self, field: str, value: Any, pk: int, descending: bool = False):
+        op = "lt" if descending else "gt"
+        super().__init__(
+            Q(**{f"{field}__{op}": value}),
+            Q(**{field: value, f"id__{op}": pk}),
+            join_type=Q.OR
+        )
+        self.keyset = field, value, pk, descending
+
+    def resolve(self, model, table) -> QueryModifier:
+        if model._meta.db.capabilities.dialect != "postgres":
+            return super().resolve(model, table)
+        field, value, pk, descending = self.keyset
+        sort_field = model._meta.fields_map[field]
+        position = Tuple(table[sort_field.source_field or field], table[model._meta.db_pk_column])
+        after = Tuple(ValueWrapper(sort_field.to_db_value(value, model)), ValueWrapper(pk))
+        criterion = position < after if descending else position > after
+        return QueryModifier(where_criterion=~criterion if self._is_negated else criterion)
+
+
+def keyset_filter(field: str, value: Any, pk: int, descending: bool = False) -> Q:
+    """
+    Build the condition selecting rows after a `(field, id)` keyset position.
+
+    Parameters:
+    - `field` (str): The sort field.
+    - `value`: The value of the sort field in the last returned row.
+    - `pk` (int): The ID of the last returned row, used as a tie breaker.
+    - `descending` (bool): Whether the rows are sorted in descending order.
+
+    Returns:
+    - `Q`: The filter selecting the next rows.
+    """
+    if field == "id":
+        return Q(**{f"id__{'lt' if descending else 'gt'}": pk})
+    return KeysetQ(field, value, pk, descending)
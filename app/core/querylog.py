@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional, Set
+
+from tortoise import connections
+
+from app.core.config import SLOW_QUERY_EXPLAIN_RATE, SLOW_QUERY_THRESHOLD_MS
+from app.core.db import unwrapped
+
+logger = logging.getLogger("app.slow_query")
+
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+_explain_tasks: Set[asyncio.Task] = set()
+
+# Tortoise inlines literal values into SELECTs, they are masked before logging
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+# EXPLAIN ANALYZE executes the statement. It is only used for SELECTs that
+# take no row locks and call nothing but these read-only functions (and
+# keywords followed by a parenthesis), other statements are only planned.
+_READ_ONLY_CALLS = frozenset((
+    "abs", "all", "and", "any", "array_agg", "as", "avg", "cast", "coalesce",
+    "count", "exists", "exp", "filter", "from", "greatest", "in", "join",
+    "least", "length", "ln", "lower", "max", "min", "not", "numeric", "on",
+    "or", "over", "round", "select", "sum", "unnest", "upper", "using",
+    "values", "varchar", "where",
+))
+_CALLS = re.compile(r"\b([a-z_][a-z0-9_.]*)\s*\(", re.IGNORECASE)
+_ROW_LOCKS = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE)
+
+
+class QueryContextMiddleware:
+    """
+    ASGI middleware remembering the request scope of the running task,
+    so that slow queries can be attributed to the route issuing them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
+
+
+def _route() -> Optional[str]:
+    scope = current_scope.get()
+    if scope is None:
+        return None
+    endpoint = scope.get("endpoint")
+    name = getattr(endpoint, "__name__", None)
+    route = f"{scope['method']} {scope['path']}"
+    return f"{route} ({name})" if name else route
+
+
+def normalize_query(query: str) -> str:
+    """
+    Replace the literals of a statement with `?`, so statements differing
+    only in their values compare equal.
+
+    Parameters:
+    - `query` (str): The SQL statement.
+
+    Returns:
+    - The normalized statement.
+    """
+    return _LITERALS.sub("?", query)
+
+
+def _params_shape(values: Optional[list]) -> Optional[list]:
+    if values is None:
+        return None
+    if values and isinstance(values[0], (list, tuple)):
+        return [len(values), _params_shape(values[0])]
+    return [type(value).__name__ for value in values]
+
+
+def _log(record: dict) -> None:
+    logger.warning(json.dumps(record, default=str))
+
+
+def _can_analyze(query: str) -> bool:
+    statement = _LITERALS.sub("", query)
+    return (
+        statement.lstrip()[:6].upper() == "SELECT"
+        and not _ROW_LOCKS.search(statement)
+        and all(name.lower() in _READ_ONLY_CALLS for name in _CALLS.findall(statement))
+    )
+
+
+async def _explain(query: str, values: Optional[list]) -> None:
+    client = connections.get("default")
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if _can_analyze(query) else "FORMAT JSON"
+    try:
+        plan = await unwrapped(client, "execute_query_dict")(
+            f"EXPLAIN ({options}) {query}", values
+        )
+    except Exception as exc:
+        _log({"event": "slow_query_plan", "sql": normalize_query(query), "error": str(exc)})
+        return
+    _log({
+        "event": "slow_query_plan",
+        "sql": normalize_query(query),
+        "plan": plan[0]["QUERY PLAN"],
+    })
+
+
+def _should_explain(query: str) -> bool:
+    return (
+        SLOW_QUERY_EXPLAIN_RATE > 0
+        and connections.get("default").capabilities.dialect == "postgres"
+        and query.lstrip()[:6].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE")
+        and random.random() < SLOW_QUERY_EXPLAIN_RATE
+    )
+
+
+async def log_slow_query(
+        query: str,
+        values: Optional[list],
+        call_next: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Query hook logging statements slower than `SLOW_QUERY_THRESHOLD_MS`.
+
+    Each slow query is written as a JSON record with the SQL (literals
+    masked), the types of its parameters, the duration and the route. A `SLOW_QUERY_EXPLAIN_RATE`
+    share of slow statements is explained in the background and the plan
+    is logged as a second record. Read-only SELECTs are re-run with
+    `EXPLAIN (ANALYZE, BUFFERS)`, anything else is only planned.
+    """
+    started = time.perf_counter()
+    try:
+        return await call_next()
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        if duration >= SLOW_QUERY_THRESHOLD_MS:
+            _log({
+                "event": "slow_query",
+                "sql": normalize_query(query),
+                "params": _params_shape(values),
+                "duration_ms": round(duration, 3),
+                "route": _route(),
+            })
+            if _should_explain(query):
+                task = asyncio.create_task(_explain(query, values))
+                _explain_tasks.add(task)
+                task.add_done_callback(_explain_tasks.discard)
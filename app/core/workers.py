@@ -0,0 +1,29 @@
+import os
+
+from app.core.config import DATABASE_ENGINE, SERVER_WORKERS
+
+
+def cpu_count() -> int:
+    """
+    Get the number of CPUs available to this process.
+
+    Returns:
+    - The number of usable CPUs, respecting CPU affinity when supported.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_workers() -> int:
+    """
+    Get the number of worker processes to start.
+
+    SQLite serializes writers, so a single worker is used for it.
+
+    Returns:
+    - `SERVER_WORKERS` when set, otherwise one worker per CPU.
+    """
+    if DATABASE_ENGINE == "sqlite":
+        return 1
+    return SERVER_WORKERS or cpu_count()
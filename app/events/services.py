@@ -0,0 +1,145 @@
+"""
+Product and cart change events for streaming clients.
+
+Product services publish changes on the `catalog` invalidation topic and
+cart services on the `cart` topic, so every worker learns about the
+changes made by the others. The listeners below forward them to the
+subscribers of this worker through the event hub:
+- `product` events, `{"id", "is_active", "price"}` or `{"id", "deleted"}`,
+to the subscribers of the product;
+- `cart` events, `{"product_id", "quantity"}`, a quantity of 0 meaning
+the item was removed, to the streams of the cart owner.
+
+When invalidation events may have been lost, every subscriber receives a
+`resync` event and should fetch the current state again.
+"""
+import asyncio
+import json
+from typing import AsyncIterator, Hashable, List, Optional
+
+from fastapi import HTTPException, status
+
+from app.cart.services import CART_TOPIC
+from app.core.config import EVENTS_KEEPALIVE
+from app.core.hub import DROPPED, hub
+from app.core.invalidation import subscribe
+from app.products.services import CATALOG_TOPIC
+from app.users.auth import verify_token
+
+
+def product_topic(product_id: int) -> tuple:
+    return "product", product_id
+
+
+def cart_topic(user_id: int) -> tuple:
+    return "cart", user_id
+
+
+def on_product_change(changes: Optional[List[Hashable]]) -> None:
+    """
+    Forward published catalog changes to the product subscribers.
+
+    Parameters:
+    - `changes`: The published `catalog_key` lists, or None when changes
+    may have been missed.
+    """
+    if changes is None:
+        hub.broadcast(("resync", {"topic": "product"}))
+        return
+    for product_id, *state in changes:
+        if state:
+            data = {"id": product_id, "is_active": state[0], "price": state[1]}
+        else:
+            data = {"id": product_id, "deleted": True}
+        hub.publish(product_topic(product_id), ("product", data))
+
+
+def on_cart_change(changes: Optional[List[Hashable]]) -> None:
+    """
+    Forward published cart changes to the streams of the cart owners.
+
+    Parameters:
+    - `changes`: The `[user_id, product_id, quantity]` lists, or None
+    when changes may have been missed.
+    """
+    if changes is None:
+        hub.broadcast(("resync", {"topic": "cart"}))
+        return
+    for user_id, product_id, quantity in changes:
+        hub.publish(cart_topic(user_id), ("cart", {"product_id": product_id, "quantity": quantity}))
+
+
+def check_capacity() -> None:
+    """
+    Check that the worker has room for another stream.
+
+    Raises:
+    - `HTTPException`: If the worker has `EVENTS_MAX_SUBSCRIBERS` streams.
+    """
+    if hub.full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event streams",
+            headers={"Retry-After": str(int(EVENTS_KEEPALIVE))}
+        )
+
+
+def format_event(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+async def event_stream(
+        user_id: int,
+        product_ids: List[int],
+        token: str,
+        keepalive: float = EVENTS_KEEPALIVE
+) -> AsyncIterator[str]:
+    """
+    Render the changes of a cart and of products as server-sent events.
+
+    The subscription is made when the stream starts and removed when it
+    ends, so a client leaving before the first event holds no slot. The
+    token is checked again every `keepalive` seconds, and a comment is
+    sent when no event arrived meanwhile. The stream ends with an
+    `expired` event when the token is no longer valid, and with a
+    `dropped` event when the client fell behind or the worker is full.
+
+    Parameters:
+    - `user_id` (int): The ID of the cart owner.
+    - `product_ids` (List[int]): The IDs of the products.
+    - `token` (str): The access token of the client.
+    - `keepalive` (float): The interval of the token checks and of the
+    keep-alive comments.
+    """
+    subscription = hub.subscribe(
+        [cart_topic(user_id), *(product_topic(product_id) for product_id in product_ids)]
+    )
+    if subscription is None:
+        yield format_event("dropped", {})
+        return
+    loop = asyncio.get_running_loop()
+    try:
+        yield ": connected\n\n"
+        checked_at = loop.time()
+        while True:
+            if loop.time() - checked_at >= keepalive:
+                try:
+                    await verify_token(token)
+                except HTTPException:
+                    yield format_event("expired", {})
+                    return
+                checked_at = loop.time()
+            event = await subscription.get(checked_at + keepalive - loop.time())
+            if event is DROPPED:
+                yield format_event("dropped", {})
+                return
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(*event)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+subscribe(CATALOG_TOPIC, on_product_change)
+subscribe(CART_TOPIC, on_cart_change)
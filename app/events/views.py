@@ -0,0 +1,56 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.core.config import EVENTS_MAX_PRODUCTS
+from app.users.auth import oauth2_scheme
+from app.users.schemas import UserOut
+from app.users.services import get_current_user
+
+from .services import check_capacity, event_stream
+
+events_router = APIRouter(prefix="/events", tags=["Events"])
+
+
+@events_router.get("/stream")
+async def event_stream_view(
+        products: List[int] = Query([]),
+        token: str = Depends(oauth2_scheme),
+        current_user: UserOut = Depends(get_current_user)
+):
+    """
+    Stream the changes of the user's cart and of products as server-sent
+    events.
+
+    Args:
+    - `products` (List[int]): The IDs of the products to follow, no more
+    than `EVENTS_MAX_PRODUCTS`, e.g. `?products=1&products=2`.
+
+    Raises:
+    - `HTTPException`: If too many products are requested, or if the
+    worker has no room for another stream.
+
+    Returns:
+    - A `text/event-stream` response with the events:
+      - `product`: `{"id", "is_active", "price"}`, or `{"id", "deleted"}`;
+      - `cart`: `{"product_id", "quantity"}`, 0 when the item was removed;
+      - `resync`: changes may have been missed, fetch the current state;
+      - `dropped`: the client read too slowly, or the worker became full,
+        the stream ends;
+      - `expired`: the token expired or was revoked, the stream ends.
+
+    The stream does not replay missed events: fetch the current state
+    after connecting and after every reconnection.
+    """
+    if len(products) > EVENTS_MAX_PRODUCTS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"No more than {EVENTS_MAX_PRODUCTS} products are allowed"
+        )
+    check_capacity()
+    return StreamingResponse(
+        event_stream(current_user.id, products, token),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,9 +1,27 @@
 from fastapi import FastAPI
 from tortoise.contrib.fastapi import register_tortoise
 
+from app.batch.views import batch_router
+from app.cart.sweeper import start_cart_sweeper, stop_cart_sweeper
 from app.cart.views import cart_router
-from app.core.config import DATABASE_URL, MODELS
+from app.categories.views import category_router
+from app.core.config import (
+    CART_TTL_DAYS, CATALOG_SNAPSHOT_PAGES, DATABASE_ENGINE, DATABASE_URL,
+    LIMITER_INITIAL_LIMIT, MODELS, PASSWORD_CALIBRATE, PROFILING_TOKEN,
+    REQUEST_TIMEOUT, SLOW_QUERY_THRESHOLD_MS
+)
+from app.core.db import add_query_hook, instrument_connections, register_sqlite_decimals
+from app.core.deadline import DeadlineMiddleware, enforce_deadline
+from app.core.invalidation import start_invalidation, stop_invalidation
+from app.core.limiter import ConcurrencyLimitMiddleware
+from app.core.querylog import QueryContextMiddleware, log_slow_query
+from app.events.views import events_router
+from app.products.snapshots import stop_snapshots, warm_snapshots
+from app.products.view_counter import start_view_counter, stop_view_counter
 from app.products.view import product_router
+from app.profiling import ProfilingMiddleware, debug_router
+from app.users.hashing import calibrate, shutdown_hash_pool
+from app.users.revocation import start_revocation, stop_revocation
 from app.users.views import user_router
 
 
@@ -27,6 +45,8 @@ def setup_database(app: FastAPI):
         },
         generate_schemas=True,
     )
+    if DATABASE_ENGINE == "sqlite":
+        app.add_event_handler("startup", register_sqlite_decimals)
 
 
 def setup_routes(app: FastAPI):
@@ -42,3 +62,170 @@ def setup_routes(app: FastAPI):
     app.include_router(product_router)
     app.include_router(user_router)
     app.include_router(cart_router)
+    app.include_router(category_router)
+    app.include_router(batch_router)
+    app.include_router(events_router)
+
+
+def setup_invalidation(app: FastAPI):
+    """
+    Set up cross-worker cache invalidation.
+
+    The invalidation channel is opened on startup, after the database
+    connections, and closed on shutdown.
+
+    Parameters:
+    - `app`: The FastAPI application instance.
+    """
+    app.add_event_handler("startup", start_invalidation)
+    app.add_event_handler("shutdown", stop_invalidation)
+
+
+def setup_request_deadlines(app: FastAPI):
+    """
+    Set up request deadlines.
+
+    Queries of the Tortoise connections are instrumented on startup so
+    they are cancelled at the deadline of their request. Must be called
+    before `setup_query_log`, whose middleware has to wrap this one.
+    Disabled when `REQUEST_TIMEOUT` is 0.
+
+    Parameters:
+    - `app`: The FastAPI application instance.
+    """
+    if REQUEST_TIMEOUT <= 0:
+        return
+    add_query_hook(enforce_deadline)
+    app.add_middleware(DeadlineMiddleware)
+    app.add_event_handler("startup", instrument_connections)
+
+
+def setup_query_log(app: FastAPI):
+    """
+    Set up the slow query log.
+
+    Queries of the Tortoise connections are instrumented on startup,
+    and requests are tracked so slow queries can be attributed to routes.
+    Disabled when `SLOW_QUERY_THRESHOLD_MS` is 0.
+
+    Parameters:
+    - `app`: The FastAPI application instance.
+    """
+    if SLOW_QUERY_THRESHOLD_MS <= 0:
+        return
+    add_query_hook(log_slow_query)
+    app.add_middleware(QueryContextMiddleware)
+    app.add_event_handler("startup", instrument_connections)
+
+
+def setup_password_hashing(app: FastAPI):
+    """
+    Set up password hashing calibration and the bulk hashing pool.
+
+    When `PASSWORD_CALIBRATE` is enabled, the cost of the default scheme
+    is measured on startup against `PASSWORD_HASH_TARGET_MS`. Otherwise
+    the configured cost is used as is.
+
+    Parameters:
+    - `app`: The FastAPI application instance.
+    """
+    if PASSWORD_CALIBRATE:
+        app.add_event_handler("startup", calibrate)
+    app.add_event_handler("shutdown", shutdown_hash_pool)
+
+
+def setup_cart_sweeper(app: FastAPI):
+    """
+    Set up the removal of abandoned cart items.
+
+    The sweeper runs in the background of every worker between startup
+    and shutdown. Disabled when `CART_TTL_DAYS` is 0.
+
+    Parameters:
+    - `app`: The FastAPI application instance.
+    """
+    if CART_TTL_DAYS <= 0:
+        return
+    app.add_event_handler("startup", start_cart_sweeper)
+    app.add_event_handler("shutdown", stop_cart_sweeper)
+
+
+def setup_profiling(app: FastAPI):
+    """
+    Set up on-demand profiling.
+
+    Requests sent with the `X-Profile: <PROFILING_TOKEN>` header are
+    profiled, and the `/debug` routes give access to the reports.
+    Disabled when `PROFILING_TOKEN` is empty.
+
+    Parameters:
+    - `app`: The FastAPI application instance.
+    """
+    if not PROFILING_TOKEN:
+        return
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(debug_router)
+
+
+def setup_concurrency_limit(app: FastAPI):
+    """
+    Set up adaptive load shedding.
+
+    Must be called after the other middleware is added, so that the
+    limiter is the outermost one and rejects requests before any work.
+    Disabled when `LIMITER_INITIAL_LIMIT` is 0.
+
+    Parameters:
+    - `app`: The FastAPI application instance.
+    """
+    if LIMITER_INITIAL_LIMIT <= 0:
+        return
+    app.add_middleware(ConcurrencyLimitMiddleware)
+
+
+def setup_catalog_snapshots(app: FastAPI):
+    """
+    Set up the pre-rendered first pages of the product list.
+
+    The snapshots are built in the background on startup. Disabled when
+    `CATALOG_SNAPSHOT_PAGES` is 0.
+
+    Parameters:
+    - `app`: The FastAPI application instance.
+    """
+    if CATALOG_SNAPSHOT_PAGES <= 0:
+        return
+    app.add_event_handler("startup", warm_snapshots)
+    app.add_event_handler("shutdown", stop_snapshots)
+
+
+def setup_token_revocation(app: FastAPI):
+    """
+    Set up the in-memory filter of revoked access tokens.
+
+    The filter is built on startup and rebuilt every
+    `REVOCATION_REFRESH_INTERVAL` seconds. Must be called after
+    `setup_invalidation`, so that revocations published while the filter
+    is built are received.
+
+    Parameters:
+    - `app`: The FastAPI application instance.
+    """
+    app.add_event_handler("startup", start_revocation)
+    app.add_event_handler("shutdown", stop_revocation)
+
+
+def setup_view_counter(app: FastAPI):
+    """
+    Set up the periodic write of the product view counters.
+
+    The remaining views are written on shutdown, before the database
+    connections are closed.
+
+    Parameters:
+    - `app`: The FastAPI application instance.
+    """
+    app.add_event_handler("startup", start_view_counter)
+    # Shutdown handlers run in order, the one closing the connections
+    # was added by `setup_database`
+    app.router.on_shutdown.insert(0, stop_view_counter)
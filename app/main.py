@@ -1,9 +1,24 @@
 from fastapi import FastAPI
 
-from app.factory import setup_database, setup_routes
+from app.factory import (
+    setup_cart_sweeper, setup_catalog_snapshots, setup_concurrency_limit,
+    setup_database, setup_invalidation, setup_password_hashing,
+    setup_profiling, setup_query_log, setup_request_deadlines, setup_routes,
+    setup_token_revocation, setup_view_counter
+)
 
 app = FastAPI()
 
 
 setup_database(app)
+setup_invalidation(app)
+setup_token_revocation(app)
+setup_password_hashing(app)
+setup_cart_sweeper(app)
+setup_catalog_snapshots(app)
+setup_view_counter(app)
+setup_request_deadlines(app)
+setup_query_log(app)
+setup_profiling(app)
+setup_concurrency_limit(app)
 setup_routes(app)
@@ -2,6 +2,18 @@ from tortoise.models import Model
 from tortoise import fields
 
 
+class PriceField(fields.DecimalField):
+    """
+    Decimal field stored with NUMERIC affinity on SQLite.
+
+    Tortoise stores decimals as VARCHAR on SQLite, which makes price
+    filters and sorting compare strings instead of numbers.
+    """
+
+    class _db_sqlite(fields.DecimalField._db_sqlite):
+        SQL_TYPE = "NUMERIC(10,2)"
+
+
 class Product(Model):
     """
     Represents a product in the system.
@@ -14,17 +26,107 @@ class Product(Model):
     - `created_at` (Datetime): The timestamp when the product was created.
     - `updated_at` (Datetime): The timestamp when the product was last updated.
     - `is_active` (bool): Indicates whether the product is currently active.
+    - `category` (fields.ForeignKeyField): The category of the product.
 
     Methods:
     - `__str__`: Returns the string representation of the product.
     """
     id = fields.IntField(pk=True)
     name = fields.CharField(max_length=255)
-    price = fields.DecimalField(max_digits=10, decimal_places=2)
+    price = PriceField(max_digits=10, decimal_places=2)
     description = fields.TextField()
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
     is_active = fields.BooleanField(default=True)
+    category = fields.ForeignKeyField(
+        'models.Category', related_name='products',
+        null=True, on_delete=fields.SET_NULL, index=True
+    )
 
     def __str__(self):
         return self.name
+
+    class Meta:
+        indexes = (
+            ("is_active", "id"),
+            ("is_active", "price", "id"),
+            ("is_active", "created_at", "id"),
+            ("is_active", "updated_at", "id"),
+            ("updated_at", "id"),
+        )
+
+
+class ProductTombstone(Model):
+    """
+    Records a deleted product for clients syncing the catalog.
+
+    Attributes:
+    - `id` (int): The ID of the deleted product.
+    - `deleted_at` (Datetime): The timestamp when the product was deleted.
+    """
+    id = fields.IntField(pk=True, generated=False)
+    deleted_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = (("deleted_at", "id"),)
+
+
+class ProductCooccurrence(Model):
+    """
+    Counts how often two products were in the same cart.
+
+    Every pair is stored in both directions, so the products related to
+    `product_a` are read with one index range scan ordered by `count`.
+
+    Attributes:
+    - `id` (int): The unique identifier for the pair.
+    - `product_a` (fields.ForeignKeyField): The product the pair is read for.
+    - `product_b` (fields.ForeignKeyField): The related product.
+    - `count` (int): The number of times the products met in a cart.
+    """
+    id = fields.IntField(pk=True)
+    product_a = fields.ForeignKeyField(
+        'models.Product', related_name='cooccurrences', on_delete=fields.CASCADE
+    )
+    product_b = fields.ForeignKeyField(
+        'models.Product', related_name=False, on_delete=fields.CASCADE
+    )
+    count = fields.IntField(default=0)
+
+    class Meta:
+        unique_together = ('product_a', 'product_b')
+        indexes = (("product_a", "count"),)
+
+
+class ProductPopularity(Model):
+    """
+    Counters of a product maintained from cart writes and product views.
+
+    Attributes:
+    - `id` (int): The unique identifier for the counters.
+    - `product` (fields.OneToOneField): The counted product.
+    - `cart_count` (int): The number of carts containing the product.
+    - `quantity` (int): The number of units of the product in all carts.
+    - `trending` (float): `ln(1 + sum of the weights)` of the units added
+    to carts, each weighted by `2 ** ((added_at - TRENDING_EPOCH) / half_life)`.
+    Since every weight is relative to the same epoch, ordering by this
+    column ranks products by their exponentially decayed number of
+    additions. The logarithm keeps the scores from overflowing.
+    - `views` (int): The number of views of the product, written by the
+    view counters of the workers.
+    """
+    id = fields.IntField(pk=True)
+    product = fields.OneToOneField(
+        'models.Product', related_name='popularity', on_delete=fields.CASCADE
+    )
+    cart_count = fields.IntField(default=0)
+    quantity = fields.IntField(default=0)
+    trending = fields.FloatField(default=0)
+    views = fields.IntField(default=0)
+
+    class Meta:
+        indexes = (
+            ("cart_count", "product"),
+            ("trending", "product"),
+            ("views", "product"),
+        )
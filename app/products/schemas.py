@@ -1,4 +1,9 @@
-from pydantic import BaseModel, Field
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, model_validator
 from tortoise.contrib.pydantic import pydantic_model_creator
 
 from .models import Product
@@ -14,8 +19,172 @@ class ProductCreateUpdateSchema(BaseModel):
     - `name` (str): The name of the product.
     - `description` (str): The description of the product.
     - `price` (float): The price of the product.
+    - `category_id` (int | None): The ID of the product category.
 
     """
     name: str = Field(..., max_length=150)
     description: str = Field(..., max_length=255)
     price: float = Field(..., gt=0)
+    category_id: Optional[int] = None
+
+
+class ProductBatchRequestSchema(BaseModel):
+    """
+    Pydantic schema for looking up several products at once.
+
+    Attributes:
+    - `ids` (List[int]): The IDs of the products to retrieve.
+    """
+    ids: List[int] = Field(..., min_length=1)
+
+
+class ProductBatchSchema(BaseModel):
+    """
+    Pydantic schema for the result of a batch product lookup.
+
+    Attributes:
+    - `products` (List[ProductRetrieveSchema]):
+    The found products in the requested order.
+    - `missing` (List[int]):
+    The requested IDs without an active product.
+    """
+    products: List[ProductRetrieveSchema]
+    missing: List[int]
+
+
+class ProductChangesSchema(BaseModel):
+    """
+    Pydantic schema for a page of catalog changes.
+
+    Attributes:
+    - `products` (List[ProductRetrieveSchema]): The products created or
+    updated since the cursor, deactivated ones included.
+    - `deleted` (List[int]): The IDs of the products deleted since the cursor.
+    - `cursor` (str | None): The cursor to pass as `since` on the next call.
+    - `has_more` (bool): Whether more changes are available right away.
+    """
+    products: List[ProductRetrieveSchema]
+    deleted: List[int]
+    cursor: Optional[str] = None
+    has_more: bool
+
+
+class ProductSort(str, Enum):
+    """
+    Sort orders of the product list.
+
+    - `id`: By ID, oldest first.
+    - `price`: By price, cheapest first.
+    - `-price`: By price, most expensive first.
+    - `newest`: By creation time, newest first.
+    """
+    id = "id"
+    price = "price"
+    price_desc = "-price"
+    newest = "newest"
+
+
+class PopularSort(str, Enum):
+    """
+    Rankings of the popular products.
+
+    - `carts`: By the number of carts containing the product.
+    - `trending`: By recent additions to carts, older ones decaying
+    with `POPULAR_HALF_LIFE_HOURS`.
+    - `views`: By the number of views of the product.
+    """
+    carts = "carts"
+    trending = "trending"
+    views = "views"
+
+
+class ProductFilterSchema(BaseModel):
+    """
+    Pydantic schema for filtering the product list.
+
+    Attributes:
+    - `price_min` (Decimal | None): The minimum price, inclusive.
+    - `price_max` (Decimal | None): The maximum price, inclusive.
+    - `created_after` (datetime | None): Created at or after this time.
+    - `created_before` (datetime | None): Created before this time.
+    - `updated_after` (datetime | None): Updated at or after this time.
+    - `updated_before` (datetime | None): Updated before this time.
+    """
+    price_min: Optional[Decimal] = Field(None, ge=0)
+    price_max: Optional[Decimal] = Field(None, ge=0)
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+
+
+class PriceChangeMode(str, Enum):
+    """
+    Ways of changing prices in bulk.
+
+    - `set`: Replace the price with the value.
+    - `percent`: Raise the price by the value in percent, lower it with
+    a negative value.
+    """
+    set = "set"
+    percent = "percent"
+
+
+class PriceChangeSchema(BaseModel):
+    """
+    Pydantic schema for a bulk price change.
+
+    Attributes:
+    - `mode` (PriceChangeMode): How the value is applied.
+    - `value` (Decimal): The new price or the percentage.
+    - `round_to` (Decimal | None): Round the new prices to a multiple of
+    this step, e.g. `0.1` or `1`. Prices are always rounded to cents.
+    """
+    mode: PriceChangeMode
+    value: Decimal
+    round_to: Optional[Decimal] = Field(None, gt=0)
+
+    @model_validator(mode="after")
+    def check_value(self):
+        if self.mode == PriceChangeMode.set and self.value <= 0:
+            raise ValueError("The new price must be positive")
+        if self.mode == PriceChangeMode.percent and self.value <= -100:
+            raise ValueError("Prices cannot be lowered by 100% or more")
+        return self
+
+
+class ProductBulkUpdateSchema(BaseModel):
+    """
+    Pydantic schema for updating many products at once.
+
+    The updated products are those with the given IDs, or those matching
+    the filters. An empty `filters` object selects every product.
+
+    Attributes:
+    - `ids` (List[int] | None): The IDs of the products to update.
+    - `filters` (ProductFilterSchema | None): Selects the products to update.
+    - `price` (PriceChangeSchema | None): The price change to apply.
+    - `is_active` (bool | None): Activate or deactivate the products.
+    """
+    ids: Optional[List[int]] = Field(None, min_length=1)
+    filters: Optional[ProductFilterSchema] = None
+    price: Optional[PriceChangeSchema] = None
+    is_active: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def check_update(self):
+        if (self.ids is None) == (self.filters is None):
+            raise ValueError("Either ids or filters must be given")
+        if self.price is None and self.is_active is None:
+            raise ValueError("Nothing to update")
+        return self
+
+
+class ProductBulkUpdateResultSchema(BaseModel):
+    """
+    Pydantic schema for the result of a bulk update.
+
+    Attributes:
+    - `updated` (int): The number of updated products.
+    """
+    updated: int
@@ -1,5 +1,126 @@
-from .models import Product
-from .schemas import ProductCreateUpdateSchema
+import json
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from tortoise import connections
+from tortoise.transactions import in_transaction
+
+from app.categories.models import Category
+from app.core.cache import get_cache
+from app.core.config import (
+    POPULAR_CACHE_TTL, POPULAR_HALF_LIFE_HOURS, PRODUCT_BULK_CHUNK_SIZE,
+    PRODUCT_CHANGES_LAG
+)
+from app.core.db import execute_sql
+from app.core.fastpath import PRODUCT_FIELDS, fetch_active_product
+from app.core.invalidation import publish, subscribe
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter
+
+from .models import (
+    Product, ProductCooccurrence, ProductPopularity, ProductTombstone
+)
+from .schemas import (
+    PopularSort, PriceChangeMode, PriceChangeSchema, ProductBulkUpdateSchema,
+    ProductCreateUpdateSchema, ProductFilterSchema, ProductSort
+)
+
+product_cache = get_cache("product")
+popular_cache = get_cache("popular", maxsize=64, ttl=POPULAR_CACHE_TTL)
+# Popular lists embed product rows, drop them when any product changes.
+subscribe(product_cache.name, lambda keys: popular_cache.invalidate())
+
+# Topic of the catalog changes, see `catalog_key`
+CATALOG_TOPIC = "catalog"
+
+# Sort field and direction of every sort order, ties are broken by ID
+PRODUCT_SORTS = {
+    ProductSort.id: ("id", False),
+    ProductSort.price: ("price", False),
+    ProductSort.price_desc: ("price", True),
+    ProductSort.newest: ("created_at", True),
+}
+
+# Pairs the added product with every other product of the user's cart,
+# in both directions. Rows are upserted in key order so that concurrent
+# carts sharing products lock them in the same order instead of
+# deadlocking. SQLite needs the WHERE to parse ON CONFLICT after a SELECT.
+_COOCCURRENCE_UPSERT = """
+INSERT INTO "productcooccurrence" ("product_a_id", "product_b_id", "count")
+SELECT "product_a_id", "product_b_id", 1 FROM (
+    SELECT $1 AS "product_a_id", "product_id" AS "product_b_id"
+    FROM "cart" WHERE "user_id" = $2 AND "product_id" <> $1
+    UNION ALL
+    SELECT "product_id", $1 FROM "cart" WHERE "user_id" = $2 AND "product_id" <> $1
+) AS "pairs"
+WHERE true
+ORDER BY "product_a_id", "product_b_id"
+ON CONFLICT ("product_a_id", "product_b_id")
+DO UPDATE SET "count" = "productcooccurrence"."count" + 1
+"""
+
+# $4 is the trending score of a new row and $5 the log weight of the
+# added units, merged as ln(exp(score) + exp($5)). Past a difference of
+# 40 the smaller term is below double precision, and skipping it keeps
+# EXP from underflowing, which Postgres reports as an error.
+_POPULARITY_UPSERT = """
+INSERT INTO "productpopularity" ("product_id", "cart_count", "quantity", "trending")
+VALUES ($1, $2, $3, $4)
+ON CONFLICT ("product_id") DO UPDATE SET
+"cart_count" = "productpopularity"."cart_count" + EXCLUDED."cart_count",
+"quantity" = "productpopularity"."quantity" + EXCLUDED."quantity",
+"trending" = CASE
+    WHEN "productpopularity"."trending" - $5 > 40 THEN "productpopularity"."trending"
+    WHEN $5 - "productpopularity"."trending" > 40 THEN $5
+    WHEN "productpopularity"."trending" >= $5
+    THEN "productpopularity"."trending" + LN(1 + EXP($5 - "productpopularity"."trending"))
+    ELSE $5 + LN(1 + EXP("productpopularity"."trending" - $5))
+END
+"""
+
+# Reference time of the trending weights, which double every half-life.
+# Scores are stored as logarithms, so they stay small at any date.
+TRENDING_EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+
+POPULAR_SORTS = {
+    PopularSort.carts: "cart_count",
+    PopularSort.trending: "trending",
+    PopularSort.views: "views",
+}
+
+_CURSOR_PARSERS = {
+    "price": Decimal,
+    "created_at": datetime.fromisoformat,
+}
+
+
+def catalog_key(product: Product) -> list:
+    """
+    Describe a created or updated product for the `catalog` topic.
+
+    The key holds what is needed to tell whether the product now belongs
+    to the first pages of a sort order without loading it again.
+
+    Args:
+    - `product` (Product): The product as saved.
+
+    Returns:
+    - `list`: The ID, active flag, price and creation time of the product.
+    """
+    return [product.id, product.is_active, str(product.price), product.created_at.isoformat()]
+
+
+async def _check_category(product_data: ProductCreateUpdateSchema):
+    if product_data.category_id is None:
+        return
+    if not await Category.exists(id=product_data.category_id):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Category not found"
+        )
 
 
 async def create_product(product_data: ProductCreateUpdateSchema):
@@ -13,7 +134,9 @@ async def create_product(product_data: ProductCreateUpdateSchema):
     Returns:
     - `Product`: The created product.
     """
+    await _check_category(product_data)
     product = await Product.create(**product_data.model_dump())
+    await publish(CATALOG_TOPIC, catalog_key(product))
     return product
 
 
@@ -21,16 +144,61 @@ async def get_product(product_id: int):
     """
     Get a product by its ID.
 
+    Active products are served from the product cache when present.
+
     Args:
     - `product_id` (int): The ID of the product to retrieve.
 
     Returns:
-    - `Product` | `None`: The retrieved product or None if not found.
+    - `dict` | `None`: The retrieved product row or None if not found.
     """
-    product = await Product.filter(id=product_id, is_active=True).first()
+    product = product_cache.get(product_id)
+    if product is None:
+        generation = product_cache.generation
+        product = await fetch_active_product(product_id)
+        if product:
+            product_cache.set(product_id, product, generation)
     return product
 
 
+async def get_products_by_ids(product_ids: List[int]):
+    """
+    Get several active products by their IDs.
+
+    Cached products are reused and the rest is loaded
+    with a single `IN` query.
+
+    Args:
+    - `product_ids` (List[int]): The IDs of the products to retrieve.
+
+    Returns:
+    - `Tuple[List[dict], List[int]]`:
+    The found product rows in the requested order and the missing IDs.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    found = {}
+    to_load = []
+    for product_id in product_ids:
+        product = product_cache.get(product_id)
+        if product is None:
+            to_load.append(product_id)
+        else:
+            found[product_id] = product
+
+    if to_load:
+        generation = product_cache.generation
+        products = await Product.filter(
+            id__in=to_load, is_active=True
+        ).values(*PRODUCT_FIELDS)
+        for product in products:
+            found[product["id"]] = product
+            product_cache.set(product["id"], product, generation)
+
+    products = [found[product_id] for product_id in product_ids if product_id in found]
+    missing = [product_id for product_id in product_ids if product_id not in found]
+    return products, missing
+
+
 async def update_product(
         product_id: int,
         product_data: ProductCreateUpdateSchema
@@ -48,12 +216,15 @@ async def update_product(
     - `Product` | `None`:
     The updated product or None if the product doesn't exist.
     """
+    await _check_category(product_data)
     product = await Product.filter(id=product_id).first()
     if product:
         await product.update_from_dict(
             product_data.model_dump(exclude_unset=True)
         )
         await product.save()
+        await publish(product_cache.name, product_id)
+        await publish(CATALOG_TOPIC, catalog_key(product))
         return product
     else:
         return None
@@ -63,6 +234,9 @@ async def delete_product(product_id: int):
     """
     Delete a product by its ID.
 
+    A tombstone is recorded in the same transaction, so clients syncing
+    with `get_product_changes` learn about the deletion.
+
     Args:
     - `product_id` (int): The ID of the product to delete.
 
@@ -71,25 +245,418 @@ async def delete_product(product_id: int):
     """
     product = await Product.filter(id=product_id).first()
     if product:
-        await product.delete()
+        async with in_transaction():
+            await product.delete()
+            await ProductTombstone.create(id=product_id)
+        await publish(product_cache.name, product_id)
+        await publish(CATALOG_TOPIC, [product_id])
     else:
         return None
 
 
-async def get_products(skip: int = 0, limit: int = 10, is_active: bool = True):
+_BULK_UPDATE = """
+UPDATE "product" SET {assignments} WHERE "id" IN (
+    SELECT "id" FROM "product" WHERE {conditions}
+    ORDER BY "id" LIMIT $2
+) RETURNING "id", "is_active", "price", "created_at"
+"""
+
+# Filter fields of the bulk update and the conditions they stand for
+_BULK_FILTERS = {
+    "price_min": '"price" >= {}',
+    "price_max": '"price" <= {}',
+    "created_after": '"created_at" >= {}',
+    "created_before": '"created_at" < {}',
+    "updated_after": '"updated_at" >= {}',
+    "updated_before": '"updated_at" < {}',
+}
+
+
+def _price_expression(change: PriceChangeSchema, param) -> str:
+    value = param(change.value)
+    if change.mode == PriceChangeMode.set:
+        price = f"CAST({value} AS NUMERIC)"
+    else:
+        price = f'"price" * (1 + CAST({value} AS NUMERIC) / 100.0)'
+    minimum = f'CAST({param(change.round_to or Decimal("0.01"))} AS NUMERIC)'
+    if change.round_to is not None:
+        price = f"ROUND({price} / {minimum}) * {minimum}"
+    price = f"ROUND({price}, 2)"
+    # Rounding must not bring a price down to zero
+    return f"CASE WHEN {price} < {minimum} THEN {minimum} ELSE {price} END"
+
+
+def _catalog_row_key(row: dict) -> list:
+    created_at = row["created_at"]
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    return [row["id"], bool(row["is_active"]), str(row["price"]), created_at.isoformat()]
+
+
+async def bulk_update_products(
+        data: ProductBulkUpdateSchema,
+        chunk_size: int = PRODUCT_BULK_CHUNK_SIZE
+) -> int:
     """
-    Get a list of products with optional pagination.
+    Change the price or status of many products with set-based updates.
+
+    The products are updated in order of ID, `chunk_size` at a time, each
+    chunk being a single `UPDATE ... RETURNING` committed on its own so
+    locks are held briefly. `updated_at` is set explicitly, so the changes
+    feed reports the products. The caches and catalog snapshots of every
+    worker are invalidated once at the end, including when a chunk fails.
+
+    Args:
+    - `data` (ProductBulkUpdateSchema): The products and the changes.
+    - `chunk_size` (int): The maximum number of rows per statement.
+
+    Returns:
+    - `int`: The number of updated products.
+    """
+    sqlite = connections.get("default").capabilities.dialect == "sqlite"
+    values = [0, chunk_size]
+
+    def param(value) -> str:
+        if sqlite and isinstance(value, Decimal):
+            value = str(value)
+        elif sqlite and isinstance(value, datetime):
+            value = value.isoformat(" ")
+        values.append(value)
+        return f"${len(values)}"
+
+    def utc(value: datetime) -> datetime:
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+    assignments = [f'"updated_at" = {param(datetime.now(timezone.utc))}']
+    if data.price is not None:
+        assignments.append(f'"price" = {_price_expression(data.price, param)}')
+    conditions = ['"id" > $1']
+    if data.is_active is not None:
+        assignments.append(f'"is_active" = {param(data.is_active)}')
+        if data.price is None:
+            conditions.append(f'"is_active" <> {param(data.is_active)}')
+    if data.ids is not None:
+        if sqlite:
+            conditions.append(f'"id" IN (SELECT "value" FROM json_each({param(json.dumps(data.ids))}))')
+        else:
+            conditions.append(f'"id" = ANY({param(data.ids)}::int[])')
+    if data.filters is not None:
+        for field, value in data.filters.model_dump(exclude_none=True).items():
+            if isinstance(value, datetime):
+                value = utc(value)
+            conditions.append(_BULK_FILTERS[field].format(param(value)))
+    query = _BULK_UPDATE.format(
+        assignments=", ".join(assignments),
+        conditions=" AND ".join(conditions)
+    )
+
+    keys = []
+    try:
+        while True:
+            _, rows = await execute_sql(query, values)
+            keys.extend(_catalog_row_key(row) for row in rows)
+            if len(rows) < chunk_size:
+                break
+            values[0] = max(row["id"] for row in rows)
+    finally:
+        if keys:
+            await publish(product_cache.name, *(key[0] for key in keys))
+            await publish(CATALOG_TOPIC, *keys)
+    return len(keys)
+
+
+async def get_products(
+        skip: int = 0,
+        limit: int = 10,
+        is_active: bool = True,
+        filters: Optional[ProductFilterSchema] = None,
+        sort: ProductSort = ProductSort.id,
+        cursor: Optional[str] = None
+):
+    """
+    Get a list of products with optional filtering, sorting and pagination.
+
+    Every sort order is backed by an `(is_active, <field>, id)` index,
+    so both offset and cursor pagination stay on the index.
 
     Args:
     - `skip` (int):
     The number of products to skip.
     - `limit` (int):
     The maximum number of products to retrieve.
+    - `is_active` (bool):
+    Whether to list active or inactive products.
+    - `filters` (ProductFilterSchema | None):
+    Price and time window filters.
+    - `sort` (ProductSort):
+    The sort order.
+    - `cursor` (str | None):
+    The cursor returned by `product_cursor` for the previous page.
 
     Returns:
     - `List[Product]`:
-    A list of products based on the specified skip and limit.
+    A list of products based on the specified filters and pagination.
+
+    Raises:
+    - `HTTPException`: If both `skip` and `cursor` are given.
+    """
+    if cursor is not None and skip:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The cursor cannot be combined with skip"
+        )
+    query = Product.filter(is_active=is_active)
+    if filters is not None:
+        query = _apply_filters(query, filters)
+
+    field, descending = PRODUCT_SORTS[sort]
+    if cursor is not None:
+        query = query.filter(_cursor_filter(cursor, sort))
+    if field == "id":
+        query = query.order_by("-id" if descending else "id")
+    else:
+        order = "-" if descending else ""
+        query = query.order_by(f"{order}{field}", f"{order}id")
+
+    products = await query.offset(skip).limit(limit)
+    return products
+
+
+def _apply_filters(query, filters: ProductFilterSchema):
+    conditions = {
+        "price__gte": filters.price_min,
+        "price__lte": filters.price_max,
+        "created_at__gte": filters.created_after,
+        "created_at__lt": filters.created_before,
+        "updated_at__gte": filters.updated_after,
+        "updated_at__lt": filters.updated_before,
+    }
+    return query.filter(**{
+        condition: value
+        for condition, value in conditions.items()
+        if value is not None
+    })
+
+
+def _cursor_filter(cursor: str, sort: ProductSort):
+    field, descending = PRODUCT_SORTS[sort]
+    values = decode_cursor(cursor)
+    try:
+        cursor_sort, *key = values
+        if cursor_sort != sort.value:
+            raise ValueError(cursor_sort)
+        if field == "id":
+            (pk,) = key
+            return keyset_filter("id", int(pk), int(pk), descending)
+        value, pk = key
+        return keyset_filter(field, _CURSOR_PARSERS[field](value), int(pk), descending)
+    except (ValueError, ArithmeticError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid cursor"
+        )
+
+
+def product_cursor(product: Product, sort: ProductSort = ProductSort.id) -> str:
+    """
+    Get the cursor pointing after a product in the given sort order.
+
+    Args:
+    - `product` (Product): The last product of the current page.
+    - `sort` (ProductSort): The sort order of the page.
+
+    Returns:
+    - `str`: The cursor to pass to `get_products` for the next page.
+    """
+    field, _ = PRODUCT_SORTS[sort]
+    if field == "id":
+        return encode_cursor(sort.value, product.id)
+    value = getattr(product, field)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return encode_cursor(sort.value, value, product.id)
+
+
+async def record_cart_cooccurrence(user_id: int, product_id: int):
+    """
+    Count a product as bought together with the rest of a user's cart.
+
+    Called in the transaction adding the product to the cart. The
+    counters are only incremented, so removing a product from the cart
+    keeps them.
+
+    Args:
+    - `user_id` (int): The ID of the cart owner.
+    - `product_id` (int): The ID of the added product.
+    """
+    await execute_sql(_COOCCURRENCE_UPSERT, [product_id, user_id])
+
+
+async def get_related_products(product_id: int, limit: int = 10):
+    """
+    Get the active products most often found in a cart with a product.
+
+    Reads the top of the `(product_a, count)` index of the co-occurrence
+    table, so the cost does not depend on the number of carts.
+
+    Args:
+    - `product_id` (int): The ID of the product.
+    - `limit` (int): The maximum number of products to retrieve.
+
+    Returns:
+    - `List[dict]`: The related product rows, most frequent first.
+    """
+    return await ProductCooccurrence.filter(
+        product_a_id=product_id, product_b__is_active=True
+    ).order_by("-count", "product_b_id").limit(limit).values(
+        **{field: f"product_b__{field}" for field in PRODUCT_FIELDS}
+    )
+
+
+def _changes_filter(cursor: str, field: str):
+    values = decode_cursor(cursor)
+    try:
+        value, pk = values
+        return keyset_filter(field, datetime.fromisoformat(value), int(pk))
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid cursor"
+        )
+
+
+async def get_product_changes(since: Optional[str] = None, limit: int = 100):
+    """
+    Get the catalog changes made after a cursor.
+
+    Products are read in `(updated_at, id)` order and tombstones of deleted
+    products in `(deleted_at, id)` order, both from an index, and merged
+    into one stream. Changes younger than `PRODUCT_CHANGES_LAG` seconds are
+    held back for the next call, so a transaction committing late with an
+    older `updated_at` is not skipped.
+
+    Args:
+    - `since` (str | None): The cursor of the previous call, None to
+    start from the beginning of the catalog.
+    - `limit` (int): The maximum number of changes to return.
+
+    Returns:
+    - `dict`: The changed products, the deleted product IDs, the cursor
+    of the last returned change and whether more changes are available.
+    """
+    settled = datetime.now(timezone.utc) - timedelta(seconds=PRODUCT_CHANGES_LAG)
+    products = Product.filter(updated_at__lt=settled)
+    tombstones = ProductTombstone.filter(deleted_at__lt=settled)
+    if since is not None:
+        products = products.filter(_changes_filter(since, "updated_at"))
+        tombstones = tombstones.filter(_changes_filter(since, "deleted_at"))
+    products = await products.order_by("updated_at", "id").limit(limit).values(
+        *PRODUCT_FIELDS
+    )
+    tombstones = await tombstones.order_by("deleted_at", "id").limit(limit).values(
+        "id", "deleted_at"
+    )
+
+    changes = sorted(
+        [(product["updated_at"], product["id"], product) for product in products]
+        + [(tombstone["deleted_at"], tombstone["id"], None) for tombstone in tombstones],
+        key=lambda change: change[:2]
+    )
+    has_more = len(changes) > limit or limit in (len(products), len(tombstones))
+    changes = changes[:limit]
+    cursor = since
+    if changes:
+        changed_at, pk, _ = changes[-1]
+        cursor = encode_cursor(changed_at.isoformat(), pk)
+    return {
+        "products": [product for _, _, product in changes if product is not None],
+        "deleted": [pk for _, pk, product in changes if product is None],
+        "cursor": cursor,
+        "has_more": has_more,
+    }
+
+
+def trending_log_weight(quantity: int, timestamp: float) -> float:
+    """
+    Get the natural logarithm of the trending weight of added units.
+
+    Args:
+    - `quantity` (int): The number of units added, at least 1.
+    - `timestamp` (float): The POSIX time of the addition.
+
+    Returns:
+    - `float`: `ln(quantity * 2 ** ((timestamp - TRENDING_EPOCH) / half_life))`.
+    """
+    half_lives = (timestamp - TRENDING_EPOCH) / (POPULAR_HALF_LIFE_HOURS * 3600)
+    return math.log(quantity) + half_lives * math.log(2)
+
+
+def add_trending(score: float, log_weight: float) -> float:
+    """
+    Add a weight to a trending score, both in log space.
+
+    Args:
+    - `score` (float): The score, `ln(1 + sum of the weights)`, 0 when
+    no unit was added yet.
+    - `log_weight` (float): The result of `trending_log_weight`.
+
+    Returns:
+    - `float`: `ln(exp(score) + exp(log_weight))`, as computed by the
+    popularity upsert.
     """
-    query = Product.filter(is_active=is_active).offset(skip).limit(limit)
-    products = await query.all()
+    high, low = max(score, log_weight), min(score, log_weight)
+    if high - low > 40:
+        return high
+    return high + math.log1p(math.exp(low - high))
+
+
+async def record_cart_popularity(product_id: int, carts: int, quantity: int):
+    """
+    Update the popularity counters of a product after a cart write.
+
+    Added units also raise the trending score with the weight of the
+    current time, removed units do not lower it. Called in the
+    transaction writing the cart row.
+
+    Args:
+    - `product_id` (int): The ID of the product.
+    - `carts` (int): The change of the number of carts containing the
+    product: 1 when added, -1 when removed, 0 when the quantity changed.
+    - `quantity` (int): The change of the quantity in the cart.
+    """
+    # A weight of zero leaves the score unchanged
+    log_weight = trending_log_weight(quantity, time.time()) if quantity > 0 else -math.inf
+    await execute_sql(
+        _POPULARITY_UPSERT,
+        [product_id, carts, quantity, add_trending(0.0, log_weight), log_weight]
+    )
+
+
+async def get_popular_products(sort: PopularSort = PopularSort.carts, limit: int = 10):
+    """
+    Get the most popular active products.
+
+    Lists are read from the counters maintained by `record_cart_popularity`
+    and cached for `POPULAR_CACHE_TTL` seconds.
+
+    Args:
+    - `sort` (PopularSort): The ranking to use.
+    - `limit` (int): The maximum number of products to retrieve.
+
+    Returns:
+    - `List[dict]`: The product rows, most popular first.
+    """
+    key = (sort, limit)
+    products = popular_cache.get(key)
+    if products is None:
+        generation = popular_cache.generation
+        field = POPULAR_SORTS[sort]
+        products = await ProductPopularity.filter(
+            product__is_active=True, **{f"{field}__gt": 0}
+        ).order_by(f"-{field}", "product_id").limit(limit).values(
+            **{field: f"product__{field}" for field in PRODUCT_FIELDS}
+        )
+        popular_cache.set(key, products, generation)
     return products
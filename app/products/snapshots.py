@@ -0,0 +1,225 @@
+"""
+Pre-rendered first pages of the product list.
+
+For every sort order and every page size of `CATALOG_SNAPSHOT_PAGE_SIZES`,
+the first `CATALOG_SNAPSHOT_PAGES` pages of active products are kept in
+memory as the JSON bytes `GET /products/` would send. Requests for these
+pages without filters or cursor are answered from memory.
+
+Products created, updated or deleted are published on the `catalog`
+topic with their sort keys. Each worker drops only the snapshots the
+change can affect: those listing the product, and those whose last row
+sorts after it. The dropped snapshots are rebuilt in the background with
+one query each, meanwhile their pages are read from the database.
+"""
+import asyncio
+import contextvars
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from pydantic import TypeAdapter
+
+from app.core.config import CATALOG_SNAPSHOT_PAGE_SIZES, CATALOG_SNAPSHOT_PAGES
+from app.core.invalidation import subscribe
+
+from .schemas import ProductRetrieveSchema, ProductSort
+from .services import (
+    CATALOG_TOPIC, PRODUCT_SORTS, get_products, product_cursor
+)
+
+logger = logging.getLogger(__name__)
+
+# Attempts to build a snapshot while products keep changing
+MAX_BUILD_ATTEMPTS = 3
+
+SnapshotKey = Tuple[ProductSort, int]
+
+_adapter = TypeAdapter(List[ProductRetrieveSchema])
+
+
+class CatalogSnapshot:
+    """
+    The first pages of one sort order and page size.
+
+    Attributes:
+    - `pages` (List[Tuple[bytes, str | None]]): The body of every page and
+    the cursor of the next page when the page is full.
+    - `ids` (Set[int]): The IDs of the listed products.
+    - `last` (tuple | None): The sort key of the last listed product, None
+    when the snapshot lists every active product.
+    """
+
+    def __init__(self, pages: List[Tuple[bytes, Optional[str]]], ids: Set[int], last: Optional[tuple]):
+        self.pages = pages
+        self.ids = ids
+        self.last = last
+
+
+_snapshots: Dict[SnapshotKey, CatalogSnapshot] = {}
+_generations: Dict[SnapshotKey, int] = {}
+_building: Dict[SnapshotKey, asyncio.Task] = {}
+
+
+def snapshot_keys() -> List[SnapshotKey]:
+    """
+    Get the sort orders and page sizes kept as snapshots.
+    """
+    if CATALOG_SNAPSHOT_PAGES <= 0:
+        return []
+    return [(sort, limit) for sort in ProductSort for limit in CATALOG_SNAPSHOT_PAGE_SIZES]
+
+
+def _sort_key(sort: ProductSort, value, product_id: int) -> tuple:
+    field, _ = PRODUCT_SORTS[sort]
+    return (product_id,) if field == "id" else (value, product_id)
+
+
+async def build_snapshot(sort: ProductSort, limit: int) -> Optional[CatalogSnapshot]:
+    """
+    Render the first pages of a sort order and page size.
+
+    The result is dropped and the query repeated when the catalog changes
+    while it runs, at most `MAX_BUILD_ATTEMPTS` times.
+
+    Parameters:
+    - `sort` (ProductSort): The sort order.
+    - `limit` (int): The page size.
+
+    Returns:
+    - The installed snapshot, or None if the catalog kept changing.
+    """
+    key = (sort, limit)
+    field, _ = PRODUCT_SORTS[sort]
+    for _ in range(MAX_BUILD_ATTEMPTS):
+        generation = _generations.get(key, 0)
+        size = limit * CATALOG_SNAPSHOT_PAGES
+        products = await get_products(0, size, sort=sort)
+        if generation != _generations.get(key, 0):
+            continue
+
+        pages = []
+        for start in range(0, size, limit):
+            page = products[start:start + limit]
+            body = _adapter.dump_json(_adapter.validate_python(page, from_attributes=True))
+            cursor = product_cursor(page[-1], sort) if len(page) == limit else None
+            pages.append((body, cursor))
+        last = None
+        if len(products) == size:
+            last = _sort_key(sort, getattr(products[-1], field), products[-1].id)
+        snapshot = CatalogSnapshot(pages, {product.id for product in products}, last)
+        _snapshots[key] = snapshot
+        return snapshot
+    logger.info("Catalog snapshot %s/%d not built, the catalog keeps changing", sort.value, limit)
+    return None
+
+
+def _schedule(key: SnapshotKey) -> None:
+    if key in _building:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    # Builds are shared by all requests, they must not inherit the
+    # deadline of the request that happens to start them.
+    task = loop.create_task(build_snapshot(*key), context=contextvars.Context())
+    _building[key] = task
+
+    def done(task: asyncio.Task) -> None:
+        _building.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Catalog snapshot build failed", exc_info=task.exception())
+
+    task.add_done_callback(done)
+
+
+def get_snapshot_page(sort: ProductSort, limit: int, skip: int) -> Optional[Tuple[bytes, Optional[str]]]:
+    """
+    Get a pre-rendered page of the product list.
+
+    A missing snapshot is scheduled for building.
+
+    Parameters:
+    - `sort` (ProductSort): The sort order.
+    - `limit` (int): The page size.
+    - `skip` (int): The offset of the page.
+
+    Returns:
+    - The JSON body and next page cursor, or None if the page has no
+    snapshot and must be read from the database.
+    """
+    if (
+            CATALOG_SNAPSHOT_PAGES <= 0
+            or limit not in CATALOG_SNAPSHOT_PAGE_SIZES
+            or skip % limit
+            or skip // limit >= CATALOG_SNAPSHOT_PAGES
+    ):
+        return None
+    snapshot = _snapshots.get((sort, limit))
+    if snapshot is None:
+        _schedule((sort, limit))
+        return None
+    return snapshot.pages[skip // limit]
+
+
+def _affects(key: SnapshotKey, snapshot: CatalogSnapshot, change: list) -> bool:
+    product_id, *state = change
+    if product_id in snapshot.ids:
+        return True
+    if not state or not state[0]:
+        # Deleted or inactive, and not listed
+        return False
+    if snapshot.last is None:
+        return True
+    sort, _ = key
+    field, descending = PRODUCT_SORTS[sort]
+    value = {"price": Decimal(state[1]), "created_at": datetime.fromisoformat(state[2])}.get(field)
+    position = _sort_key(sort, value, product_id)
+    return position > snapshot.last if descending else position < snapshot.last
+
+
+def _drop(key: SnapshotKey) -> None:
+    _generations[key] = _generations.get(key, 0) + 1
+    _snapshots.pop(key, None)
+
+
+def on_catalog_change(changes: Optional[List[Hashable]]) -> None:
+    """
+    Drop and rebuild the snapshots affected by catalog changes.
+
+    Parameters:
+    - `changes`: The published `catalog_key` lists, a deletion being
+    published as `[id]`, or None when every snapshot must be dropped.
+    """
+    for key in snapshot_keys():
+        snapshot = _snapshots.get(key)
+        if changes is None or key in _building:
+            # A build in progress cannot tell, it starts over.
+            _drop(key)
+        elif snapshot is not None and any(_affects(key, snapshot, change) for change in changes):
+            _drop(key)
+        else:
+            continue
+        _schedule(key)
+
+
+async def warm_snapshots() -> None:
+    """
+    Build every snapshot in the background.
+    """
+    for key in snapshot_keys():
+        _schedule(key)
+
+
+async def stop_snapshots() -> None:
+    """
+    Cancel the snapshot builds in progress.
+    """
+    for task in list(_building.values()):
+        task.cancel()
+    await asyncio.gather(*_building.values(), return_exceptions=True)
+
+
+subscribe(CATALOG_TOPIC, on_catalog_change)
@@ -1,12 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
 
-from .schemas import ProductCreateUpdateSchema, ProductRetrieveSchema
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+from app.core.config import PRODUCT_BATCH_MAX_IDS, PRODUCT_CHANGES_MAX_LIMIT
+
+from .schemas import (
+    PopularSort, ProductBatchRequestSchema, ProductBatchSchema,
+    ProductBulkUpdateResultSchema, ProductBulkUpdateSchema,
+    ProductChangesSchema, ProductCreateUpdateSchema, ProductFilterSchema,
+    ProductRetrieveSchema, ProductSort
+)
 from .services import (
-    create_product, get_product,
+    bulk_update_products, create_product, get_product,
     update_product, delete_product,
-    get_products
+    get_products, get_products_by_ids,
+    get_popular_products, get_product_changes,
+    get_related_products, product_cursor
 )
 
+from .snapshots import get_snapshot_page
+from .view_counter import record_view
 from ..users.services import get_current_user
 
 product_router = APIRouter(prefix="/products", tags=["Products"])
@@ -41,6 +54,142 @@ async def create_product_view(product_data: ProductCreateUpdateSchema):
         )
 
 
+async def _get_products_batch(product_ids: List[int]):
+    if len(product_ids) > PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"No more than {PRODUCT_BATCH_MAX_IDS} ids are allowed"
+        )
+    products, missing = await get_products_by_ids(product_ids)
+    return {"products": products, "missing": missing}
+
+
+@product_router.get("/batch",
+                    response_model=ProductBatchSchema,
+                    dependencies=[Depends(get_current_user)]
+                    )
+async def get_products_batch_view(ids: str):
+    """
+    Get several products by their IDs.
+
+    Args:
+    - `ids` (str): Comma-separated product IDs, e.g. `1,2,3`.
+
+    Returns:
+    - `ProductBatchSchema`:
+    The found products in the requested order and the missing IDs.
+
+    Raises:
+    - `HTTPException`: If the IDs are malformed or too many.
+    """
+    try:
+        product_ids = [int(product_id) for product_id in ids.split(",")]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must be a comma-separated list of integers"
+        )
+    return await _get_products_batch(product_ids)
+
+
+@product_router.post("/batch",
+                     response_model=ProductBatchSchema,
+                     dependencies=[Depends(get_current_user)]
+                     )
+async def post_products_batch_view(batch_data: ProductBatchRequestSchema):
+    """
+    Get several products by the IDs passed in the request body.
+
+    Args:
+    - `batch_data` (ProductBatchRequestSchema): The IDs to retrieve.
+
+    Returns:
+    - `ProductBatchSchema`:
+    The found products in the requested order and the missing IDs.
+
+    Raises:
+    - `HTTPException`: If too many IDs are requested.
+    """
+    return await _get_products_batch(batch_data.ids)
+
+
+@product_router.post("/bulk",
+                     response_model=ProductBulkUpdateResultSchema,
+                     dependencies=[Depends(get_current_user)]
+                     )
+async def bulk_update_products_view(update_data: ProductBulkUpdateSchema):
+    """
+    Change the price or status of many products at once.
+
+    Args:
+    - `update_data` (ProductBulkUpdateSchema): The IDs or filters selecting
+    the products, and the price change and/or the new `is_active` value.
+
+    Returns:
+    - `ProductBulkUpdateResultSchema`: The number of updated products.
+
+    Example:
+    ```json
+    {"filters": {"price_min": 100}, "price": {"mode": "percent", "value": -15, "round_to": 0.1}}
+    ```
+    """
+    updated = await bulk_update_products(update_data)
+    return {"updated": updated}
+
+
+@product_router.get("/popular",
+                    response_model=list[ProductRetrieveSchema],
+                    dependencies=[Depends(get_current_user)]
+                    )
+async def get_popular_products_view(
+        sort: PopularSort = PopularSort.carts,
+        limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Get the most popular products.
+
+    Args:
+    - `sort` (PopularSort): `carts` to rank by the number of carts
+    containing the product, `trending` to rank by recent additions,
+    `views` to rank by views, written every `VIEW_COUNTER_FLUSH_INTERVAL`.
+    - `limit` (int): The maximum number of products to retrieve.
+
+    Returns:
+    - `List[ProductRetrieveSchema]`: The products, most popular first.
+    """
+    return await get_popular_products(sort, limit)
+
+
+@product_router.get("/changes",
+                    response_model=ProductChangesSchema,
+                    dependencies=[Depends(get_current_user)]
+                    )
+async def get_product_changes_view(
+        since: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=PRODUCT_CHANGES_MAX_LIMIT)
+):
+    """
+    Get the products created, updated, deactivated or deleted since a cursor.
+
+    Start without `since` to download the whole catalog page by page,
+    then pass the returned `cursor` on every call to receive only the
+    changes made in between.
+
+    Args:
+    - `since` (str | None): The `cursor` of the previous response.
+    - `limit` (int): The maximum number of changes to return.
+
+    Returns:
+    - `ProductChangesSchema`: The changed products, the deleted product
+    IDs and the cursor of the next call. Call again right away while
+    `has_more` is true.
+
+    Raises:
+    - `HTTPException`: If the cursor is invalid.
+    """
+    return await get_product_changes(since, limit)
+
+
 @product_router.get("/{product_id}",
                     response_model=ProductRetrieveSchema,
                     dependencies=[Depends(get_current_user)]
@@ -60,6 +209,7 @@ async def get_product_view(product_id: int):
     """
     product = await get_product(product_id)
     if product:
+        record_view(product_id)
         return product
     else:
         raise HTTPException(
@@ -68,6 +218,36 @@ async def get_product_view(product_id: int):
         )
 
 
+@product_router.get("/{product_id}/related",
+                    response_model=list[ProductRetrieveSchema],
+                    dependencies=[Depends(get_current_user)]
+                    )
+async def get_related_products_view(
+        product_id: int,
+        limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Get the products frequently bought together with a product.
+
+    Args:
+    - `product_id` (int): The ID of the product.
+    - `limit` (int): The maximum number of products to retrieve.
+
+    Returns:
+    - `List[ProductRetrieveSchema]`:
+    The related active products, most frequent first.
+
+    Raises:
+    - `HTTPException`: If the product with the given ID is not found.
+    """
+    if not await get_product(product_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    return await get_related_products(product_id, limit)
+
+
 @product_router.put("/{product_id}",
                     response_model=ProductRetrieveSchema,
                     dependencies=[Depends(get_current_user)]
@@ -133,19 +313,45 @@ async def delete_product_view(product_id: int):
                     response_model=list[ProductRetrieveSchema],
                     dependencies=[Depends(get_current_user)]
                     )
-async def get_products_view(skip: int = 0, limit: int = 10):
+async def get_products_view(
+        response: Response,
+        skip: int = 0,
+        limit: int = 10,
+        sort: ProductSort = ProductSort.id,
+        cursor: Optional[str] = None,
+        filters: ProductFilterSchema = Depends()
+):
     """
-    Get a list of products with optional pagination.
+    Get a list of products with optional filtering, sorting and pagination.
+
+    When the page is full, the `X-Next-Cursor` response header holds
+    the cursor of the next page for the same sort order. The first pages
+    without filters or cursor are served from the catalog snapshots.
 
     Args:
     - `skip` (int):
      The number of products to skip.
     - `limit` (int):
     The maximum number of products to retrieve.
+    - `sort` (ProductSort):
+    The sort order: `id`, `price`, `-price` or `newest`.
+    - `cursor` (str | None):
+    The `X-Next-Cursor` value of the previous page.
+    - `filters` (ProductFilterSchema):
+    Price range and creation/update time windows.
 
     Returns:
     - `List[ProductRetrieveSchema]`:
-     A list of products based on the specified skip and limit.
+     A list of products based on the specified filters and pagination.
     """
-    products = await get_products(skip, limit)
+    if cursor is None and not filters.model_dump(exclude_none=True):
+        page = get_snapshot_page(sort, limit, skip)
+        if page is not None:
+            body, next_cursor = page
+            headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+            return Response(body, media_type="application/json", headers=headers)
+
+    products = await get_products(skip, limit, filters=filters, sort=sort, cursor=cursor)
+    if products and len(products) == limit:
+        response.headers["X-Next-Cursor"] = product_cursor(products[-1], sort)
     return products
@@ -0,0 +1,159 @@
+"""
+Write-coalesced product view counters.
+
+`GET /products/{product_id}` only increments a counter in the memory of
+the worker. Every `VIEW_COUNTER_FLUSH_INTERVAL` seconds, the counters are
+swapped for empty ones and added to `productpopularity.views` with a
+single upsert, so the write load does not grow with the read traffic.
+
+Memory is bounded: once `VIEW_COUNTER_MAX_PRODUCTS` products are counted,
+a flush is started early, and views of other products are dropped until
+it completes (`stats["dropped"]`).
+
+Delivery is at least once per flush: when the upsert fails, its counts
+are merged back and retried with the next flush, so a flush whose commit
+was not acknowledged may be counted twice. Counts still in memory are
+flushed on shutdown but lost if the worker is killed, at most
+`VIEW_COUNTER_FLUSH_INTERVAL` seconds of views.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+from typing import Dict, Optional
+
+from tortoise import connections
+
+from app.core.config import (
+    VIEW_COUNTER_FLUSH_INTERVAL, VIEW_COUNTER_MAX_PRODUCTS
+)
+from app.core.db import execute_sql
+
+logger = logging.getLogger(__name__)
+
+# Rows are written in product order, so that the concurrent flushes of
+# several workers lock them in the same order instead of deadlocking
+_UPSERT = """
+INSERT INTO "productpopularity" ("product_id", "views")
+SELECT "product"."id", "counts"."views" FROM {counts}
+JOIN "product" ON "product"."id" = "counts"."product_id" WHERE true
+ORDER BY "product"."id"
+ON CONFLICT ("product_id") DO UPDATE SET
+"views" = "productpopularity"."views" + EXCLUDED."views"
+"""
+_POSTGRES_COUNTS = 'unnest($1::int[], $2::int[]) AS "counts" ("product_id", "views")'
+_SQLITE_COUNTS = (
+    '(SELECT CAST("key" AS INTEGER) AS "product_id", "value" AS "views" '
+    'FROM json_each($1)) AS "counts"'
+)
+
+# Counters of this worker
+stats: Dict[str, int] = {
+    "recorded": 0,
+    "dropped": 0,
+    "flushes": 0,
+    "failed_flushes": 0,
+}
+
+_counts: Dict[int, int] = {}
+_flushing: Optional[asyncio.Task] = None
+_flusher: Optional[asyncio.Task] = None
+
+
+def record_view(product_id: int) -> None:
+    """
+    Count a view of a product.
+
+    Parameters:
+    - `product_id` (int): The ID of the viewed product.
+    """
+    if product_id not in _counts and len(_counts) >= VIEW_COUNTER_MAX_PRODUCTS:
+        _schedule_flush()
+        stats["dropped"] += 1
+        return
+    _counts[product_id] = _counts.get(product_id, 0) + 1
+    stats["recorded"] += 1
+
+
+async def _upsert(counts: Dict[int, int]) -> None:
+    ids = sorted(counts)
+    if connections.get("default").capabilities.dialect == "sqlite":
+        await execute_sql(
+            _UPSERT.format(counts=_SQLITE_COUNTS), [json.dumps({i: counts[i] for i in ids})]
+        )
+    else:
+        await execute_sql(
+            _UPSERT.format(counts=_POSTGRES_COUNTS), [ids, [counts[i] for i in ids]]
+        )
+
+
+async def flush_views() -> int:
+    """
+    Add the counted views to the database.
+
+    Returns:
+    - The number of products whose views were written.
+    """
+    global _counts
+    counts, _counts = _counts, {}
+    if not counts:
+        return 0
+    try:
+        await _upsert(counts)
+    except BaseException:
+        stats["failed_flushes"] += 1
+        # Retried with the next flush, possibly counting them twice
+        for product_id, views in counts.items():
+            _counts[product_id] = _counts.get(product_id, 0) + views
+        raise
+    stats["flushes"] += 1
+    return len(counts)
+
+
+def _schedule_flush() -> None:
+    global _flushing
+    if _flushing is not None and not _flushing.done():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    # Started by a request, it must not inherit the request deadline
+    _flushing = loop.create_task(flush_views(), context=contextvars.Context())
+
+    def done(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Flushing product views failed", exc_info=task.exception())
+
+    _flushing.add_done_callback(done)
+
+
+async def _flush_periodically() -> None:
+    while True:
+        await asyncio.sleep(VIEW_COUNTER_FLUSH_INTERVAL)
+        _schedule_flush()
+
+
+async def start_view_counter() -> None:
+    """
+    Start flushing the view counters of this worker periodically.
+    """
+    global _flusher
+    _flusher = asyncio.create_task(_flush_periodically())
+
+
+async def stop_view_counter() -> None:
+    """
+    Stop the periodic flush and write the remaining views.
+    """
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        await asyncio.gather(_flusher, return_exceptions=True)
+        _flusher = None
+    if _flushing is not None:
+        await asyncio.gather(_flushing, return_exceptions=True)
+    try:
+        await flush_views()
+    except Exception:
+        logger.exception("Flushing product views on shutdown failed")
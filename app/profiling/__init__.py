@@ -0,0 +1,4 @@
+from .middleware import ProfilingMiddleware
+from .views import debug_router
+
+__all__ = ["ProfilingMiddleware", "debug_router"]
@@ -0,0 +1,56 @@
+import logging
+import secrets
+
+from app.core.config import PROFILING_TOKEN
+
+from .profilers import MODES, is_busy, profiling
+
+logger = logging.getLogger(__name__)
+
+
+def check_token(token: str) -> bool:
+    """
+    Check a profiling token in constant time.
+    """
+    return bool(PROFILING_TOKEN) and secrets.compare_digest(token, PROFILING_TOKEN)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling the requests sent with an `X-Profile` header.
+
+    The header must hold `PROFILING_TOKEN`, and `X-Profile-Mode` selects
+    `cprofile` (the default), `sample` or `memory`. The response carries
+    the `X-Profile-Id` header under which the profile can be read from
+    `GET /debug/profiles/{profile_id}` on the same worker. The debug
+    routes themselves are never profiled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/debug/"):
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        token = headers.get(b"x-profile")
+        if token is None or not check_token(token.decode("latin-1")):
+            return await self.app(scope, receive, send)
+        mode = headers.get(b"x-profile-mode", b"cprofile").decode("latin-1")
+        if mode not in MODES:
+            mode = "cprofile"
+
+        if is_busy():
+            logger.warning("Profiling skipped, another profile is running")
+            return await self.app(scope, receive, send)
+
+        with profiling(mode, f"{scope['method']} {scope['path']}") as profile:
+            async def send_with_id(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-profile-id", profile["id"].encode()),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_id)
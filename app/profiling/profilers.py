@@ -0,0 +1,225 @@
+"""
+Profilers run on demand inside a worker.
+
+Three modes are available:
+- `cprofile`: deterministic profile of every function call, the raw
+output can be downloaded and opened with `snakeviz` or `pstats`.
+- `sample`: samples the stack of the event loop thread at a fixed
+interval and reports collapsed stacks, the input format of
+`flamegraph.pl`, speedscope and most flamegraph viewers.
+- `memory`: compares `tracemalloc` snapshots taken before and after,
+listing the lines whose allocations are still alive.
+
+All profilers observe the whole event loop thread, so a profile of one
+request also contains the work of the requests running concurrently.
+Only one profile runs at a time in a worker.
+"""
+import cProfile
+import collections
+import datetime
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional
+
+from app.core.config import (
+    PROFILING_KEEP, PROFILING_SAMPLE_INTERVAL_MS, PROFILING_TRACEMALLOC_FRAMES
+)
+
+MODES = ("cprofile", "sample", "memory")
+
+_profiles: Deque[dict] = collections.deque(maxlen=PROFILING_KEEP)
+_active = False
+
+# Paths are shortened in the reports for readability
+_PREFIXES = sorted(
+    {os.getcwd() + os.sep, sys.prefix + os.sep, sys.base_prefix + os.sep},
+    key=len, reverse=True
+)
+
+
+class ProfilerBusy(RuntimeError):
+    """
+    Raised when a profile is requested while another one is running.
+    """
+
+
+def _short_path(path: str) -> str:
+    for prefix in _PREFIXES:
+        if path.startswith(prefix):
+            return path[len(prefix):]
+    return path
+
+
+class CProfileCollector:
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        self.profiler.enable()
+
+    def stop(self) -> None:
+        self.profiler.disable()
+
+    def result(self) -> Dict[str, Optional[bytes]]:
+        output = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(50)
+        self.profiler.create_stats()
+        # The format written by `pstats.Stats.dump_stats`
+        return {"text": output.getvalue(), "raw": marshal.dumps(self.profiler.stats)}
+
+
+class SamplingCollector:
+    def __init__(self, interval: float = PROFILING_SAMPLE_INTERVAL_MS / 1000):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks: collections.Counter = collections.Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({_short_path(code.co_filename)})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def result(self) -> Dict[str, Optional[bytes]]:
+        text = "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+        return {"text": text, "raw": None}
+
+
+class MemoryCollector:
+    def __init__(self, frames: int = PROFILING_TRACEMALLOC_FRAMES):
+        self.frames = frames
+        self.started = False
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def start(self) -> None:
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start(self.frames)
+        self.before = self._snapshot()
+
+    def stop(self) -> None:
+        self.after = self._snapshot()
+        if self.started:
+            tracemalloc.stop()
+
+    def result(self) -> Dict[str, Optional[bytes]]:
+        stats = self.after.compare_to(self.before, "lineno")
+        lines = [str(stat) for stat in stats[:50] if stat.size_diff]
+        return {"text": "\n".join(lines), "raw": None}
+
+
+_COLLECTORS = {
+    "cprofile": CProfileCollector,
+    "sample": SamplingCollector,
+    "memory": MemoryCollector,
+}
+
+
+def is_busy() -> bool:
+    """
+    Check whether a profile is running in this worker.
+    """
+    return _active
+
+
+@contextmanager
+def profiling(mode: str, label: str) -> Iterator[dict]:
+    """
+    Profile the event loop thread for the duration of the block.
+
+    The profile is stored when the block exits, and can then be read
+    with `get_profile`.
+
+    Parameters:
+    - `mode` (str): One of `cprofile`, `sample` or `memory`.
+    - `label` (str): Describes what was profiled, usually the route.
+
+    Returns:
+    - The profile metadata, its `id` is known as soon as the block starts.
+
+    Raises:
+    - `ProfilerBusy`: If another profile is running in this worker.
+
+    Example:
+    ```python
+    with profiling("sample", "GET /products/") as profile:
+        await call_next()
+    ```
+    """
+    global _active
+    if _active:
+        raise ProfilerBusy("Another profile is running")
+    _active = True
+    collector = _COLLECTORS[mode]()
+    profile = {
+        "id": uuid.uuid4().hex[:16],
+        "mode": mode,
+        "label": label,
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+    started = time.perf_counter()
+    try:
+        collector.start()
+    except Exception:
+        _active = False
+        raise
+    try:
+        yield profile
+    finally:
+        collector.stop()
+        _active = False
+        profile["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        profile.update(collector.result())
+        _profiles.append(profile)
+
+
+def list_profiles() -> List[dict]:
+    """
+    Get the metadata of the profiles kept by this worker, newest first.
+    """
+    return [
+        {key: value for key, value in profile.items() if key not in ("text", "raw")}
+        for profile in reversed(_profiles)
+    ]
+
+
+def get_profile(profile_id: str) -> Optional[dict]:
+    """
+    Get a profile kept by this worker.
+
+    Returns:
+    - The profile with its `text` report and, for `cprofile`, the `raw`
+    marshalled stats, or None if the profile is unknown.
+    """
+    for profile in _profiles:
+        if profile["id"] == profile_id:
+            return profile
+    return None
@@ -0,0 +1,98 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+
+from app.core.config import PROFILING_MAX_SECONDS
+
+from .middleware import check_token
+from .profilers import ProfilerBusy, get_profile, list_profiles, profiling
+
+
+async def require_profiling_token(x_profile: str = Header("")):
+    """
+    Allow the request only if the `X-Profile` header holds `PROFILING_TOKEN`.
+
+    Raises:
+    - HTTPException with a status code of 403 if the token is wrong.
+    """
+    if not check_token(x_profile):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+
+debug_router = APIRouter(
+    prefix="/debug",
+    tags=["Debug"],
+    dependencies=[Depends(require_profiling_token)],
+    include_in_schema=False
+)
+
+
+def _profile_response(profile: dict, raw: bool = False) -> Response:
+    headers = {"X-Profile-Id": profile["id"]}
+    if raw:
+        headers["Content-Disposition"] = f'attachment; filename="{profile["id"]}.prof"'
+        return Response(profile["raw"], media_type="application/octet-stream", headers=headers)
+    return Response(profile["text"], media_type="text/plain", headers=headers)
+
+
+@debug_router.get("/profiles")
+async def list_profiles_view():
+    """
+    List the profiles kept by this worker, newest first.
+
+    Returns:
+    - `List[dict]`: The profile IDs, modes, labels and durations.
+    """
+    return list_profiles()
+
+
+@debug_router.get("/profiles/{profile_id}")
+async def get_profile_view(profile_id: str, raw: bool = False):
+    """
+    Get a profile report.
+
+    Args:
+    - `profile_id` (str): The `X-Profile-Id` of the profiled response.
+    - `raw` (bool): Download the `cprofile` stats for `snakeviz` or
+    `pstats` instead of the text report.
+
+    Returns:
+    - The text report: collapsed stacks for `sample`, the top functions
+    by cumulative time for `cprofile`, the allocation diff for `memory`.
+
+    Raises:
+    - `HTTPException`: If the profile is unknown to this worker.
+    """
+    profile = get_profile(profile_id)
+    if profile is None or (raw and profile["raw"] is None):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return _profile_response(profile, raw)
+
+
+@debug_router.post("/profile")
+async def profile_window_view(
+        mode: str = Query("sample", pattern="^(cprofile|sample|memory)$"),
+        seconds: float = Query(10, gt=0, le=PROFILING_MAX_SECONDS)
+):
+    """
+    Profile everything this worker does during a time window.
+
+    Args:
+    - `mode` (str): `sample`, `cprofile` or `memory`.
+    - `seconds` (float): The length of the window.
+
+    Returns:
+    - The text report of the profile, see `get_profile_view`.
+
+    Raises:
+    - `HTTPException`: If another profile is running in this worker.
+    """
+    try:
+        with profiling(mode, f"window {seconds:g}s") as profile:
+            await asyncio.sleep(seconds)
+    except ProfilerBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another profile is running"
+        )
+    return _profile_response(profile)
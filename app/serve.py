@@ -0,0 +1,113 @@
+"""
+Production server entrypoint.
+
+Usage:
+```bash
+python -m app.serve --workers 4
+```
+"""
+import argparse
+import importlib.util
+import logging
+
+import uvicorn
+
+from app.core.config import (
+    SERVER_BACKLOG, SERVER_GRACEFUL_TIMEOUT, SERVER_HOST, SERVER_KEEPALIVE,
+    SERVER_PORT, SERVER_PRELOAD
+)
+from app.core.workers import default_workers
+
+logger = logging.getLogger(__name__)
+
+APP = "app.main:app"
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def serve_uvicorn(options: argparse.Namespace) -> None:
+    """
+    Run the application with uvicorn's process manager.
+
+    uvicorn drains in-flight requests for up to `graceful_timeout`
+    seconds on SIGTERM and then runs the shutdown handlers, which close
+    the Tortoise connection pools.
+    """
+    uvicorn.run(
+        APP,
+        host=options.host,
+        port=options.port,
+        workers=options.workers,
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        backlog=options.backlog,
+        timeout_keep_alive=options.keepalive,
+        timeout_graceful_shutdown=options.graceful_timeout,
+        proxy_headers=True,
+    )
+
+
+def serve_gunicorn(options: argparse.Namespace) -> None:
+    """
+    Run the application with gunicorn and uvicorn workers.
+
+    The application is imported once in the master process and
+    the workers are forked from it, sharing the imported code.
+    Connections are opened by each worker on startup.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{options.host}:{options.port}")
+            self.cfg.set("workers", options.workers)
+            self.cfg.set("worker_class", "uvicorn.workers.UvicornWorker")
+            self.cfg.set("backlog", options.backlog)
+            self.cfg.set("keepalive", options.keepalive)
+            self.cfg.set("graceful_timeout", options.graceful_timeout)
+            self.cfg.set("preload_app", True)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    Application().run()
+
+
+def parse_args(args=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the API server.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--keepalive", type=int, default=SERVER_KEEPALIVE)
+    parser.add_argument("--backlog", type=int, default=SERVER_BACKLOG)
+    parser.add_argument("--graceful-timeout", type=int, default=SERVER_GRACEFUL_TIMEOUT)
+    parser.add_argument(
+        "--preload", action=argparse.BooleanOptionalAction, default=SERVER_PRELOAD,
+        help="Import the application before forking workers (requires gunicorn)."
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None) -> None:
+    options = parse_args(args)
+    logging.basicConfig(level=logging.INFO)
+    if options.preload and not _installed("gunicorn"):
+        logger.warning("gunicorn is not installed, starting without preloading")
+        options.preload = False
+    logger.info(
+        "Starting %d worker(s), event loop: %s, HTTP parser: %s",
+        options.workers,
+        "uvloop" if _installed("uvloop") else "asyncio",
+        "httptools" if _installed("httptools") else "h11",
+    )
+    if options.preload:
+        serve_gunicorn(options)
+    else:
+        serve_uvicorn(options)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,28 @@
+import os
+
 import pytest
 from tortoise import Tortoise
 
-from app.core.config import MODELS, POSTGRES_PASSWORD, \
+from app.core import indexcheck
+from app.core.config import MODELS, DATABASE_ENGINE, POSTGRES_PASSWORD, \
     POSTGRES_HOST, POSTGRES_PORT
+from app.core.db import add_query_hook, instrument_connections, register_sqlite_decimals
+
+POSTGRES_TEST_DB_URL = f'postgres://postgres:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/testdb_test'
+
+# Report the queries run by the tests without a supporting index
+INDEX_CHECK = os.getenv("INDEX_CHECK") == "1"
+if INDEX_CHECK:
+    add_query_hook(indexcheck.record_query)
 
-TEST_DB_URL = f'postgres://postgres:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/testdb_test'
+
+def pytest_terminal_summary(terminalreporter):
+    if not INDEX_CHECK:
+        return
+    lines = indexcheck.report()
+    terminalreporter.section("queries without index")
+    for line in lines or ["none"]:
+        terminalreporter.write_line(line)
 
 
 @pytest.fixture
@@ -15,16 +33,35 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(scope="session")
+def test_db_url(tmp_path_factory):
+    if DATABASE_ENGINE != "sqlite":
+        yield POSTGRES_TEST_DB_URL
+        return
+    # A fresh database per session, so an interrupted run leaves nothing behind
+    path = tmp_path_factory.mktemp("db") / "testdb_test.sqlite3"
+    yield f"sqlite://{path}"
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(f"{path}{suffix}"):
+            os.remove(f"{path}{suffix}")
+
+
 @pytest.fixture
-def test_db(event_loop):
+def test_db(event_loop, test_db_url):
     async def init():
         await Tortoise.init(
-            db_url=TEST_DB_URL,
+            db_url=test_db_url,
             modules={'models': [*MODELS]}
         )
         await Tortoise.generate_schemas()
+        if DATABASE_ENGINE == "sqlite":
+            register_sqlite_decimals()
+        if INDEX_CHECK:
+            instrument_connections()
 
     async def fini():
+        if INDEX_CHECK:
+            await indexcheck.check_recorded()
         await Tortoise.close_connections()
 
     event_loop.run_until_complete(init())
@@ -0,0 +1,39 @@
+import asyncio
+
+from app.batch.schemas import BatchOperationSchema
+from app.batch.services import run_batch
+from app.users.services import authenticated_user
+
+
+def test_batch_runs_reads_concurrently_between_writes(event_loop):
+    events = []
+
+    async def app(scope, receive, send):
+        assert scope["limiter_exempt"]
+        message = await receive()
+        events.append(("start", scope["method"], scope["path"], authenticated_user.get()))
+        await asyncio.sleep(0.01)
+        events.append(("end", scope["method"], scope["path"]))
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        })
+        await send({"type": "http.response.body", "body": message["body"] or b"{}"})
+
+    operations = [
+        BatchOperationSchema(method="GET", path="/a"),
+        BatchOperationSchema(method="GET", path="/b?x=1"),
+        BatchOperationSchema(method="POST", path="/c", body={"n": 1}),
+        BatchOperationSchema(method="GET", path="/batch"),
+        BatchOperationSchema(method="GET", path="/d"),
+    ]
+    results = event_loop.run_until_complete(
+        run_batch(app, {}, operations, "user", [], concurrency=2)
+    )
+
+    assert [result["status"] for result in results] == [200, 200, 200, 400, 200]
+    assert results[2]["body"] == {"n": 1}
+    assert [event[:3] for event in events[:2]] == [("start", "GET", "/a"), ("start", "GET", "/b")]
+    assert events[4:6] == [("start", "POST", "/c", "user"), ("end", "POST", "/c")]
+    assert authenticated_user.get() is None
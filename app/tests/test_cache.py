@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from app.core.cache import LocalCache, get_cache
+from app.core.invalidation import InMemoryChannel, publish
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache("test_lru", maxsize=2)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+
+    assert cache.get(1) == "a"
+    assert cache.get(2) is None
+    assert cache.get(3) == "c"
+
+
+def test_local_cache_skips_stale_generation():
+    cache = LocalCache("test_generation")
+    generation = cache.generation
+    cache.invalidate([1])
+    cache.set(1, "stale", generation)
+
+    assert cache.get(1) is None
+
+
+@pytest.mark.asyncio
+async def test_publish_invalidates_local_cache():
+    cache = get_cache("test_publish")
+    cache.set(1, "a")
+    cache.set(2, "b")
+
+    await publish("test_publish", 1)
+
+    assert cache.get(1) is None
+    assert cache.get(2) == "b"
+
+
+@pytest.mark.asyncio
+async def test_in_memory_channel_reaches_other_workers():
+    cache = get_cache("test_channel")
+    cache.set(1, "a")
+    sender, receiver = InMemoryChannel(), InMemoryChannel()
+    await sender.start()
+    await receiver.start()
+
+    await sender.send(json.dumps(
+        {"origin": sender.id, "name": "test_channel", "keys": [1]}
+    ))
+    assert cache.get(1) is None
+
+    cache.set(1, "a")
+    receiver.receive(json.dumps(
+        {"origin": receiver.id, "name": "test_channel", "keys": [1]}
+    ))
+    assert cache.get(1) == "a"
+
+    await sender.stop()
+    await receiver.stop()
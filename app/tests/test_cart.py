@@ -0,0 +1,66 @@
+import datetime
+
+import pytest
+
+from app.cart.models import Cart
+from app.cart.services import create_cart, delete_cart
+from app.cart.schemas import CartCreateSchema
+from app.cart.sweeper import sweep_expired_carts
+from app.products.models import Product, ProductPopularity
+from app.users.models import User
+
+
+@pytest.mark.asyncio
+async def test_sweep_expired_carts(test_db):
+    user = await User.create(
+        full_name="sweeper",
+        email="sweeper@example.com",
+        phone="+79500660001",
+        password_hash="-"
+    )
+    products = [
+        await Product.create(name=f"sweep {i}", price=1, description="-")
+        for i in range(3)
+    ]
+    for product in products:
+        await create_cart(CartCreateSchema(product_id=product.id, quantity=2), user.id)
+    expired = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=2)
+    await Cart.filter(product_id__in=[products[0].id, products[1].id]).update(updated_at=expired)
+
+    removed = await sweep_expired_carts(ttl_days=1, batch_size=1, delay=0)
+
+    assert removed == 2
+    assert await Cart.filter(user_id=user.id).values_list("product_id", flat=True) == [products[2].id]
+    popularity = await ProductPopularity.get(product_id=products[0].id)
+    assert (popularity.cart_count, popularity.quantity) == (0, 0)
+    await user.delete()
+    await Product.filter(id__in=[product.id for product in products]).delete()
+
+
+@pytest.mark.asyncio
+async def test_trending_scores_do_not_overflow(test_db, monkeypatch):
+    user = await User.create(
+        full_name="trending",
+        email="trending@example.com",
+        phone="+79500660002",
+        password_hash="-"
+    )
+    old, new = [
+        await Product.create(name=f"trending {i}", price=1, description="-")
+        for i in range(2)
+    ]
+    # Thousands of half-lives after the epoch
+    now = datetime.datetime(2100, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+    monkeypatch.setattr("app.products.services.time.time", lambda: now)
+    await create_cart(CartCreateSchema(product_id=old.id, quantity=5), user.id)
+    monkeypatch.setattr("app.products.services.time.time", lambda: now + 7 * 86400)
+    await create_cart(CartCreateSchema(product_id=new.id, quantity=1), user.id)
+    await delete_cart(new.id, user.id)
+
+    scores = dict(await ProductPopularity.filter(
+        product_id__in=[old.id, new.id]
+    ).values_list("product_id", "trending"))
+    assert 0 < scores[old.id] < scores[new.id] < 1e6
+    assert (await ProductPopularity.get(product_id=new.id)).cart_count == 0
+    await user.delete()
+    await Product.filter(id__in=[old.id, new.id]).delete()
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from app.core.deadline import (
+    DeadlineExceeded, DeadlineMiddleware, current_deadline, enforce_deadline,
+    request_timeout
+)
+
+
+def test_request_timeout_header_only_shortens():
+    scope = {"method": "GET", "path": "/products/", "headers": [(b"x-request-timeout", b"0.5")]}
+    assert request_timeout(scope) == 0.5
+
+    scope["headers"] = [(b"x-request-timeout", b"3600")]
+    assert request_timeout(scope) < 3600
+
+    scope["path"] = "/debug/profiles"
+    assert request_timeout(scope) is None
+
+
+def test_query_cancelled_at_deadline(event_loop):
+    async def slow_query():
+        await asyncio.sleep(10)
+
+    async def run():
+        current_deadline.set(asyncio.get_running_loop().time() + 0.05)
+        with pytest.raises(DeadlineExceeded):
+            await enforce_deadline("SELECT 1", None, slow_query)
+        with pytest.raises(DeadlineExceeded):
+            await enforce_deadline("SELECT 1", None, slow_query)
+
+    event_loop.run_until_complete(run())
+
+
+def test_middleware_returns_504_past_deadline(event_loop):
+    async def slow_app(scope, receive, send):
+        await asyncio.sleep(10)
+
+    async def receive():
+        await asyncio.sleep(10)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/products/", "headers": [(b"x-request-timeout", b"0.05")]}
+    event_loop.run_until_complete(DeadlineMiddleware(slow_app)(scope, receive, send))
+    assert sent[0]["status"] == 504
+
+
+def test_middleware_cancels_handler_on_disconnect(event_loop):
+    cancelled = []
+
+    async def slow_app(scope, receive, send):
+        assert (await receive())["type"] == "http.request"
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}, {"type": "http.disconnect"}]
+
+    async def receive():
+        await asyncio.sleep(0.01)
+        return messages.pop(0)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/products/", "headers": []}
+    event_loop.run_until_complete(DeadlineMiddleware(slow_app)(scope, receive, send))
+    assert cancelled and not sent
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import hub as hub_module
+from app.core.hub import DROPPED, EventHub
+from app.events.services import event_stream, on_cart_change, on_product_change
+
+
+@pytest.mark.asyncio
+async def test_hub_drops_slow_subscribers_only():
+    hub = EventHub(queue_size=2, max_subscribers=2)
+    slow = hub.subscribe(["a"])
+    fast = hub.subscribe(["a", "b"])
+    assert hub.subscribe(["a"]) is None
+
+    hub.publish("a", 1)
+    assert await fast.get() == 1
+    hub.publish("a", 2)
+    assert await fast.get() == 2
+    hub.publish("a", 3)
+
+    assert slow.dropped
+    assert await slow.get() is DROPPED
+    assert hub.publish("b", 4) == 1
+    assert [await fast.get(), await fast.get()] == [3, 4]
+    assert len(hub) == 1
+    assert await fast.get(timeout=0.01) is None
+
+
+@pytest.mark.asyncio
+async def test_event_stream_renders_changes(monkeypatch):
+    hub = EventHub(queue_size=4)
+    monkeypatch.setattr("app.events.services.hub", hub)
+    stream = event_stream(1, [7], "token")
+    # A stream that never starts holds no subscription
+    assert len(hub) == 0
+    assert await stream.__anext__() == ": connected\n\n"
+
+    on_product_change([[7, True, "9.90", "2026-01-01T00:00:00+00:00"], [8, True, "1.00", "2026-01-01T00:00:00+00:00"]])
+    on_cart_change([[1, 7, 2], [2, 7, 1]])
+    on_product_change([[7]])
+
+    assert await stream.__anext__() == 'event: product\ndata: {"id": 7, "is_active": true, "price": "9.90"}\n\n'
+    assert await stream.__anext__() == 'event: cart\ndata: {"product_id": 7, "quantity": 2}\n\n'
+    assert await stream.__anext__() == 'event: product\ndata: {"id": 7, "deleted": true}\n\n'
+
+    for _ in range(5):
+        on_cart_change([[1, 7, 3]])
+    assert await stream.__anext__() == "event: dropped\ndata: {}\n\n"
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
+    assert len(hub) == 0
+    assert hub_module.stats["dropped"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_busy_stream_ends_when_the_token_expires(monkeypatch):
+    hub = EventHub(queue_size=100)
+    monkeypatch.setattr("app.events.services.hub", hub)
+
+    async def verify_token(token):
+        raise HTTPException(status_code=401)
+
+    monkeypatch.setattr("app.events.services.verify_token", verify_token)
+    stream = event_stream(1, [], "token", keepalive=0.05)
+    assert await stream.__anext__() == ": connected\n\n"
+
+    rendered = []
+    for _ in range(20):
+        on_cart_change([[1, 7, 1]])
+        rendered.append(await stream.__anext__())
+        if rendered[-1].startswith("event: expired"):
+            break
+        await asyncio.sleep(0.01)
+
+    assert rendered[-1] == "event: expired\ndata: {}\n\n"
+    assert all(event.startswith("event: cart") for event in rendered[:-1])
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
+    assert len(hub) == 0
@@ -0,0 +1,28 @@
+from app.users import hashing
+from app.users.hashing import (
+    calibrate_bcrypt_rounds, hash_password, pwd_context, verify_password
+)
+
+
+def test_outdated_hash_is_replaced_on_verify():
+    old_hash = pwd_context.handler("bcrypt").using(rounds=4).hash("Password123!")
+
+    valid, new_hash = verify_password("Password123!", old_hash)
+
+    assert valid
+    assert new_hash is not None
+    assert not pwd_context.needs_update(new_hash)
+
+
+def test_current_hash_is_kept_on_verify():
+    password_hash = hash_password("Password123!")
+
+    assert verify_password("Password123!", password_hash) == (True, None)
+    assert verify_password("wrong", password_hash) == (False, None)
+
+
+def test_bcrypt_calibration_is_bounded(monkeypatch):
+    monkeypatch.setattr(hashing, "_hash_time", lambda handler, **settings: 50.0)
+    assert calibrate_bcrypt_rounds(target_ms=200) == 12
+    assert calibrate_bcrypt_rounds(target_ms=1) == hashing.BCRYPT_MIN_ROUNDS
+    assert calibrate_bcrypt_rounds(target_ms=10 ** 6) == hashing.BCRYPT_MAX_ROUNDS
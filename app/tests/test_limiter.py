@@ -0,0 +1,29 @@
+from app.core.limiter import AdaptiveLimiter
+
+
+def test_limiter_rejects_over_limit_and_reserves_share():
+    limiter = AdaptiveLimiter(initial_limit=4, min_limit=1, max_limit=10, target=0.1)
+
+    assert limiter.try_acquire(share=0.5)
+    assert limiter.try_acquire(share=0.5)
+    assert not limiter.try_acquire(share=0.5)
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert limiter.rejected == 2
+
+
+def test_limiter_decreases_once_per_interval_and_recovers():
+    limiter = AdaptiveLimiter(initial_limit=10, min_limit=2, max_limit=20, target=0.1, backoff=0.5)
+    for _ in range(10):
+        limiter.try_acquire()
+
+    limiter.release(1.0, now=100.0)
+    limiter.release(1.0, now=100.05)
+    assert limiter.limit == 5
+
+    limiter.release(1.0, now=100.2)
+    assert limiter.limit == 2.5
+
+    limiter.release(0.01, now=101.0)
+    assert limiter.limit == 2.9
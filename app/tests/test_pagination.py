@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter
+from app.products.models import Product
+from app.products.services import get_products
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("price", "10.50", 42)
+
+    assert decode_cursor(cursor) == ["price", "10.50", 42]
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor")
+
+    assert exc_info.value.status_code == 422
+
+
+def test_keyset_filter_breaks_ties_by_id():
+    condition = keyset_filter("price", 10, 42, descending=True)
+
+    assert condition.join_type == "OR"
+    assert condition.children[0].filters == {"price__lt": 10}
+    assert condition.children[1].filters == {"price": 10, "id__lt": 42}
+
+
+@pytest.mark.asyncio
+async def test_keyset_filter_is_a_row_comparison_on_postgres(test_db):
+    condition = keyset_filter("price", Decimal("10.50"), 42, descending=True)
+    sql = Product.filter(condition).sql()
+
+    if Product._meta.db.capabilities.dialect == "postgres":
+        assert '("price","id")<(10.50,42)' in sql
+    else:
+        assert '"id"<42' in sql
+
+    products = [
+        await Product.create(name=f"keyset {i}", price=price, description="-")
+        for i, price in enumerate(("11.00", "10.50", "10.50", "10.50", "9.99"))
+    ]
+    ids = [product.id for product in products]
+    condition = keyset_filter("price", Decimal("10.50"), ids[2], descending=True)
+    found = await Product.filter(condition, id__in=ids).order_by("-price", "-id").values_list("id", flat=True)
+
+    assert found == [ids[1], ids[4]]
+    await Product.filter(id__in=ids).delete()
+
+
+@pytest.mark.asyncio
+async def test_cursor_cannot_be_combined_with_skip():
+    with pytest.raises(HTTPException) as exc_info:
+        await get_products(skip=10, cursor=encode_cursor("id", 42))
+
+    assert exc_info.value.status_code == 400
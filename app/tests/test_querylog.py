@@ -0,0 +1,43 @@
+import pytest
+from tortoise.transactions import in_transaction
+
+from app.categories.models import Category
+from app.core.db import instrument_connections
+from app.core.querylog import _can_analyze, normalize_query
+
+
+def test_normalize_query_masks_literals():
+    assert normalize_query("SELECT \"id\" FROM \"product\" WHERE \"name\"='it''s' LIMIT 10") == (
+        "SELECT \"id\" FROM \"product\" WHERE \"name\"=? LIMIT ?"
+    )
+
+
+def test_only_read_only_selects_are_analyzed():
+    assert _can_analyze('SELECT COUNT(*) FROM "product" WHERE "id" IN (1,2) AND LOWER("name")=\'pg_notify(\'')
+    assert not _can_analyze("SELECT pg_notify($1, $2)")
+    assert not _can_analyze("SELECT setval('product_id_seq', 1)")
+    assert not _can_analyze('SELECT "id" FROM "cart" WHERE "user_id"=1 FOR UPDATE SKIP LOCKED')
+    assert not _can_analyze('SELECT "id" FROM "product" FOR NO KEY UPDATE')
+    assert not _can_analyze('UPDATE "product" SET "price"=1')
+
+
+@pytest.mark.asyncio
+async def test_queries_in_transactions_pass_through_the_hooks(test_db, monkeypatch):
+    seen = []
+
+    async def hook(query, values, call_next):
+        seen.append(query)
+        return await call_next()
+
+    monkeypatch.setattr("app.core.db._hooks", [hook])
+    instrument_connections()
+    # Rolled back, the database is shared with the other tests
+    with pytest.raises(RuntimeError):
+        async with in_transaction():
+            await Category.create(name="outer")
+            async with in_transaction():
+                await Category.create(name="inner")
+            raise RuntimeError
+
+    inserts = [query for query in seen if query.startswith('INSERT INTO "category"')]
+    assert len(inserts) == 2
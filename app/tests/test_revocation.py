@@ -0,0 +1,53 @@
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+
+from app.main import app
+from app.users import revocation
+from app.users.auth import generate_tokens, verify_token
+from app.users.hashing import hash_password
+from app.users.models import User
+from app.users.revocation import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    for index in range(1000):
+        bloom.add(f"revoked-{index}")
+
+    assert all(f"revoked-{index}" in bloom for index in range(1000))
+    false_positives = sum(f"valid-{index}" in bloom for index in range(10000))
+    assert false_positives < 300
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_only_its_token(test_db):
+    await User.get_or_create(
+        email="revocation@example.com",
+        defaults={
+            "full_name": "revocation",
+            "phone": "+79500667777",
+            "password_hash": hash_password("Test1234!"),
+        }
+    )
+    first = (await generate_tokens("revocation@example.com", "Test1234!"))["access_token"]
+    second = (await generate_tokens("revocation@example.com", "Test1234!"))["access_token"]
+    await revocation.rebuild_filter()
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/users/logout", headers={"Authorization": f"Bearer {first}"})
+        assert response.status_code == 200
+        response = await client.post("/users/logout", headers={"Authorization": f"Bearer {first}"})
+        assert response.status_code == 401
+
+    with pytest.raises(HTTPException):
+        await verify_token(first)
+    lookups = revocation.stats["lookups"]
+    assert (await verify_token(second)).email == "revocation@example.com"
+    assert revocation.stats["lookups"] == lookups
+
+    # Revocations missed by this worker are read from the database
+    revocation.on_revocation(None)
+    with pytest.raises(HTTPException):
+        await verify_token(first)
+    await revocation.stop_revocation()
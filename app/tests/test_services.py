@@ -1,9 +1,15 @@
+from datetime import datetime, timezone
+
 import pytest
 from httpx import AsyncClient
 
 from app.main import app
 from app.products.models import Product
+from app.products.schemas import ProductBulkUpdateSchema
+from app.products.services import bulk_update_products
+from app.users.hashing import shutdown_hash_pool
 from app.users.models import User
+from app.users.services import bulk_register_users
 
 
 @pytest.mark.asyncio
@@ -177,3 +183,59 @@ async def test_delete_product(test_db):
         assert response.json()["detail"] == "Product not found"
         await User.filter(email="test@example.com").delete()
         await Product.all().delete()
+
+
+@pytest.mark.asyncio
+async def test_bulk_register_users(test_db):
+    rows = [
+        {
+            "full_name": "bulk",
+            "email": f"bulk{i}@example.com",
+            "phone": f"+7950066000{i}",
+            "password": "Test1234!",
+            "confirm_password": "Test1234!"
+        }
+        for i in range(2)
+    ]
+    rows.append(dict(rows[0], phone="+79500669999"))
+    rows.append(dict(rows[1], email="invalid"))
+
+    results = await bulk_register_users(rows)
+    shutdown_hash_pool()
+
+    assert [bool(result["id"]) for result in results] == [True, True, False, False]
+    assert results[2]["errors"] == ["email: Duplicate email in the batch"]
+    assert results[3]["errors"][0].startswith("email:")
+    assert await User.filter(email__startswith="bulk").count() == 2
+    await User.filter(email__startswith="bulk").delete()
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_products(test_db):
+    started = datetime.now(timezone.utc)
+    products = [
+        await Product.create(name=f"bulk{i}", price=price, description="d")
+        for i, price in enumerate(["1.00", "2.00", "9.99"])
+    ]
+    ids = [product.id for product in products]
+
+    updated = await bulk_update_products(
+        ProductBulkUpdateSchema(
+            ids=ids,
+            price={"mode": "percent", "value": 15, "round_to": "0.5"}
+        ),
+        chunk_size=2
+    )
+    assert updated == 3
+    prices = await Product.filter(id__in=ids).order_by("id").values_list("price", flat=True)
+    assert [float(price) for price in prices] == [1.0, 2.5, 11.5]
+
+    updated = await bulk_update_products(
+        ProductBulkUpdateSchema(
+            filters={"price_min": 2, "created_after": started},
+            is_active=False
+        )
+    )
+    assert updated == 2
+    assert await Product.filter(id__in=ids, is_active=True).count() == 1
+    await Product.filter(id__in=ids).delete()
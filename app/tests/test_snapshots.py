@@ -0,0 +1,26 @@
+from decimal import Decimal
+
+from app.products import snapshots
+from app.products.schemas import ProductSort
+from app.products.snapshots import CatalogSnapshot, on_catalog_change
+
+
+def test_catalog_change_drops_only_affected_snapshots(monkeypatch):
+    monkeypatch.setattr(snapshots, "_schedule", lambda key: None)
+    monkeypatch.setattr(snapshots, "_building", {})
+    monkeypatch.setattr(snapshots, "_snapshots", {
+        (ProductSort.id, 10): CatalogSnapshot([], {1, 2, 3}, (3,)),
+        (ProductSort.price, 10): CatalogSnapshot([], {1, 2, 3}, (Decimal("5.00"), 3)),
+        (ProductSort.price_desc, 10): CatalogSnapshot([], {1, 2, 3}, (Decimal("5.00"), 2)),
+    })
+
+    # A new cheap product only enters the cheapest first pages
+    on_catalog_change([[7, True, "1.00", "2026-01-01T00:00:00+00:00"]])
+    assert set(snapshots._snapshots) == {(ProductSort.id, 10), (ProductSort.price_desc, 10)}
+
+    # An inactive product outside the pages changes nothing
+    on_catalog_change([[8, False, "9.00", "2026-01-01T00:00:00+00:00"]])
+    assert len(snapshots._snapshots) == 2
+
+    on_catalog_change([[2]])
+    assert not snapshots._snapshots
@@ -0,0 +1,60 @@
+import pytest
+
+from app.products import view_counter
+from app.products.models import Product, ProductPopularity
+from app.products.schemas import PopularSort
+from app.products.services import get_popular_products
+
+
+@pytest.mark.asyncio
+async def test_views_are_flushed_in_one_upsert(test_db, monkeypatch):
+    monkeypatch.setattr(view_counter, "_counts", {})
+    viewed = await Product.create(name="viewed", description="-", price=10)
+    other = await Product.create(name="other", description="-", price=20)
+    await ProductPopularity.create(product=other, cart_count=1, views=5)
+
+    for _ in range(3):
+        view_counter.record_view(viewed.id)
+    view_counter.record_view(other.id)
+    # Deleted before the flush
+    view_counter.record_view(other.id + 1000)
+
+    assert await view_counter.flush_views() == 3
+    views = dict(await ProductPopularity.all().values_list("product_id", "views"))
+    assert views == {viewed.id: 3, other.id: 6}
+    assert await view_counter.flush_views() == 0
+
+    products = await get_popular_products(PopularSort.views, 10)
+    assert [product["id"] for product in products] == [other.id, viewed.id]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_views(test_db, monkeypatch):
+    monkeypatch.setattr(view_counter, "_counts", {})
+    product = await Product.create(name="kept", description="-", price=10)
+    view_counter.record_view(product.id)
+
+    async def fail(counts):
+        raise ConnectionError
+
+    upsert = view_counter._upsert
+    monkeypatch.setattr(view_counter, "_upsert", fail)
+    with pytest.raises(ConnectionError):
+        await view_counter.flush_views()
+    view_counter.record_view(product.id)
+    monkeypatch.setattr(view_counter, "_upsert", upsert)
+
+    await view_counter.flush_views()
+    assert await ProductPopularity.get(product=product).values_list("views", flat=True) == 2
+
+
+def test_view_counter_is_bounded(monkeypatch):
+    monkeypatch.setattr(view_counter, "VIEW_COUNTER_MAX_PRODUCTS", 2)
+    monkeypatch.setattr(view_counter, "_counts", {})
+    dropped = view_counter.stats["dropped"]
+
+    for product_id in (1, 2, 3, 1):
+        view_counter.record_view(product_id)
+
+    assert view_counter._counts == {1: 2, 2: 1}
+    assert view_counter.stats["dropped"] == dropped + 1
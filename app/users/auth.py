@@ -1,11 +1,17 @@
 import calendar
 import datetime
+import uuid
 
 from fastapi.security import OAuth2PasswordBearer
 
+from app.core.cache import get_cache
+from app.core.fastpath import fetch_user_by_email
+from app.core.invalidation import publish
+from app.users.hashing import hash_password, verify_password
 from app.users.models import User
-from passlib.hash import bcrypt
+from app.users.revocation import is_revoked, revoke_token
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
 
 from jose import JWTError, jwt
 from app.core.config import JWT_SECRET, JWT_ALGORITHM
@@ -14,6 +20,8 @@ from app.users.schemas import UserOut
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login/")
 
+user_cache = get_cache("user")
+
 
 async def authenticate_user(email_or_phone: str, password: str):
     """
@@ -24,7 +32,8 @@ async def authenticate_user(email_or_phone: str, password: str):
     - `password`: The password provided by the user.
 
     Returns:
-    - The authenticated user.
+    - The authenticated user. If the stored hash does not follow the current
+    hashing policy, it is replaced with a new one.
 
     Raises:
     - HTTPException with a status code of 401 if the credentials are invalid.
@@ -42,8 +51,16 @@ async def authenticate_user(email_or_phone: str, password: str):
     else:
         user = await User.get(phone=email_or_phone)
 
-    if user and user.verify_password(password):
-        return user
+    if user:
+        valid, new_hash = await run_in_threadpool(
+            verify_password, password, user.password_hash
+        )
+        if valid:
+            if new_hash is not None:
+                user.password_hash = new_hash
+                await user.save(update_fields=["password_hash"])
+                await publish(user_cache.name, user.email)
+            return user
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
 
@@ -67,7 +84,7 @@ def compare_passwords(db_pass_hash, received_pass):
     ```
 
     """
-    received_pass_hash = bcrypt.hash(received_pass)
+    received_pass_hash = hash_password(received_pass)
     return received_pass_hash == db_pass_hash
 
 
@@ -93,6 +110,7 @@ async def generate_tokens(email_or_phone, password):
     data = {
         "phone": user.phone,
         "email": user.email,
+        "jti": uuid.uuid4().hex,
     }
 
     min30 = datetime.datetime.utcnow() + datetime.timedelta(minutes=60)
@@ -110,7 +128,8 @@ async def verify_token(token):
     - `token`: The JWT token to be verified.
 
     Returns:
-    - The user details if the token is valid.
+    - The user details if the token is valid and not revoked. Details are
+    cached by email and invalidated through the `user` invalidation topic.
 
     Raises:
     - HTTPException with a status code of 401 if the token is invalid.
@@ -130,12 +149,52 @@ async def verify_token(token):
         email: str = payload.get("email")
         if email is None:
             raise credentials_exception
-        user = await User.filter(email=email).first()
+        # Tokens issued before revocation was introduced carry no ID
+        jti = payload.get("jti")
+        if jti is not None and await is_revoked(jti):
+            raise credentials_exception
+        user_out = user_cache.get(email)
+        if user_out is not None:
+            return user_out
+        generation = user_cache.generation
+        user = await fetch_user_by_email(email)
         if user is None:
             raise credentials_exception
-        return await UserOut.from_tortoise_orm(user)
+        user_out = UserOut(**user)
+        user_cache.set(email, user_out, generation)
+        return user_out
+    except JWTError as e:
+        raise HTTPException(
+            status_code=401,
+            detail="Could not decode token"
+        ) from e
+
+
+async def revoke_access_token(token):
+    """
+    Revoke a JWT token until it expires.
+
+    Parameters:
+    - `token`: The JWT token to be revoked.
+
+    Raises:
+    - HTTPException with a status code of 401 if the token is invalid or
+    has no ID.
+
+    Example:
+    ```python
+    await revoke_access_token("eyJhbGciOi...")
+    ```
+
+    """
+    try:
+        payload = jwt.decode(token, JWT_SECRET, [JWT_ALGORITHM])
     except JWTError as e:
         raise HTTPException(
             status_code=401,
             detail="Could not decode token"
         ) from e
+    if payload.get("jti") is None or payload.get("exp") is None:
+        raise HTTPException(status_code=401, detail="Token cannot be revoked")
+    expires_at = datetime.datetime.fromtimestamp(payload["exp"], datetime.timezone.utc)
+    await revoke_token(payload["jti"], expires_at)
@@ -0,0 +1,76 @@
+"""
+Bulk user provisioning from a file.
+
+Reads `UserCreate` rows from a CSV file with a header line or from a
+JSON lines file, registers them with `bulk_register_users` and writes
+one JSON result per row to stdout:
+```bash
+python -m app.users.bulk users.csv > results.jsonl
+```
+"""
+import argparse
+import asyncio
+import csv
+import json
+import sys
+from typing import Dict, Iterator
+
+from tortoise import Tortoise
+
+from app.core.config import DATABASE_URL, MODELS, USER_BULK_MAX_ROWS
+from app.users.hashing import shutdown_hash_pool
+from app.users.services import bulk_register_users
+
+
+def read_rows(path: str) -> Iterator[Dict]:
+    """
+    Read user rows from a CSV or JSON lines file.
+
+    Parameters:
+    - `path` (str): The file path, `.jsonl` files are read as JSON lines.
+
+    Returns:
+    - An iterator over the rows.
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.endswith(".jsonl"):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(file)
+
+
+async def run(path: str, batch_size: int) -> int:
+    await Tortoise.init(db_url=DATABASE_URL, modules={"models": [*MODELS]})
+    created = failed = offset = 0
+    try:
+        rows = read_rows(path)
+        while True:
+            batch = [row for _, row in zip(range(batch_size), rows)]
+            if not batch:
+                break
+            for result in await bulk_register_users(batch):
+                result["index"] += offset
+                failed += bool(result["errors"])
+                created += not result["errors"]
+                print(json.dumps(result, ensure_ascii=False))
+            offset += len(batch)
+    finally:
+        shutdown_hash_pool()
+        await Tortoise.close_connections()
+    print(f"created: {created}, failed: {failed}", file=sys.stderr)
+    return failed
+
+
+def main(args=None) -> None:
+    parser = argparse.ArgumentParser(description="Register users from a file.")
+    parser.add_argument("path", help="CSV with a header line or .jsonl file")
+    parser.add_argument("--batch-size", type=int, default=USER_BULK_MAX_ROWS)
+    options = parser.parse_args(args)
+    failed = asyncio.run(run(options.path, options.batch_size))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
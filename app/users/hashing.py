@@ -0,0 +1,231 @@
+"""
+Password hashing policy.
+
+Hashes are stored in modular crypt format (`$2b$12$...`, `$argon2id$...`),
+so every hash records its scheme and cost. argon2 is memory-hard and
+needs the optional `argon2-cffi` package. Hashes made with another scheme
+or a lower cost than the current policy are reported as outdated by
+`verify_password` and replaced on the next successful login.
+
+Print a cost calibrated for this machine:
+```bash
+python -m app.users.hashing --target-ms 250
+```
+"""
+import argparse
+import asyncio
+import logging
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import (
+    PASSWORD_ARGON2_MEMORY_COST, PASSWORD_ARGON2_TIME_COST,
+    PASSWORD_BCRYPT_ROUNDS, PASSWORD_HASH_TARGET_MS, PASSWORD_SCHEME,
+    USER_BULK_HASH_WORKERS
+)
+from app.core.workers import cpu_count, default_workers
+
+logger = logging.getLogger(__name__)
+
+SCHEMES = ("bcrypt", "argon2")
+
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+ARGON2_MAX_TIME_COST = 20
+
+if PASSWORD_SCHEME not in SCHEMES:
+    raise RuntimeError(f"PASSWORD_SCHEME must be one of {SCHEMES}")
+
+pwd_context = CryptContext(
+    schemes=list(SCHEMES),
+    default=PASSWORD_SCHEME,
+    deprecated="auto",
+    bcrypt__default_rounds=PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=PASSWORD_BCRYPT_ROUNDS,
+    argon2__time_cost=PASSWORD_ARGON2_TIME_COST,
+    argon2__memory_cost=PASSWORD_ARGON2_MEMORY_COST,
+)
+
+# argon2 needs the optional argon2-cffi package.
+if PASSWORD_SCHEME == "argon2" and not pwd_context.handler("argon2").has_backend():
+    raise RuntimeError("PASSWORD_SCHEME=argon2 requires the argon2-cffi package")
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password with the current policy.
+
+    Parameters:
+    - `password` (str): The plain text password.
+
+    Returns:
+    - The hash in modular crypt format.
+    """
+    return pwd_context.hash(password)
+
+
+def verify_password(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and check whether its hash follows the current policy.
+
+    Parameters:
+    - `password` (str): The plain text password.
+    - `password_hash` (str): The stored hash.
+
+    Returns:
+    - A tuple of the verification result and a new hash to store,
+    which is None unless the password matches and the hash is outdated.
+    """
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+def _hash_many(policy: str, passwords: List[str]) -> List[str]:
+    context = CryptContext.from_string(policy)
+    return [context.hash(password) for password in passwords]
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> Tuple[ProcessPoolExecutor, int]:
+    global _executor
+    # Every server worker has its own pool, so they share the CPUs
+    workers = USER_BULK_HASH_WORKERS or max(1, cpu_count() // default_workers())
+    if _executor is None:
+        # Forking a process running an event loop and database threads
+        # is unsafe, so the workers are spawned.
+        _executor = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor, workers
+
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords in parallel across a process pool.
+
+    The pool is started on first use with `USER_BULK_HASH_WORKERS`
+    processes, by default the CPUs divided among the server workers.
+    They receive the current policy with every call so a calibrated
+    cost is honoured.
+
+    Parameters:
+    - `passwords` (List[str]): The plain text passwords.
+
+    Returns:
+    - The hashes, in the order of `passwords`.
+    """
+    if not passwords:
+        return []
+    executor, workers = _get_executor()
+    policy = pwd_context.to_string()
+    size = math.ceil(len(passwords) / workers)
+    loop = asyncio.get_running_loop()
+    chunks = await asyncio.gather(*(
+        loop.run_in_executor(executor, _hash_many, policy, passwords[i:i + size])
+        for i in range(0, len(passwords), size)
+    ))
+    return [password_hash for chunk in chunks for password_hash in chunk]
+
+
+def shutdown_hash_pool() -> None:
+    """
+    Stop the worker processes of `hash_passwords`.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+def _hash_time(handler, **settings) -> float:
+    started = time.perf_counter()
+    handler.using(**settings).hash("calibration")
+    return (time.perf_counter() - started) * 1000
+
+
+def calibrate_bcrypt_rounds(target_ms: float = PASSWORD_HASH_TARGET_MS) -> int:
+    """
+    Find the highest bcrypt cost whose hashing time stays under the target.
+
+    Each extra round doubles the hashing time, so the cost is
+    extrapolated from a single measurement at the minimum cost.
+
+    Parameters:
+    - `target_ms` (float): The target hashing time in milliseconds.
+
+    Returns:
+    - The number of rounds, between 10 and 16.
+    """
+    handler = pwd_context.handler("bcrypt")
+    elapsed = _hash_time(handler, rounds=BCRYPT_MIN_ROUNDS)
+    extra = math.floor(math.log2(max(target_ms, elapsed) / elapsed))
+    return min(BCRYPT_MIN_ROUNDS + extra, BCRYPT_MAX_ROUNDS)
+
+
+def calibrate_argon2_time_cost(
+        target_ms: float = PASSWORD_HASH_TARGET_MS,
+        memory_cost: int = PASSWORD_ARGON2_MEMORY_COST
+) -> int:
+    """
+    Find the highest argon2 time cost whose hashing time stays under the target.
+
+    The hashing time grows linearly with the time cost.
+
+    Parameters:
+    - `target_ms` (float): The target hashing time in milliseconds.
+    - `memory_cost` (int): The memory cost in KiB.
+
+    Returns:
+    - The time cost, between 1 and 20.
+    """
+    handler = pwd_context.handler("argon2")
+    elapsed = _hash_time(handler, time_cost=1, memory_cost=memory_cost)
+    return max(1, min(int(target_ms // elapsed), ARGON2_MAX_TIME_COST))
+
+
+def calibrate(target_ms: float = PASSWORD_HASH_TARGET_MS) -> dict:
+    """
+    Calibrate the cost of the default scheme and apply it to the policy.
+
+    Parameters:
+    - `target_ms` (float): The target hashing time in milliseconds.
+
+    Returns:
+    - The applied settings.
+    """
+    if pwd_context.default_scheme() == "argon2":
+        time_cost = calibrate_argon2_time_cost(target_ms)
+        settings = {"argon2__time_cost": time_cost}
+    else:
+        rounds = calibrate_bcrypt_rounds(target_ms)
+        settings = {
+            "bcrypt__default_rounds": rounds,
+            "bcrypt__min_rounds": rounds,
+        }
+    pwd_context.update(**settings)
+    logger.info("Password hashing calibrated: %s", settings)
+    return settings
+
+
+def main(args=None) -> None:
+    parser = argparse.ArgumentParser(description="Calibrate password hashing.")
+    parser.add_argument("--target-ms", type=float, default=PASSWORD_HASH_TARGET_MS)
+    parser.add_argument("--scheme", choices=SCHEMES, default=PASSWORD_SCHEME)
+    options = parser.parse_args(args)
+
+    if options.scheme == "argon2":
+        time_cost = calibrate_argon2_time_cost(options.target_ms)
+        print(f"PASSWORD_ARGON2_TIME_COST={time_cost}")
+    else:
+        rounds = calibrate_bcrypt_rounds(options.target_ms)
+        print(f"PASSWORD_BCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from tortoise.models import Model
 from tortoise import fields
-from passlib.hash import bcrypt
+
+from app.users.hashing import hash_password, pwd_context
 
 
 class User(Model):
@@ -18,7 +19,8 @@ class User(Model):
         - `verify_password(password: str) -> bool`:
         Verify if the provided password matches the stored hashed password.
         - `set_password(password: str) -> None`:
-         Set the user's password by hashing the provided password.
+         Set the user's password by hashing the provided password
+        with the current hashing policy.
         - `__str__() -> str`:
         Return a string representation of the user (returns the full name).
         """
@@ -36,16 +38,17 @@ class User(Model):
         Returns:
         - True if the passwords match, False otherwise.
         """
-        return bcrypt.verify(password, self.password_hash)
+        return pwd_context.verify(password, self.password_hash)
 
     def set_password(self, password):
         """
-        Set the user's password by hashing the provided password.
+        Set the user's password by hashing the provided password
+        with the current hashing policy.
 
         Parameters:
         - `password` (str): The password to be hashed.
         """
-        self.password_hash = bcrypt.hash(password)
+        self.password_hash = hash_password(password)
 
     def __str__(self):
         """
@@ -55,3 +58,18 @@ class User(Model):
         - The full name of the user as a string.
         """
         return self.full_name
+
+
+class RevokedToken(Model):
+    """
+    Represents a revoked access token.
+
+    Attributes:
+    - `id` (int): The unique identifier for the revocation.
+    - `jti` (str): The ID of the token (must be unique).
+    - `expires_at` (Datetime): The expiry of the token, the revocation is
+    deleted after it.
+    """
+    id = fields.IntField(pk=True)
+    jti = fields.CharField(max_length=64, unique=True)
+    expires_at = fields.DatetimeField(index=True)
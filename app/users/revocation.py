@@ -0,0 +1,208 @@
+"""
+Revocation of access tokens.
+
+Every token carries a random `jti` claim. Revoked IDs are stored in the
+`revokedtoken` table until the token expires, and every worker keeps them
+in a Bloom filter, so checking a token that was not revoked costs no
+query. Only IDs found in the filter, revoked or false positives at the
+rate `REVOCATION_FILTER_ERROR_RATE`, are confirmed in the database.
+
+Revocations are published on the `revoked_token` topic and added to the
+filter of every worker. Entries cannot be removed from a Bloom filter:
+every `REVOCATION_REFRESH_INTERVAL` seconds expired rows are deleted and
+the filter rebuilt from the table. It is also rebuilt when invalidation
+events may have been lost. Until the first build the database is queried
+for every token.
+"""
+import asyncio
+import datetime
+import hashlib
+import logging
+import math
+from typing import Hashable, List, Optional
+
+from tortoise.exceptions import IntegrityError
+
+from app.core.config import (
+    REVOCATION_FILTER_CAPACITY, REVOCATION_FILTER_ERROR_RATE,
+    REVOCATION_REFRESH_INTERVAL
+)
+from app.core.invalidation import publish, subscribe
+from app.users.models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_TOPIC = "revoked_token"
+
+
+class BloomFilter:
+    """
+    Set membership test with false positives and no false negatives.
+
+    Attributes:
+    - `size` (int): The number of bits.
+    - `hashes` (int): The number of bits set per item.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+# Counters of this worker
+stats = {"checks": 0, "lookups": 0, "rebuilds": 0}
+
+_filter: Optional[BloomFilter] = None
+# Filter being rebuilt, receiving the revocations published meanwhile
+_next: Optional[BloomFilter] = None
+_rebuild: Optional[asyncio.Task] = None
+# Bumped when revocations may have been missed, a rebuild started before
+# is not installed
+_generation = 0
+_refresher: Optional[asyncio.Task] = None
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+async def rebuild_filter() -> None:
+    """
+    Delete the expired revocations and load the others in a new filter.
+    """
+    global _filter, _next
+    generation = _generation
+    await RevokedToken.filter(expires_at__lte=_now()).delete()
+    count = await RevokedToken.all().count()
+    _next = BloomFilter(max(REVOCATION_FILTER_CAPACITY, count * 2), REVOCATION_FILTER_ERROR_RATE)
+    try:
+        for jti in await RevokedToken.all().values_list("jti", flat=True):
+            _next.add(jti)
+        if generation == _generation:
+            _filter = _next
+            stats["rebuilds"] += 1
+    finally:
+        _next = None
+
+
+def _schedule_rebuild() -> None:
+    global _rebuild
+    if _rebuild is not None and not _rebuild.done():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _rebuild = loop.create_task(rebuild_filter())
+
+    def done(task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.error("Revocation filter rebuild failed", exc_info=task.exception())
+        elif _filter is None:
+            _schedule_rebuild()
+
+    _rebuild.add_done_callback(done)
+
+
+def on_revocation(keys: Optional[List[Hashable]]) -> None:
+    """
+    Add published revocations to the filter of this worker.
+
+    Parameters:
+    - `keys`: The revoked token IDs, or None when revocations may have
+    been missed and the filter must be rebuilt.
+    """
+    global _filter, _generation
+    if keys is None:
+        # Unknown revocations: check every token in the database until
+        # the filter is rebuilt.
+        _generation += 1
+        _filter = None
+        _schedule_rebuild()
+        return
+    for current in (_filter, _next):
+        if current is not None:
+            for jti in keys:
+                current.add(jti)
+
+
+async def revoke_token(jti: str, expires_at: datetime.datetime) -> None:
+    """
+    Revoke a token in all workers.
+
+    Parameters:
+    - `jti` (str): The ID of the token.
+    - `expires_at` (datetime): The expiry of the token, after which the
+    revocation is forgotten.
+    """
+    try:
+        await RevokedToken.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        # Already revoked
+        return
+    await publish(REVOCATION_TOPIC, jti)
+
+
+async def is_revoked(jti: str) -> bool:
+    """
+    Check whether a token was revoked.
+
+    Parameters:
+    - `jti` (str): The ID of the token.
+
+    Returns:
+    - True if the token was revoked.
+    """
+    stats["checks"] += 1
+    if _filter is not None and jti not in _filter:
+        return False
+    stats["lookups"] += 1
+    return await RevokedToken.filter(jti=jti).exists()
+
+
+async def _refresh_periodically() -> None:
+    while True:
+        await asyncio.sleep(REVOCATION_REFRESH_INTERVAL)
+        _schedule_rebuild()
+
+
+async def start_revocation() -> None:
+    """
+    Build the revocation filter and start its periodic rebuild.
+    """
+    global _refresher
+    _schedule_rebuild()
+    _refresher = asyncio.create_task(_refresh_periodically())
+
+
+async def stop_revocation() -> None:
+    """
+    Stop the rebuilds of the revocation filter.
+    """
+    global _refresher
+    tasks = [task for task in (_refresher, _rebuild) if task is not None]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _refresher = None
+
+
+subscribe(REVOCATION_TOPIC, on_revocation)
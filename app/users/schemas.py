@@ -1,4 +1,6 @@
-from pydantic import BaseModel, EmailStr, constr, validator
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, EmailStr, Field, constr, validator
 from fastapi import HTTPException, status
 from tortoise.contrib.pydantic import pydantic_model_creator
 from app.users.models import User
@@ -185,3 +187,45 @@ class UserLogin(BaseModel):
     """
     email_or_phone: str
     password: str
+
+
+class UserBulkRequestSchema(BaseModel):
+    """
+    Pydantic schema for creating many users at once.
+
+    Attributes:
+    - `users` (List[dict]): The `UserCreate` payloads. They are validated
+    one by one, so an invalid row does not reject the whole request.
+    """
+    users: List[Dict[str, Any]] = Field(..., min_length=1)
+
+
+class UserBulkResultSchema(BaseModel):
+    """
+    Pydantic schema for the outcome of one row of a bulk creation.
+
+    Attributes:
+    - `index` (int): The position of the row in the request.
+    - `email` (str | None): The email of the row, if any.
+    - `id` (int | None): The ID of the created user.
+    - `errors` (List[str]): The reasons the row was rejected.
+    """
+    index: int
+    email: Optional[str] = None
+    id: Optional[int] = None
+    errors: List[str] = []
+
+
+class UserBulkSchema(BaseModel):
+    """
+    Pydantic schema for the result of a bulk creation.
+
+    Attributes:
+    - `created` (int): The number of created users.
+    - `failed` (int): The number of rejected rows.
+    - `results` (List[UserBulkResultSchema]): The per-row results,
+    in request order.
+    """
+    created: int
+    failed: int
+    results: List[UserBulkResultSchema]
@@ -1,9 +1,25 @@
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
 from fastapi import Depends, HTTPException, status
-from .auth import oauth2_scheme, verify_token
+from pydantic import ValidationError
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
+from .auth import oauth2_scheme, user_cache, verify_token
 
+from app.core.config import USER_BULK_CHUNK_SIZE
+from app.core.invalidation import publish
 from app.users.models import User
-from app.users.schemas import UserCreate
-from passlib.hash import bcrypt
+from app.users.schemas import UserCreate, UserOut
+from app.users.hashing import hash_password, hash_passwords
+from starlette.concurrency import run_in_threadpool
+
+# User already authenticated by the enclosing request, set for the
+# sub-requests of a batch so their token is not verified again
+authenticated_user: ContextVar[Optional[UserOut]] = ContextVar(
+    "authenticated_user", default=None
+)
 
 
 async def register_user(user_data: UserCreate):
@@ -38,8 +54,9 @@ async def register_user(user_data: UserCreate):
         full_name=user_data.full_name,
         email=user_data.email,
         phone=user_data.phone,
-        password_hash=bcrypt.hash(user_data.password)
+        password_hash=await run_in_threadpool(hash_password, user_data.password)
     )
+    await publish(user_cache.name, user.email)
     return user
 
 
@@ -62,7 +79,137 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
       user = await get_current_user("valid_token_here")
       ```
       """
+    user = authenticated_user.get()
+    if user is not None:
+        return user
     user = await verify_token(token)
     if user is None:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     return user
+
+
+def _row_errors(exc: Exception) -> List[str]:
+    if isinstance(exc, ValidationError):
+        return [
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+            for error in exc.errors()
+        ]
+    if isinstance(exc.detail, dict):
+        return [f"{key}: {value}" for key, value in exc.detail.items()]
+    return [str(exc.detail)]
+
+
+async def _create_users_chunk(
+        chunk: List[Tuple[int, UserCreate]],
+        results: List[Dict]
+) -> None:
+    emails = [user_data.email for _, user_data in chunk]
+    phones = [user_data.phone for _, user_data in chunk]
+    taken = await User.filter(
+        Q(email__in=emails) | Q(phone__in=phones)
+    ).values_list("email", "phone")
+    taken_emails = {email for email, _ in taken}
+    taken_phones = {phone for _, phone in taken}
+
+    fresh = []
+    for index, user_data in chunk:
+        errors = []
+        if user_data.email in taken_emails:
+            errors.append("email: User with this email already exists")
+        if user_data.phone in taken_phones:
+            errors.append("phone: User with this phone already exists")
+        if errors:
+            results[index]["errors"] = errors
+        else:
+            fresh.append((index, user_data))
+    if not fresh:
+        return
+
+    hashes = await hash_passwords([user_data.password for _, user_data in fresh])
+    rows = [
+        dict(
+            full_name=user_data.full_name,
+            email=user_data.email,
+            phone=user_data.phone,
+            password_hash=password_hash
+        )
+        for (_, user_data), password_hash in zip(fresh, hashes)
+    ]
+    try:
+        async with in_transaction():
+            await User.bulk_create([User(**row) for row in rows])
+        ids = dict(await User.filter(
+            email__in=[row["email"] for row in rows]
+        ).values_list("email", "id"))
+        for (index, _), row in zip(fresh, rows):
+            results[index]["id"] = ids.get(row["email"])
+    except IntegrityError:
+        # Another request took an email or phone after the check above,
+        # insert row by row to find out which one.
+        for (index, _), row in zip(fresh, rows):
+            try:
+                user = await User.create(**row)
+            except IntegrityError:
+                results[index]["errors"] = [
+                    "User with this email or phone already exists"
+                ]
+            else:
+                results[index]["id"] = user.id
+
+    created = [row["email"] for (index, _), row in zip(fresh, rows)
+               if results[index]["id"] is not None]
+    if created:
+        await publish(user_cache.name, *created)
+
+
+async def bulk_register_users(rows: List[Dict]) -> List[Dict]:
+    """
+    Register many users at once.
+
+    Rows are validated as `UserCreate` one by one; rows repeating an email
+    or phone of an earlier row are rejected. Valid rows are processed in
+    chunks of `USER_BULK_CHUNK_SIZE`: one query checks the uniqueness of
+    the whole chunk, passwords are hashed in a process pool and the users
+    are inserted with `bulk_create`.
+
+    Args:
+    - `rows` (List[dict]): The `UserCreate` payloads.
+
+    Returns:
+    - `List[dict]`: One result per row, in the order of `rows`, with the
+    `id` of the created user or the `errors` that rejected the row.
+
+    Example:
+    ```python
+    results = await bulk_register_users([
+        {"full_name": "John Doe", "email": "john@example.com",
+         "phone": "+71234567890", "password": "Password123!",
+         "confirm_password": "Password123!"},
+    ])
+    ```
+    """
+    results = []
+    valid = []
+    seen_emails, seen_phones = set(), set()
+    for index, row in enumerate(rows):
+        result = {"index": index, "email": row.get("email"), "id": None, "errors": []}
+        results.append(result)
+        try:
+            user_data = UserCreate(**row)
+        except (ValidationError, HTTPException) as exc:
+            result["errors"] = _row_errors(exc)
+            continue
+
+        result["email"] = user_data.email
+        if user_data.email in seen_emails:
+            result["errors"].append("email: Duplicate email in the batch")
+        if user_data.phone in seen_phones:
+            result["errors"].append("phone: Duplicate phone in the batch")
+        seen_emails.add(user_data.email)
+        seen_phones.add(user_data.phone)
+        if not result["errors"]:
+            valid.append((index, user_data))
+
+    for start in range(0, len(valid), USER_BULK_CHUNK_SIZE):
+        await _create_users_chunk(valid[start:start + USER_BULK_CHUNK_SIZE], results)
+    return results
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.users.auth import generate_tokens
-from app.users.schemas import UserCreate, UserReg
-from app.users.services import register_user
+from app.core.config import USER_BULK_MAX_ROWS
+from app.users.auth import generate_tokens, oauth2_scheme, revoke_access_token
+from app.users.schemas import (
+    UserBulkRequestSchema, UserBulkSchema, UserCreate, UserReg
+)
+from app.users.services import (
+    bulk_register_users, get_current_user, register_user
+)
 
 user_router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -31,6 +36,39 @@ async def register(user_data: UserCreate):
     )
 
 
+@user_router.post("/bulk",
+                  response_model=UserBulkSchema,
+                  dependencies=[Depends(get_current_user)]
+                  )
+async def register_bulk(data: UserBulkRequestSchema):
+    """
+    Register many users at once.
+
+    Args:
+    - `data` (UserBulkRequestSchema): The `UserCreate` payloads,
+    no more than `USER_BULK_MAX_ROWS`.
+
+    Raises:
+    - `HTTPException`: If too many rows are sent.
+
+    Returns:
+    - `UserBulkSchema`: The per-row results. Invalid or duplicate rows
+    are reported without rejecting the other rows.
+    """
+    if len(data.users) > USER_BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"No more than {USER_BULK_MAX_ROWS} users are allowed"
+        )
+    results = await bulk_register_users(data.users)
+    failed = sum(1 for result in results if result["errors"])
+    return {
+        "created": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    }
+
+
 @user_router.post("/login")
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """
@@ -47,3 +85,22 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """
     token = await generate_tokens(form_data.username, form_data.password)
     return token
+
+
+@user_router.post("/logout", dependencies=[Depends(get_current_user)])
+async def logout(token: str = Depends(oauth2_scheme)):
+    """
+    Revoke the access token of the current user.
+
+    Args:
+    - `token` (str): The user's access token.
+
+    Raises:
+    - `HTTPException`: If the provided token is invalid or already revoked.
+
+    Returns:
+    - A confirmation message. The token is rejected by every worker
+    until it expires.
+    """
+    await revoke_access_token(token)
+    return {"detail": "Successfully logged out"}
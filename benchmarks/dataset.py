@@ -0,0 +1,394 @@
+"""
+Generate a production-sized dataset of categories, products, users and
+carts in the database configured in `.env`:
+```bash
+python -m benchmarks.dataset --products 1000000 --users 200000 --seed 1
+```
+
+The database must be migrated first (`aerich upgrade --in-transaction
+False`). Rows are written with `COPY` on Postgres and with batched
+`executemany` on SQLite, after the existing rows of every table. The data
+only depends on the options: the same options on an empty database give
+the same rows, except for the cart dates.
+
+- Users all have the password given by `--password`, hashed once with the
+current hashing policy, and the emails `user<id>@dataset.example`.
+- Products are created over `--days` days, in ID order, with log-normal
+prices, and `--inactive` of them are inactive.
+- Carts are skewed: the product of popularity rank `r` is picked with a
+probability proportional to `1 / r ** zipf`, the ranks being shuffled
+over the product IDs.
+- Cart items are dated within the `--cart-days` days before the load, so
+that the cart sweeper (`CART_TTL_DAYS`) does not remove them as expired.
+- The popularity and co-occurrence counters are filled from the carts as
+the cart routes would have done.
+
+Restart the application after loading, its caches do not see the rows.
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from array import array
+from collections import Counter
+from datetime import date, datetime, time as day_time, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+from tortoise import Tortoise, connections
+from tortoise.exceptions import OperationalError
+
+from app.categories.models import PATH_SEPARATOR
+from app.core.config import DATABASE_URL, MODELS
+from app.core.db import execute_sql
+from app.products.services import add_trending, trending_log_weight
+from app.users.hashing import hash_password
+
+ADJECTIVES = (
+    "Compact", "Classic", "Wireless", "Organic", "Smart", "Portable", "Steel",
+    "Wooden", "Premium", "Eco", "Vintage", "Mini", "Ultra", "Soft", "Digital",
+)
+NOUNS = (
+    "Lamp", "Chair", "Kettle", "Headphones", "Backpack", "Mug", "Blender",
+    "Jacket", "Notebook", "Speaker", "Watch", "Pillow", "Bottle", "Camera",
+)
+FIRST_NAMES = (
+    "Anna", "Ivan", "Maria", "Alexey", "Olga", "Dmitry", "Elena", "Sergey",
+    "Natalia", "Pavel", "Irina", "Mikhail", "Tatiana", "Nikolai",
+)
+LAST_NAMES = (
+    "Ivanov", "Smirnov", "Kuznetsov", "Popov", "Sokolov", "Lebedev",
+    "Kozlov", "Novikov", "Morozov", "Volkov", "Orlov", "Fedorov",
+)
+WORDS = (
+    "durable", "light", "everyday", "design", "quality", "warranty", "gift",
+    "home", "office", "travel", "comfort", "fast", "quiet", "reliable",
+)
+
+MAX_CART_LINES = 50
+MAX_QUANTITY = 10
+
+MIGRATIONS = Path(__file__).resolve().parent.parent / "migrations" / "models"
+
+# Date of the newest products, fixed so that a seed always gives the same rows
+DEFAULT_UNTIL = date(2026, 10, 1)
+
+
+class Writer:
+    """
+    Bulk writer of rows with explicit IDs.
+
+    Attributes:
+    - `client`: The Tortoise connection client.
+    - `batch_size` (int): The number of rows sent per statement.
+    """
+
+    def __init__(self, client, batch_size: int):
+        self.client = client
+        self.batch_size = batch_size
+        self.postgres = client.capabilities.dialect == "postgres"
+
+    async def next_id(self, table: str) -> int:
+        """
+        Get the first free ID of a table.
+        """
+        _, rows = await self.client.execute_query(
+            f'SELECT COALESCE(MAX("id"), 0) + 1 AS "next" FROM "{table}"'
+        )
+        return rows[0]["next"]
+
+    async def write(self, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+        """
+        Insert rows by batches.
+
+        Parameters:
+        - `table` (str): The table name.
+        - `columns` (Sequence[str]): The column names, in row order.
+        - `rows` (Iterable[tuple]): The rows.
+
+        Returns:
+        - The number of rows inserted.
+        """
+        started = time.perf_counter()
+        count = 0
+        rows = iter(rows)
+        while batch := list(itertools.islice(rows, self.batch_size)):
+            if self.postgres:
+                async with self.client.acquire_connection() as connection:
+                    await connection.copy_records_to_table(table, records=batch, columns=list(columns))
+            else:
+                placeholders = ", ".join("?" * len(columns))
+                names = ", ".join(f'"{column}"' for column in columns)
+                await self.client.execute_many(
+                    f'INSERT INTO "{table}" ({names}) VALUES ({placeholders})',
+                    [[_sqlite_value(value) for value in row] for row in batch]
+                )
+            count += len(batch)
+        elapsed = time.perf_counter() - started
+        print(f"{table:<20} {count:>10} rows {elapsed:8.1f} s {count / max(elapsed, 1e-9):10.0f} rows/s")
+        return count
+
+    async def reset_sequences(self, tables: Iterable[str]) -> None:
+        """
+        Move the ID sequences of Postgres tables after the inserted IDs.
+        """
+        if not self.postgres:
+            # AUTOINCREMENT follows explicit IDs
+            return
+        for table in tables:
+            await self.client.execute_query(
+                f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), MAX(\"id\")) FROM \"{table}\""
+            )
+
+
+async def check_migrated() -> None:
+    """
+    Check that the latest migration was applied to the database.
+
+    Tables created by `Tortoise.generate_schemas` lack the indexes only
+    the migrations build, and a later `aerich upgrade` would collide with
+    them.
+
+    Raises:
+    - `SystemExit`: If the database is not migrated.
+    """
+    latest = max(
+        (path.name for path in MIGRATIONS.glob("[0-9]*_*.py")),
+        key=lambda name: int(name.split("_", 1)[0])
+    )
+    try:
+        _, rows = await execute_sql('SELECT 1 FROM "aerich" WHERE "version" = $1', [latest])
+    except OperationalError:
+        rows = []
+    if not rows:
+        raise SystemExit(
+            f"The database is not migrated up to {latest}, "
+            "run `aerich upgrade --in-transaction False` first"
+        )
+
+
+def _sqlite_value(value):
+    # The representations of the Tortoise SQLite executor
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def category_rows(rng: random.Random, first_id: int, count: int) -> Iterator[tuple]:
+    """
+    Generate a category tree, a tenth of the categories being roots.
+    """
+    paths: List[str] = []
+    for index in range(count):
+        category_id = first_id + index
+        if index < max(count // 10, 1):
+            parent_id, path, depth = None, "", 0
+        else:
+            parent = rng.randrange(index)
+            parent_id, path = first_id + parent, paths[parent]
+            depth = path.count(PATH_SEPARATOR)
+        path += f"{category_id}{PATH_SEPARATOR}"
+        paths.append(path)
+        yield category_id, f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}s", parent_id, path, depth
+
+
+def product_rows(
+        rng: random.Random,
+        first_id: int,
+        count: int,
+        categories: range,
+        start: datetime,
+        end: datetime,
+        inactive: float
+) -> Iterator[tuple]:
+    """
+    Generate products created at regular intervals between two dates.
+    """
+    step = (end - start) / max(count, 1)
+    for index in range(count):
+        created_at = start + step * index
+        updated_at = min(created_at + timedelta(seconds=rng.expovariate(1 / 86400)), end)
+        price = Decimal(f"{min(max(rng.lognormvariate(7, 1.2), 1), 999999.99):.2f}")
+        description = " ".join(rng.choices(WORDS, k=rng.randint(5, 30)))
+        category_id = rng.choice(categories) if categories and rng.random() > 0.05 else None
+        yield (
+            first_id + index,
+            f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {first_id + index}",
+            price, description, created_at, updated_at,
+            rng.random() >= inactive, category_id,
+        )
+
+
+def user_rows(rng: random.Random, first_id: int, count: int, password_hash: str) -> Iterator[tuple]:
+    """
+    Generate users sharing one password hash.
+    """
+    for user_id in range(first_id, first_id + count):
+        yield (
+            user_id,
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            f"user{user_id}@dataset.example",
+            f"+7{9000000000 + user_id}",
+            password_hash,
+        )
+
+
+def zipf_weights(count: int, exponent: float) -> array:
+    """
+    Get the cumulative Zipf weights of `count` popularity ranks.
+    """
+    return array("d", itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class CartGenerator:
+    """
+    Generator of skewed carts, counting popularity as the rows are made.
+
+    Attributes:
+    - `popularity` (Dict[int, list]): The cart count, quantity and
+    trending score of every product put in a cart.
+    - `cooccurrence` (Counter): The number of carts of every ordered pair
+    of products.
+    """
+
+    def __init__(
+            self,
+            rng: random.Random,
+            products: range,
+            exponent: float,
+            mean_lines: float,
+            start: datetime,
+            end: datetime
+    ):
+        self.rng = rng
+        self.ranked = array("l", products)
+        rng.shuffle(self.ranked)
+        self.weights = zipf_weights(len(products), exponent)
+        self.mean_lines = mean_lines
+        self.start = start
+        self.span = (end - start).total_seconds()
+        self.popularity: Dict[int, list] = {}
+        self.cooccurrence: Counter = Counter()
+
+    def _lines(self) -> List[int]:
+        count = min(round(self.rng.expovariate(1 / self.mean_lines)), MAX_CART_LINES, len(self.ranked))
+        picked: Dict[int, None] = {}
+        while len(picked) < count:
+            for rank in self.rng.choices(range(len(self.ranked)), cum_weights=self.weights, k=count - len(picked)):
+                picked[self.ranked[rank]] = None
+        return list(picked)
+
+    def rows(self, first_id: int, users: range) -> Iterator[tuple]:
+        """
+        Generate the cart items of users.
+        """
+        cart_id = first_id
+        for user_id in users:
+            products = self._lines()
+            for product_id in products:
+                quantity = min(1 + int(self.rng.expovariate(1)), MAX_QUANTITY)
+                created_at = self.start + timedelta(seconds=self.rng.random() * self.span)
+                counters = self.popularity.setdefault(product_id, [0, 0, 0.0])
+                counters[0] += 1
+                counters[1] += quantity
+                counters[2] = add_trending(counters[2], trending_log_weight(quantity, created_at.timestamp()))
+                yield cart_id, quantity, created_at, created_at, product_id, user_id
+                cart_id += 1
+            for product_a, product_b in itertools.permutations(products, 2):
+                self.cooccurrence[product_a, product_b] += 1
+
+
+async def generate(options: argparse.Namespace) -> None:
+    await Tortoise.init(db_url=DATABASE_URL, modules={"models": [*MODELS]})
+    writer = Writer(connections.get("default"), options.batch_size)
+    rng = random.Random(options.seed)
+    end = datetime.combine(options.until, day_time(), timezone.utc)
+    loaded_at = datetime.now(timezone.utc)
+    print(f"backend: {writer.client.capabilities.dialect}")
+    try:
+        await check_migrated()
+        first = await writer.next_id("category")
+        await writer.write(
+            "category", ("id", "name", "parent_id", "path", "depth"),
+            category_rows(rng, first, options.categories)
+        )
+        categories = range(first, first + options.categories)
+
+        first = await writer.next_id("product")
+        await writer.write(
+            "product",
+            ("id", "name", "price", "description", "created_at", "updated_at", "is_active", "category_id"),
+            product_rows(
+                rng, first, options.products, categories,
+                end - timedelta(days=options.days), end, options.inactive
+            )
+        )
+        products = range(first, first + options.products)
+
+        first = await writer.next_id("user")
+        await writer.write(
+            "user", ("id", "full_name", "email", "phone", "password_hash"),
+            user_rows(rng, first, options.users, hash_password(options.password))
+        )
+        users = range(first, first + options.users)
+
+        if products and options.cart_lines > 0:
+            carts = CartGenerator(
+                rng, products, options.zipf, options.cart_lines,
+                loaded_at - timedelta(days=options.cart_days), loaded_at
+            )
+            await writer.write(
+                "cart", ("id", "quantity", "created_at", "updated_at", "product_id", "user_id"),
+                carts.rows(await writer.next_id("cart"), users)
+            )
+            first = await writer.next_id("productpopularity")
+            await writer.write(
+                "productpopularity", ("id", "product_id", "cart_count", "quantity", "trending"),
+                (
+                    (first + index, product_id, *counters)
+                    for index, (product_id, counters) in enumerate(sorted(carts.popularity.items()))
+                )
+            )
+            first = await writer.next_id("productcooccurrence")
+            await writer.write(
+                "productcooccurrence", ("id", "product_a_id", "product_b_id", "count"),
+                (
+                    (first + index, product_a, product_b, count)
+                    for index, ((product_a, product_b), count) in enumerate(sorted(carts.cooccurrence.items()))
+                )
+            )
+        await writer.reset_sequences(
+            ("category", "product", "user", "cart", "productpopularity", "productcooccurrence")
+        )
+    finally:
+        await Tortoise.close_connections()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--categories", type=int, default=200)
+    parser.add_argument("--cart-lines", type=float, default=3, help="mean number of items per cart")
+    parser.add_argument("--zipf", type=float, default=1.1, help="exponent of the product popularity")
+    parser.add_argument("--inactive", type=float, default=0.05, help="share of inactive products")
+    parser.add_argument("--days", type=float, default=365, help="age of the oldest product")
+    parser.add_argument("--cart-days", type=float, default=14, help="age of the oldest cart item at load time")
+    parser.add_argument("--until", type=date.fromisoformat, default=DEFAULT_UNTIL, help=f"date of the newest products, {DEFAULT_UNTIL} by default")
+    parser.add_argument("--password", default="dataset-password")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    options = parser.parse_args()
+    if not 0 <= options.inactive <= 1 or options.zipf <= 0:
+        parser.error("--inactive must be within [0, 1] and --zipf positive")
+    asyncio.run(generate(options))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare the generic Tortoise query path with the fast paths
+of `app/core/fastpath.py` for the three hottest queries.
+
+Runs against the database configured in `.env`:
+```bash
+python -m benchmarks.fastpath --iterations 5000
+```
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from tortoise import Tortoise
+
+from app.cart.models import Cart
+from app.core.config import DATABASE_ENGINE, DATABASE_URL, MODELS
+from app.core.db import register_sqlite_decimals
+from app.core.fastpath import (
+    fetch_active_product, fetch_cart_lines, fetch_user_by_email
+)
+from app.products.models import Product
+from app.users.models import User
+
+
+async def _measure(name: str, func, iterations: int) -> float:
+    await func()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await func()
+    elapsed = time.perf_counter() - started
+    per_call = elapsed / iterations * 1e6
+    print(f"{name:<32} {per_call:10.1f} us/op {iterations / elapsed:10.0f} op/s")
+    return per_call
+
+
+async def run(iterations: int) -> None:
+    await Tortoise.init(db_url=DATABASE_URL, modules={"models": [*MODELS]})
+    await Tortoise.generate_schemas(safe=True)
+    if DATABASE_ENGINE == "sqlite":
+        register_sqlite_decimals()
+    suffix = uuid.uuid4().hex[:8]
+    user = await User.create(
+        full_name="Benchmark",
+        email=f"bench-{suffix}@example.com",
+        phone=f"+7{suffix[:10]}",
+        password_hash="-",
+    )
+    products = [
+        await Product.create(name=f"bench {i}", description="-", price=10 + i)
+        for i in range(5)
+    ]
+    for product in products:
+        await Cart.create(user=user, product=product, quantity=2)
+
+    cases = [
+        (
+            "user by email",
+            lambda: User.filter(email=user.email).first(),
+            lambda: fetch_user_by_email(user.email),
+        ),
+        (
+            "active product by id",
+            lambda: Product.filter(id=products[0].id, is_active=True).first(),
+            lambda: fetch_active_product(products[0].id),
+        ),
+        (
+            "cart lines by user",
+            lambda: Cart.filter(user_id=user.id).all(),
+            lambda: fetch_cart_lines(user.id),
+        ),
+    ]
+    try:
+        print(f"backend: {Tortoise.get_connection('default').capabilities.dialect}")
+        for name, orm, fast in cases:
+            orm_time = await _measure(f"{name} (orm)", orm, iterations)
+            fast_time = await _measure(f"{name} (fast path)", fast, iterations)
+            print(f"{'':<32} speedup x{orm_time / fast_time:.2f}")
+    finally:
+        await Cart.filter(user_id=user.id).delete()
+        await Product.filter(id__in=[product.id for product in products]).delete()
+        await user.delete()
+        await Tortoise.close_connections()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    options = parser.parse_args()
+    asyncio.run(run(options.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+from tortoise import BaseDBAsyncClient
+
+from app.core.db import create_index_concurrently
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        return """
+        ALTER TABLE "productpopularity" ADD "views" INT NOT NULL  DEFAULT 0;
+CREATE INDEX IF NOT EXISTS "idx_productpopu_views_507395" ON "productpopularity" ("views", "product_id");"""
+
+    await db.execute_script('ALTER TABLE "productpopularity" ADD COLUMN IF NOT EXISTS "views" INT NOT NULL DEFAULT 0')
+    await create_index_concurrently(db, "idx_productpopu_views_507395", 'ON "productpopularity" ("views", "product_id")')
+    # aerich runs the returned script, Postgres rejects an empty one
+    return "SELECT 1;"
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_productpopu_views_507395";
+ALTER TABLE "productpopularity" DROP COLUMN "views";"""
@@ -0,0 +1,12 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Trending scores are now stored as ln(1 + sum of the weights)
+    return """
+        UPDATE "productpopularity" SET "trending" = LN(1 + "trending") WHERE "trending" > 0;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        UPDATE "productpopularity" SET "trending" = EXP("trending") - 1 WHERE "trending" > 0;"""
@@ -0,0 +1,51 @@
+from tortoise import BaseDBAsyncClient
+
+from app.core.db import create_index_concurrently
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        return """
+        CREATE TABLE IF NOT EXISTS "category" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "name" VARCHAR(255) NOT NULL,
+    "path" VARCHAR(255) NOT NULL  DEFAULT '',
+    "depth" INT NOT NULL  DEFAULT 0,
+    "parent_id" INT REFERENCES "category" ("id") ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS "idx_category_path_09eb5d" ON "category" ("path");
+ALTER TABLE "product" ADD "category_id" INT REFERENCES "category" ("id") ON DELETE SET NULL;
+CREATE INDEX IF NOT EXISTS "idx_product_categor_2b519b" ON "product" ("category_id");"""
+    await db.execute_script("""
+        CREATE TABLE IF NOT EXISTS "category" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "name" VARCHAR(255) NOT NULL,
+    "path" VARCHAR(255) NOT NULL  DEFAULT '',
+    "depth" INT NOT NULL  DEFAULT 0,
+    "parent_id" INT REFERENCES "category" ("id") ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS "idx_category_path_09eb5d" ON "category" ("path" varchar_pattern_ops);
+ALTER TABLE "product" ADD COLUMN IF NOT EXISTS "category_id" INT;
+DO $$ BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'fk_product_category_5a1c7e') THEN
+        ALTER TABLE "product" ADD CONSTRAINT "fk_product_category_5a1c7e" FOREIGN KEY ("category_id")
+            REFERENCES "category" ("id") ON DELETE SET NULL NOT VALID;
+    END IF;
+END $$;
+ALTER TABLE "product" VALIDATE CONSTRAINT "fk_product_category_5a1c7e";""")
+    await create_index_concurrently(db, "idx_product_categor_2b519b", 'ON "product" ("category_id")')
+    # aerich runs the returned script, Postgres rejects an empty one
+    return "SELECT 1;"
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        return """
+        DROP INDEX IF EXISTS "idx_product_categor_2b519b";
+ALTER TABLE "product" DROP COLUMN "category_id";
+DROP TABLE IF EXISTS "category";"""
+    return """
+        ALTER TABLE "product" DROP CONSTRAINT "fk_product_category_5a1c7e";
+DROP INDEX IF EXISTS "idx_product_categor_2b519b";
+ALTER TABLE "product" DROP COLUMN "category_id";
+DROP TABLE IF EXISTS "category";"""
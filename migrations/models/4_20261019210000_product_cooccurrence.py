@@ -0,0 +1,50 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        return """
+        CREATE TABLE IF NOT EXISTS "cart" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "quantity" INT NOT NULL  DEFAULT 1,
+    "product_id" INT NOT NULL REFERENCES "product" ("id") ON DELETE CASCADE,
+    "user_id" INT NOT NULL REFERENCES "user" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_cart_user_id_d2f7dd" UNIQUE ("user_id", "product_id")
+);
+CREATE TABLE IF NOT EXISTS "productcooccurrence" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "count" INT NOT NULL  DEFAULT 0,
+    "product_a_id" INT NOT NULL REFERENCES "product" ("id") ON DELETE CASCADE,
+    "product_b_id" INT NOT NULL REFERENCES "product" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_productcooc_product_27e22f" UNIQUE ("product_a_id", "product_b_id")
+);
+CREATE INDEX IF NOT EXISTS "idx_productcooc_product_a23b5d" ON "productcooccurrence" ("product_a_id", "count");
+INSERT INTO "productcooccurrence" ("product_a_id", "product_b_id", "count")
+SELECT "a"."product_id", "b"."product_id", COUNT(*) FROM "cart" "a"
+JOIN "cart" "b" ON "b"."user_id" = "a"."user_id" AND "b"."product_id" <> "a"."product_id"
+GROUP BY "a"."product_id", "b"."product_id";"""
+    return """
+        CREATE TABLE IF NOT EXISTS "cart" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "quantity" INT NOT NULL  DEFAULT 1,
+    "product_id" INT NOT NULL REFERENCES "product" ("id") ON DELETE CASCADE,
+    "user_id" INT NOT NULL REFERENCES "user" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_cart_user_id_d2f7dd" UNIQUE ("user_id", "product_id")
+);
+CREATE TABLE IF NOT EXISTS "productcooccurrence" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "count" INT NOT NULL  DEFAULT 0,
+    "product_a_id" INT NOT NULL REFERENCES "product" ("id") ON DELETE CASCADE,
+    "product_b_id" INT NOT NULL REFERENCES "product" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_productcooc_product_27e22f" UNIQUE ("product_a_id", "product_b_id")
+);
+CREATE INDEX IF NOT EXISTS "idx_productcooc_product_a23b5d" ON "productcooccurrence" ("product_a_id", "count");
+INSERT INTO "productcooccurrence" ("product_a_id", "product_b_id", "count")
+SELECT "a"."product_id", "b"."product_id", COUNT(*) FROM "cart" "a"
+JOIN "cart" "b" ON "b"."user_id" = "a"."user_id" AND "b"."product_id" <> "a"."product_id"
+GROUP BY "a"."product_id", "b"."product_id";"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "productcooccurrence";"""
@@ -0,0 +1,34 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        return """
+        CREATE TABLE IF NOT EXISTS "productpopularity" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "cart_count" INT NOT NULL  DEFAULT 0,
+    "quantity" INT NOT NULL  DEFAULT 0,
+    "trending" REAL NOT NULL  DEFAULT 0,
+    "product_id" INT NOT NULL UNIQUE REFERENCES "product" ("id") ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS "idx_productpopu_cart_co_9341ce" ON "productpopularity" ("cart_count", "product_id");
+CREATE INDEX IF NOT EXISTS "idx_productpopu_trendin_e01e22" ON "productpopularity" ("trending", "product_id");
+INSERT INTO "productpopularity" ("product_id", "cart_count", "quantity", "trending")
+SELECT "product_id", COUNT(*), SUM("quantity"), 0 FROM "cart" GROUP BY "product_id";"""
+    return """
+        CREATE TABLE IF NOT EXISTS "productpopularity" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "cart_count" INT NOT NULL  DEFAULT 0,
+    "quantity" INT NOT NULL  DEFAULT 0,
+    "trending" DOUBLE PRECISION NOT NULL  DEFAULT 0,
+    "product_id" INT NOT NULL UNIQUE REFERENCES "product" ("id") ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS "idx_productpopu_cart_co_9341ce" ON "productpopularity" ("cart_count", "product_id");
+CREATE INDEX IF NOT EXISTS "idx_productpopu_trendin_e01e22" ON "productpopularity" ("trending", "product_id");
+INSERT INTO "productpopularity" ("product_id", "cart_count", "quantity", "trending")
+SELECT "product_id", COUNT(*), SUM("quantity"), 0 FROM "cart" GROUP BY "product_id";"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "productpopularity";"""
@@ -0,0 +1,27 @@
+from tortoise import BaseDBAsyncClient
+
+from app.core.db import create_index_concurrently
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        # SQLite cannot add a column with a non-constant default,
+        # existing items are stamped with the upgrade time instead.
+        return """
+        ALTER TABLE "cart" ADD "created_at" TIMESTAMP NOT NULL  DEFAULT '1970-01-01 00:00:00+00:00';
+ALTER TABLE "cart" ADD "updated_at" TIMESTAMP NOT NULL  DEFAULT '1970-01-01 00:00:00+00:00';
+UPDATE "cart" SET "created_at" = strftime('%Y-%m-%d %H:%M:%f+00:00', 'now'), "updated_at" = strftime('%Y-%m-%d %H:%M:%f+00:00', 'now');
+CREATE INDEX IF NOT EXISTS "idx_cart_updated_d154b0" ON "cart" ("updated_at");"""
+    await db.execute_script("""
+        ALTER TABLE "cart" ADD COLUMN IF NOT EXISTS "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE "cart" ADD COLUMN IF NOT EXISTS "updated_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP;""")
+    await create_index_concurrently(db, "idx_cart_updated_d154b0", 'ON "cart" ("updated_at")')
+    # aerich runs the returned script, Postgres rejects an empty one
+    return "SELECT 1;"
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_cart_updated_d154b0";
+ALTER TABLE "cart" DROP COLUMN "created_at";
+ALTER TABLE "cart" DROP COLUMN "updated_at";"""
@@ -0,0 +1,27 @@
+from tortoise import BaseDBAsyncClient
+
+from app.core.db import create_index_concurrently
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        return """
+        CREATE TABLE IF NOT EXISTS "producttombstone" (
+    "id" INT NOT NULL  PRIMARY KEY,
+    "deleted_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "idx_producttomb_deleted_b07f5e" ON "producttombstone" ("deleted_at", "id");
+CREATE INDEX IF NOT EXISTS "idx_product_updated_610abc" ON "product" ("updated_at", "id");"""
+    await create_index_concurrently(db, "idx_product_updated_610abc", 'ON "product" ("updated_at", "id")')
+    return """
+        CREATE TABLE IF NOT EXISTS "producttombstone" (
+    "id" INT NOT NULL  PRIMARY KEY,
+    "deleted_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "idx_producttomb_deleted_b07f5e" ON "producttombstone" ("deleted_at", "id");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_product_updated_610abc";
+DROP TABLE IF EXISTS "producttombstone";"""
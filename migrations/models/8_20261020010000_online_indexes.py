@@ -0,0 +1,24 @@
+from tortoise import BaseDBAsyncClient
+
+from app.core.db import create_index_concurrently
+
+INDEXES = (
+    ("idx_product_is_acti_9c8617", 'ON "product" ("is_active", "id")'),
+    ("idx_cart_product_8df56c", 'ON "cart" ("product_id")'),
+)
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        return "\n".join(
+            f'CREATE INDEX IF NOT EXISTS "{name}" {target};' for name, target in INDEXES
+        )
+
+    for name, target in INDEXES:
+        await create_index_concurrently(db, name, target)
+    # aerich runs the returned script, Postgres rejects an empty one
+    return "SELECT 1;"
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return "\n".join(f'DROP INDEX IF EXISTS "{name}";' for name, _ in INDEXES)
@@ -0,0 +1,24 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        return """
+        CREATE TABLE IF NOT EXISTS "revokedtoken" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "jti" VARCHAR(64) NOT NULL UNIQUE,
+    "expires_at" TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS "idx_revokedtoke_expires_8751bc" ON "revokedtoken" ("expires_at");"""
+    return """
+        CREATE TABLE IF NOT EXISTS "revokedtoken" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "jti" VARCHAR(64) NOT NULL UNIQUE,
+    "expires_at" TIMESTAMPTZ NOT NULL
+);
+CREATE INDEX IF NOT EXISTS "idx_revokedtoke_expires_8751bc" ON "revokedtoken" ("expires_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "revokedtoken";"""